@@ -11,6 +11,8 @@ if _env_path.exists():
     import dotenv
     dotenv.load_dotenv(_env_path)
 from fastapi import FastAPI, HTTPException
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import PlainTextResponse
 from pydantic import BaseModel
 from typing import Optional
 import sys
@@ -19,13 +21,17 @@ from pathlib import Path
 _OBS = Path(__file__).resolve().parents[3]
 if str(_OBS) not in sys.path:
     sys.path.insert(0, str(_OBS))
+from shared.llm_client import cached_system, get_async_client, hedged_call, record_usage
 from shared.llm_router import LLMRouter
 from shared.llm_router.router import TaskType
 from shared.audit_logger import AuditLogger
+from shared.metrics import REGISTRY
 
 app = FastAPI(title="Apgar Transition Agent", version="1.0.0")
 router_llm = LLMRouter()
 audit = AuditLogger()
+# SLO néonatal : le routeur écarte un modèle dont le p95 observé dépasse ce délai
+_LLM_DEADLINE_MS = float(os.getenv("APGAR_LLM_DEADLINE_MS", os.getenv("LLM_CRITICAL_DEADLINE_MS", "3000")))
 
 class ApgarInput(BaseModel):
     apgar_1min: int
@@ -41,35 +47,52 @@ class ApgarOutput(BaseModel):
     narrative: str
     hitl_required: bool
     fhir_observation: dict
+    prompt_version: Optional[str] = None
 
 def _validate_apgar(apgar_1min: int, apgar_5min: int) -> None:
     if not (0 <= apgar_1min <= 10 and 0 <= apgar_5min <= 10):
         raise HTTPException(status_code=400, detail="Apgar scores must be 0-10")
 
 @app.post("/api/apgar-transition", response_model=ApgarOutput)
-def apgar_transition(input_data: ApgarInput) -> ApgarOutput:
+async def apgar_transition(input_data: ApgarInput) -> ApgarOutput:
     start = time.perf_counter()
     _validate_apgar(input_data.apgar_1min, input_data.apgar_5min)
     risk_apgar_low = input_data.apgar_5min < 7
     hitl_required = input_data.apgar_5min <= 6
-    from shared.prompt_system import build_llm_system_prompt
+    from shared.prompt_system import budget_from_env, build_llm_system_prompt, config_version
 
-    model_id = router_llm.route(task=TaskType.FAST_ANALYSIS, urgency="critical")
-    system = build_llm_system_prompt("ApgarPrompt")
+    # Seuls les modèles Claude sont appelés : le repli sur deadline reste parmi eux
+    model_id = router_llm.route(
+        task=TaskType.FAST_ANALYSIS, urgency="critical", deadline_ms=_LLM_DEADLINE_MS, eligible=lambda m: "claude" in m
+    )
+    system = build_llm_system_prompt("ApgarPrompt", max_tokens=budget_from_env("APGAR_PROMPT_MAX_TOKENS"))
+    prompt_version = config_version()
     user_msg = f"""Apgar 1min={input_data.apgar_1min}, 5min={input_data.apgar_5min}.
 FC={input_data.heart_rate}, respiration={input_data.respiration}, tonus={input_data.tone}, réflexe={input_data.reflex}, couleur={input_data.color}.
 Résumé néonatal ~150 mots et recommandations selon ILCOR 2020. Pas de diagnostic final."""
+
+    async def call(m: str) -> str:
+        r = await get_async_client("anthropic").messages.create(
+            model=router_llm.get_api_model_id(m),
+            max_tokens=300,
+            system=cached_system(system),
+            messages=[{"role": "user", "content": user_msg}],
+        )
+        record_usage("ApgarTransitionAgent", r)
+        return r.content[0].text if r.content else ""
+
     try:
-        if os.getenv("ANTHROPIC_API_KEY"):
-            import anthropic
-            c = anthropic.Anthropic()
-            r = c.messages.create(
-                model="claude-sonnet-4-20250514",
-                max_tokens=300,
-                system=system,
-                messages=[{"role": "user", "content": user_msg}],
+        if os.getenv("ANTHROPIC_API_KEY") and "claude" in model_id:
+            # Appel critique couvert : second modèle de FALLBACK_CHAIN si le primaire dépasse son p90
+            _, narrative = await hedged_call(
+                router_llm,
+                model_id,
+                call,
+                agent_id="ApgarTransitionAgent",
+                urgency="critical",
+                eligible=lambda m: "claude" in m,
+                accept=lambda t: bool(t.strip()),
             )
-            narrative = r.content[0].text if r.content else ""
         else:
             narrative = f"Apgar 1min {input_data.apgar_1min}, 5min {input_data.apgar_5min}. Surveillance néonatale recommandée. Validation pédiatre si 5min ≤ 6."
     except Exception:
@@ -77,7 +100,8 @@ Résumé néonatal ~150 mots et recommandations selon ILCOR 2020. Pas de diagnos
     latency_ms = int((time.perf_counter() - start) * 1000)
     input_hash = hashlib.sha256(str(input_data.model_dump()).encode()).hexdigest()
     output_hash = hashlib.sha256(narrative.encode()).hexdigest()
-    audit.log_event("ApgarTransitionAgent", "evaluate", input_hash, output_hash, confidence=1.0, human_decision="required" if hitl_required else None, latency_ms=latency_ms)
+    # Écriture d'audit (fichier, chaîne de hash) hors de la boucle d'événements
+    await run_in_threadpool(audit.log_event, "ApgarTransitionAgent", "evaluate", input_hash, output_hash, model_version=f"prompt={prompt_version}", confidence=1.0, human_decision="required" if hitl_required else None, latency_ms=latency_ms)
     fhir = {
         "resourceType": "Observation",
         "status": "final",
@@ -88,7 +112,12 @@ Résumé néonatal ~150 mots et recommandations selon ILCOR 2020. Pas de diagnos
         ],
         "note": [{"text": narrative}],
     }
-    return ApgarOutput(risk_apgar_low=risk_apgar_low, narrative=narrative, hitl_required=hitl_required, fhir_observation=fhir)
+    return ApgarOutput(risk_apgar_low=risk_apgar_low, narrative=narrative, hitl_required=hitl_required, fhir_observation=fhir, prompt_version=prompt_version)
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def metrics() -> str:
+    """Prometheus scrape endpoint (LLM tokens: uncached, cache reads / writes, output)."""
+    return REGISTRY.render()
 
 @app.get("/api/apgar-transition/health")
 @app.get("/health")
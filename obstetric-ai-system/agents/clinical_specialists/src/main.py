@@ -13,6 +13,8 @@ from pathlib import Path
 from typing import Any, Optional
 
 from fastapi import FastAPI
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import PlainTextResponse
 from pydantic import BaseModel, Field
 
 def _obstetric_root() -> Path:
@@ -35,7 +37,9 @@ if _env.exists():
     dotenv.load_dotenv(_env)
 
 from shared.audit_logger import AuditLogger
-from shared.prompt_system import build_llm_system_prompt, get_metadata
+from shared.llm_client import cached_system, get_async_client, record_usage
+from shared.metrics import REGISTRY
+from shared.prompt_system import budget_from_env, build_llm_system_prompt, config_version, get_metadata
 
 app = FastAPI(
     title="Clinical Specialists Agent",
@@ -91,8 +95,8 @@ def _anthropic_key_usable() -> bool:
     return True
 
 
-def _run_llm(template_key: str, user_content: str) -> str:
-    system = build_llm_system_prompt(template_key)
+async def _run_llm(template_key: str, user_content: str, agent_id: str = "ClinicalSpecialistsAgent") -> str:
+    system = build_llm_system_prompt(template_key, max_tokens=budget_from_env("CLINICAL_SPECIALISTS_PROMPT_MAX_TOKENS"))
     if not _anthropic_key_usable():
         meta = get_metadata()
         ver = meta.get("version", "2.0")
@@ -103,15 +107,14 @@ def _run_llm(template_key: str, user_content: str) -> str:
     key = os.getenv("ANTHROPIC_API_KEY", "").strip()
     model = os.getenv("ANTHROPIC_CLINICAL_MODEL", "claude-sonnet-4-20250514")
     try:
-        import anthropic
-
-        client = anthropic.Anthropic(api_key=key)
-        msg = client.messages.create(
+        client = get_async_client("anthropic", api_key=key)
+        msg = await client.messages.create(
             model=model,
             max_tokens=1024,
-            system=system,
+            system=cached_system(system),
             messages=[{"role": "user", "content": user_content}],
         )
+        record_usage(agent_id, msg)
         if msg.content and msg.content[0].type == "text":
             return msg.content[0].text
     except Exception as e:
@@ -119,15 +122,18 @@ def _run_llm(template_key: str, user_content: str) -> str:
     return "Réponse vide du modèle. Validation humaine obligatoire."
 
 
-def _make_screening_handler(template_key: str, agent_id: str, ps_ver: str):
-    def handler(body: ScreeningRequest) -> ScreeningResponse:
+def _make_screening_handler(template_key: str, agent_id: str):
+    async def handler(body: ScreeningRequest) -> ScreeningResponse:
         start = time.perf_counter()
         user_msg = _build_user_message(body)
-        narrative = _run_llm(template_key, user_msg)
+        ps_ver = config_version()  # rechargeable à chaud : lue par requête
+        narrative = await _run_llm(template_key, user_msg, agent_id)
         latency_ms = int((time.perf_counter() - start) * 1000)
         ih = hashlib.sha256(body.clinical_context.encode()).hexdigest()
         oh = hashlib.sha256(narrative.encode()).hexdigest()
-        audit.log_event(
+        # Écriture d'audit (fichier, chaîne de hash) hors de la boucle d'événements
+        await run_in_threadpool(
+            audit.log_event,
             agent_id=agent_id,
             action="screening",
             input_hash=ih,
@@ -135,7 +141,7 @@ def _make_screening_handler(template_key: str, agent_id: str, ps_ver: str):
             latency_ms=latency_ms,
             confidence=None,
             human_decision="required",
-            model_version=f"prompt-{template_key}",
+            model_version=f"prompt-{template_key}@{ps_ver}",
         )
         return ScreeningResponse(
             agent_id=agent_id,
@@ -149,11 +155,10 @@ def _make_screening_handler(template_key: str, agent_id: str, ps_ver: str):
     return handler
 
 
-_ps_ver = str(get_metadata().get("version", "2.0.0"))
 for _tk, _suffix, _aid in SCREENINGS:
     app.add_api_route(
         f"/api/clinical-specialists/{_suffix}",
-        _make_screening_handler(_tk, _aid, _ps_ver),
+        _make_screening_handler(_tk, _aid),
         methods=["POST"],
         response_model=ScreeningResponse,
         tags=["clinical-specialists"],
@@ -163,13 +168,18 @@ for _tk, _suffix, _aid in SCREENINGS:
 @app.get("/api/clinical-specialists", tags=["clinical-specialists"])
 def list_screenings() -> dict[str, Any]:
     return {
-        "prompt_system_version": get_metadata().get("version", "2.0.0"),
+        "prompt_system_version": config_version(),
         "screenings": [
             {"path": f"/api/clinical-specialists/{s[1]}", "template": s[0], "agent_id": s[2]} for s in SCREENINGS
         ],
     }
 
 
+@app.get("/metrics", response_class=PlainTextResponse)
+def metrics() -> str:
+    """Prometheus scrape endpoint (LLM tokens: uncached, cache reads / writes, output)."""
+    return REGISTRY.render()
+
 @app.get("/health")
 @app.get("/api/clinical-specialists/health")
 def health() -> dict[str, str]:
@@ -0,0 +1,92 @@
+"""Micro-batching coalescer in front of ml_ctg: concurrent single-row requests share one forward pass."""
+from __future__ import annotations
+
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Callable, Optional
+
+from shared.metrics import REGISTRY
+
+BATCH_SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128)
+
+_batch_size = REGISTRY.histogram(
+    "obstetric_ctg_batch_size", "Rows per coalesced CTG forward pass", buckets=BATCH_SIZE_BUCKETS
+)
+_queue_wait = REGISTRY.histogram(
+    "obstetric_ctg_queue_wait_seconds", "Time a CTG request waited before its batch started"
+)
+_forward_time = REGISTRY.histogram("obstetric_ctg_forward_seconds", "Duration of one coalesced CTG forward pass")
+
+
+class MicroBatcher:
+    """
+    Collects rows submitted from concurrent request threads and calls ``fn(rows)`` once per batch.
+
+    A batch is flushed when it reaches ``max_batch_size`` rows or when the oldest queued row has
+    waited ``max_wait_ms``, so the added latency per request is bounded by ``max_wait_ms``.
+    ``fn`` must return one result per row, in order.
+    """
+
+    def __init__(
+        self,
+        fn: Callable[[list[Any]], list[Any]],
+        max_batch_size: int = 32,
+        max_wait_ms: float = 2.0,
+    ):
+        self.fn = fn
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait_s = max(0.0, max_wait_ms) / 1000.0
+        self._queue: queue.Queue[tuple[Any, Future, float]] = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    def _ensure_worker(self) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="ctg-microbatcher", daemon=True)
+                self._thread.start()
+
+    def submit(self, row: Any) -> Future:
+        fut: Future = Future()
+        self._ensure_worker()
+        self._queue.put((row, fut, time.perf_counter()))
+        return fut
+
+    def __call__(self, row: Any, timeout: Optional[float] = None) -> Any:
+        return self.submit(row).result(timeout=timeout)
+
+    def _collect(self) -> list[tuple[Any, Future, float]]:
+        batch = [self._queue.get()]
+        deadline = batch[0][2] + self.max_wait_s
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            try:
+                item = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            batch.append(item)
+        return batch
+
+    def _run(self) -> None:
+        while True:
+            batch = self._collect()
+            started = time.perf_counter()
+            for _, _, enqueued in batch:
+                _queue_wait.observe(started - enqueued)
+            _batch_size.observe(len(batch))
+            try:
+                results = self.fn([row for row, _, _ in batch])
+                if len(results) != len(batch):
+                    raise RuntimeError(f"batch fn returned {len(results)} results for {len(batch)} rows")
+            except Exception as e:
+                for _, fut, _ in batch:
+                    fut.set_exception(e)
+                continue
+            finally:
+                _forward_time.observe(time.perf_counter() - started)
+            for (_, fut, _), res in zip(batch, results):
+                fut.set_result(res)
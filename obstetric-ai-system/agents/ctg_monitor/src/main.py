@@ -1,17 +1,33 @@
 """
-CTG Monitor Agent - POST /api/ctg-monitor
+CTG Monitor Agent - POST /api/ctg-monitor, POST /api/ctg-monitor/batch
 Input: FHIR Observation (CTG raw). Output: FHIR Observation + narrative, FIGO classification.
-HITL if Pathologique.
+HITL if Pathologique. Without model weights (or features_21), FIGO 2015 rules classify signal_60s
+(any length, 4 Hz) or, failing that, the summary fields. Traces may also come as signal_packed
+(base64 int16 bpm x 4 / float32) or in an application/x-msgpack body (signal_codec).
+With ?narrative=async the classification returns at once with a narrative job id; the LLM narrative
+is fetched on GET /api/ctg-monitor/narrative/{id} or pushed over SSE (.../{id}/events).
+The batch route classifies a whole ward in one forward pass.
+Identical features_21 re-posted within CTG_CACHE_TTL_S reuse the cached result (audited as cache hits).
+WS /api/ctg-monitor/stream: continuous 4 Hz FHR/UC per bed; a periodic sweep classifies every due bed
+in one batch and pushes the result back on the bed's socket.
 """
+import asyncio
 import hashlib
+import json
 import os
 import sys
+import threading
 import time
+import warnings
+from contextlib import asynccontextmanager
 from pathlib import Path
-from typing import Optional
+from typing import Literal, Optional, Union
 
-from fastapi import FastAPI, HTTPException
-from pydantic import BaseModel, Field
+import numpy as np
+from fastapi import FastAPI, HTTPException, Query, WebSocket, WebSocketDisconnect
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
+from pydantic import BaseModel, Field, PrivateAttr, ValidationError
 
 
 def _root_with_shared() -> Path:
@@ -34,24 +50,141 @@ if _env_path.exists():
 
     dotenv.load_dotenv(_env_path)
 
+import batcher
 import ml_ctg
+import narrative_jobs
+import result_cache
+import sessions
+import signal_codec
+from shared.ctg_model import figo_rules, signal_quality
+from shared.llm_client import aclose_clients, cached_system, get_async_client, get_client, hedged_call, record_usage
 from shared.llm_router import LLMRouter
 from shared.llm_router.router import TaskType
 from shared.audit_logger import AuditLogger
+from shared.metrics import REGISTRY
+from shared.prompt_system import config_version
 
-app = FastAPI(title="CTG Monitor Agent", version="1.0.0")
+# Readiness: false until weights are loaded and warm-up forwards have run (see /ready)
+_readiness: dict = {"ready": False, "detail": "starting"}
+
+
+def _warm_up_model() -> None:
+    try:
+        if not ml_ctg.model_available():
+            _readiness.update(ready=True, detail="FIGO rules fallback (no model weights)")
+            return
+        t0 = time.perf_counter()
+        sizes = [int(x) for x in os.getenv("CTG_WARMUP_BATCH_SIZES", "1,8,32").split(",") if x.strip()]
+        ml_ctg.warmup(sizes)
+        _readiness.update(
+            ready=True,
+            detail="model loaded",
+            warmup_ms=int((time.perf_counter() - t0) * 1000),
+            model=ml_ctg.load_info(),
+        )
+    except Exception as e:
+        _readiness.update(ready=False, detail=f"model warm-up failed: {e!s}")
+
+
+@asynccontextmanager
+async def _lifespan(_app: FastAPI):
+    # Background thread: /health (liveness) answers immediately while /ready stays 503 until warm
+    if os.getenv("CTG_EAGER_LOAD", "1") == "1":
+        threading.Thread(target=_warm_up_model, name="ctg-warmup", daemon=True).start()
+    else:
+        _readiness.update(ready=True, detail="lazy load")
+    _ensure_sweeper()
+    yield
+    if _sweeper["task"] is not None:
+        _sweeper["task"].cancel()
+    await aclose_clients()
+
+
+app = FastAPI(title="CTG Monitor Agent", version="1.0.0", lifespan=_lifespan)
+# Corps JSON ou application/x-msgpack (signaux binaires) pour toutes les routes déclarées ci-dessous
+app.router.route_class = signal_codec.MsgpackRoute
 router_llm = LLMRouter()
 audit = AuditLogger()
 
 CLASSES = ["Normal", "Suspect", "Pathologique"]
 
+# Coalesce concurrent single-patient requests into one forward (bounded extra latency: max wait)
+_batcher = (
+    batcher.MicroBatcher(
+        ml_ctg.predict_batch,
+        max_batch_size=int(os.getenv("CTG_BATCH_MAX_SIZE", "32")),
+        max_wait_ms=float(os.getenv("CTG_BATCH_MAX_WAIT_MS", "2")),
+    )
+    if os.getenv("CTG_MICROBATCH", "1") == "1"
+    else None
+)
+
+# Central monitors re-post the same features_21 every refresh: LRU+TTL cache keyed by model fingerprint
+_CACHE_MAX_ENTRIES = int(os.getenv("CTG_CACHE_MAX_ENTRIES", "4096"))
+_CACHE_TTL_S = float(os.getenv("CTG_CACHE_TTL_S", "30"))
+_result_cache = (
+    result_cache.ResultCache("prediction", _CACHE_MAX_ENTRIES, _CACHE_TTL_S)
+    if os.getenv("CTG_RESULT_CACHE", "1") == "1"
+    else None
+)
+_narrative_cache = (
+    result_cache.ResultCache("narrative", _CACHE_MAX_ENTRIES, _CACHE_TTL_S)
+    if _result_cache is not None and os.getenv("CTG_CACHE_NARRATIVE", "1") == "1"
+    else None
+)
+_LLM_FALLBACK_MARKER = "[Erreur LLM: fallback conservateur]"
+# SLO du narratif CTG : modèle dont le p95 observé tient dans ce délai (repli le long de FALLBACK_CHAIN)
+_LLM_DEADLINE_MS = float(os.getenv("CTG_LLM_DEADLINE_MS", os.getenv("LLM_CRITICAL_DEADLINE_MS", "3000")))
+
+# Narratif LLM en tâche de fond (?narrative=async) : la classification n'attend pas l'aller-retour LLM
+_NARRATIVE_MODE = os.getenv("CTG_NARRATIVE_MODE", "sync")
+_SSE_TIMEOUT_S = float(os.getenv("CTG_NARRATIVE_SSE_TIMEOUT_S", "60"))
+_BATCH_LLM_CONCURRENCY = max(1, int(os.getenv("CTG_BATCH_LLM_CONCURRENCY", "8")))
+_narrative_jobs = narrative_jobs.NarrativeJobStore(
+    max_workers=int(os.getenv("CTG_NARRATIVE_WORKERS", "4")),
+    max_jobs=int(os.getenv("CTG_NARRATIVE_MAX_JOBS", "2048")),
+    ttl_s=float(os.getenv("CTG_NARRATIVE_TTL_S", "900")),
+)
+
+# Qualité du signal : fenêtres sous ce ratio (mesuré = 1, réparé = 0,5, perdu = 0) exclues de l'inférence
+_MIN_SIGNAL_QUALITY = float(os.getenv("CTG_MIN_SIGNAL_QUALITY", str(signal_quality.DEFAULT_MIN_QUALITY)))
+
+# Streaming : registre de lits à tableaux préalloués, balayage périodique vectorisé
+_STREAM_WINDOW_S = float(os.getenv("CTG_STREAM_WINDOW_S", "60"))
+_STREAM_HOP_S = float(os.getenv("CTG_STREAM_HOP_S", "15"))
+_SWEEP_INTERVAL_S = float(os.getenv("CTG_SWEEP_INTERVAL_MS", "500")) / 1000.0
+_sessions = sessions.SessionRegistry(
+    max_beds=int(os.getenv("CTG_STREAM_MAX_SESSIONS", "64")),
+    window_s=_STREAM_WINDOW_S,
+    hop_s=_STREAM_HOP_S,
+    idle_timeout_s=float(os.getenv("CTG_STREAM_IDLE_S", "300")),
+)
+_subscribers: dict[str, asyncio.Queue] = {}
+_sweeper: dict = {"task": None, "loop": None}
+
 class CTGInput(BaseModel):
     baseline_bpm: float
     stv_ms: float
     ltv_pct: Optional[float] = None
     decelerations_light: float = 0.0
     decelerations_severe: float = 0.0
-    signal_60s: Optional[list[float]] = None  # 4Hz = 240 points (réservé usage futur TorchServe)
+    signal_60s: Optional[list[float]] = Field(
+        default=None,
+        description="FHR brut 4 Hz (240 points pour 60 s, ou enregistrement plus long) : classification FIGO par règles sans modèle.",
+    )
+    uc_signal: Optional[list[float]] = Field(
+        default=None, description="UC 4 Hz alignée sur signal_60s (typage des décélérations précoces/tardives)."
+    )
+    signal_packed: Optional[Union[bytes, str]] = Field(
+        default=None,
+        description="Alternative compacte à signal_60s : base64 (JSON) ou bin (msgpack), little-endian selon signal_encoding.",
+    )
+    uc_packed: Optional[Union[bytes, str]] = Field(default=None, description="UC compacte, même encodage que signal_packed.")
+    signal_encoding: Literal["int16x4", "float32"] = Field(
+        default="int16x4", description="int16x4 : int16 = bpm x 4 (0,25 bpm) ; float32 : bpm IEEE 754."
+    )
+    _arrays: Optional[tuple] = PrivateAttr(default=None)
+    _cleaned: Optional[signal_quality.CleanedTrace] = PrivateAttr(default=None)
     features_21: Optional[list[float]] = Field(
         default=None,
         description="21 caractéristiques tabulaires UCI (ordre fetal_health.csv, sans la cible). Active le classifieur entraîné.",
@@ -63,74 +196,402 @@ class CTGOutput(BaseModel):
     narrative: str
     hitl_required: bool
     escalation_level: Optional[int] = None
+    signal_quality: Optional[float] = Field(
+        default=None, description="Ratio de qualité du tracé analysé (signal_60s ou fenêtre du flux), 0..1."
+    )
+    narrative_job_id: Optional[str] = Field(
+        default=None,
+        description="Mode async : narratif LLM en cours (GET /api/ctg-monitor/narrative/{id}) ; narrative est alors provisoire.",
+    )
+    prompt_version: Optional[str] = Field(
+        default=None, description="Version du prompt system active (metadata.version+sha du JSON), rechargeable à chaud."
+    )
     fhir_observation: dict
 
+class CTGBatchInput(BaseModel):
+    items: list[CTGInput] = Field(..., min_length=1, max_length=256)
+    include_narrative: bool = Field(
+        default=False,
+        description="Génère le narratif LLM pour chaque patiente (séquentiel, lent). Sinon narratif déterministe.",
+    )
+
+class CTGBatchOutput(BaseModel):
+    results: list[CTGOutput]
+    latency_ms: int
+
+class CTGStreamChunk(BaseModel):
+    """Message WebSocket entrant : échantillons 4 Hz depuis le dernier envoi (0 / NaN = perte de signal)."""
+    patient_id: str = Field(..., min_length=1, max_length=128)
+    fhr: list[float] = Field(..., max_length=2400)  # ≤ 10 min par message
+    uc: Optional[list[float]] = None
+    quality: Optional[list[float]] = Field(default=None, description="Qualité par échantillon 0..1 (moniteur) ; défaut : FHR valide.")
+    close: bool = Field(default=False, description="Libère la session de cette patiente après ingestion.")
+
 def _validate_signal(baseline_bpm: float) -> None:
     if not (110 <= baseline_bpm <= 160):
         raise HTTPException(status_code=400, detail="FHR baseline outside physiological range 110-160 bpm")
 
-def _ml_predict(features_21: Optional[list[float]]) -> tuple[int, float, str]:
-    """Retourne (classe, confiance, version_modèle)."""
+def _validate_input(input_data: CTGInput) -> None:
+    _validate_signal(input_data.baseline_bpm)
+    _signal_arrays(input_data)
+    if input_data.features_21 is not None and len(input_data.features_21) != 21:
+        raise HTTPException(status_code=400, detail="features_21 doit contenir exactement 21 valeurs (ordre fetal_health.csv)")
+
+def _ml_predict(features_21: Optional[list[float]]) -> Optional[tuple[int, float, str]]:
+    """Retourne (classe, confiance, version_modèle), None si le modèle n'est pas utilisable."""
     if features_21 is not None and ml_ctg.model_available():
         try:
-            cls, conf = ml_ctg.predict_from_features(features_21)
-            return cls, conf, "ctg-tabular-2.0"
+            if _batcher is not None:
+                cls, conf = _batcher(features_21)
+            else:
+                cls, conf = ml_ctg.predict_from_features(features_21)
+            return cls, conf, ml_ctg.model_version()
         except Exception:
             pass
-    return 0, 0.92, "rules-fallback"
+    return None
 
-def _llm_analyze(baseline_bpm: float, stv_ms: float, ml_class: int, confidence: float) -> str:
-    from shared.prompt_system import build_llm_system_prompt
+def _ml_predict_batch(features: list[Optional[list[float]]]) -> list[Optional[tuple[int, float, str]]]:
+    """Un seul forward pour toutes les lignes features_21 ; None pour les autres (règles FIGO)."""
+    results: list[Optional[tuple[int, float, str]]] = [None] * len(features)
+    idx = [i for i, f in enumerate(features) if f is not None]
+    if idx and ml_ctg.model_available():
+        try:
+            preds = ml_ctg.predict_batch([features[i] for i in idx])
+            for i, (cls, conf) in zip(idx, preds):
+                results[i] = (cls, conf, ml_ctg.model_version())
+        except Exception:
+            pass
+    return results
+
+def _signal_arrays(input_data: CTGInput) -> tuple[Optional[np.ndarray], Optional[np.ndarray]]:
+    """(FHR, UC) en tableaux NumPy : décodage frombuffer des champs packed, sinon listes JSON ; mémorisé."""
+    if input_data._arrays is None:
+        if input_data.signal_packed is not None and input_data.signal_60s is not None:
+            raise HTTPException(status_code=400, detail="signal_packed et signal_60s sont exclusifs")
+        try:
+            if input_data.signal_packed is not None:
+                fhr = signal_codec.decode(input_data.signal_packed, input_data.signal_encoding)
+            else:
+                fhr = np.asarray(input_data.signal_60s, dtype=np.float64) if input_data.signal_60s else None
+            if input_data.uc_packed is not None:
+                uc = signal_codec.decode(input_data.uc_packed, input_data.signal_encoding)
+            else:
+                uc = np.asarray(input_data.uc_signal, dtype=np.float64) if input_data.uc_signal else None
+        except signal_codec.SignalDecodeError as e:
+            raise HTTPException(status_code=400, detail=str(e)) from e
+        if fhr is not None and not fhr.size:
+            fhr = None
+        if uc is not None and (fhr is None or uc.shape != fhr.shape):
+            uc = None
+        input_data._arrays = (fhr, uc)
+    return input_data._arrays
+
+def _clean_signal(input_data: CTGInput) -> Optional[signal_quality.CleanedTrace]:
+    """Tracé FHR réparé, mémorisé : le gate qualité et le fallback FIGO réutilisent la même réparation."""
+    if input_data._cleaned is None:
+        fhr, _ = _signal_arrays(input_data)
+        if fhr is None:
+            return None
+        input_data._cleaned = signal_quality.clean_fhr(fhr)
+    return input_data._cleaned
+
+def _gate_signal(input_data: CTGInput) -> Optional[float]:
+    """Ratio de qualité de signal_60s ; 422 sous CTG_MIN_SIGNAL_QUALITY (pas d'inférence ni d'escalade)."""
+    cleaned = _clean_signal(input_data)
+    if cleaned is None:
+        return None
+    ratio = round(float(cleaned.ratio[0]), 3)
+    if ratio < _MIN_SIGNAL_QUALITY:
+        raise HTTPException(
+            status_code=422,
+            detail=f"signal quality {ratio} below {_MIN_SIGNAL_QUALITY} (perte de signal / artefacts) : tracé non analysé",
+        )
+    return ratio
+
+def _rules_predict(input_data: CTGInput) -> tuple[int, float, str]:
+    """Fallback FIGO 2015 : tracé brut réparé si fourni (assess vectorisé), sinon champs résumés."""
+    cleaned = _clean_signal(input_data)
+    if cleaned is not None and np.isfinite(cleaned.fhr).any():
+        assessment = figo_rules.assess(cleaned.fhr, _signal_arrays(input_data)[1])
+        return int(assessment.classification[0]), float(assessment.confidence[0]), figo_rules.RULES_VERSION
+    cls, conf, _ = figo_rules.classify_summary(
+        input_data.baseline_bpm,
+        input_data.stv_ms,
+        input_data.ltv_pct,
+        input_data.decelerations_light,
+        input_data.decelerations_severe,
+    )
+    return cls, conf, figo_rules.RULES_VERSION
+
+def _cache_keys(features: list[Optional[list[float]]]) -> list[Optional[str]]:
+    """Clé de cache par ligne (None : pas de features_21, cache désactivé ou modèle pas encore chargé)."""
+    fingerprint = ml_ctg.model_fingerprint()
+    if _result_cache is None or fingerprint is None:
+        return [None] * len(features)
+    _result_cache.bind(fingerprint)
+    if _narrative_cache is not None:
+        _narrative_cache.bind(fingerprint)
+    return [_result_cache.key(f) if f is not None else None for f in features]
+
+def _cached_predict(input_data: CTGInput) -> tuple[int, float, str, Optional[str], bool]:
+    """_ml_predict derrière le cache, règles FIGO sinon : (classe, confiance, version, clé, hit)."""
+    features_21 = input_data.features_21
+    key = _cache_keys([features_21])[0]
+    if key is not None:
+        hit = _result_cache.get(key)
+        if hit is not None:
+            return (*hit, key, True)
+    pred = _ml_predict(features_21)
+    if pred is None:
+        return (*_rules_predict(input_data), None, False)
+    if key is None and features_21 is not None:
+        key = _cache_keys([features_21])[0]  # premier appel : le modèle vient d'être chargé
+    if key is not None:
+        _result_cache.put(key, pred)
+    return (*pred, key, False)
+
+def _cached_predict_batch(items: list[CTGInput]) -> list[tuple[int, float, str, Optional[str], bool]]:
+    """Lignes en cache servies directement ; un seul forward pour les autres, règles FIGO sinon."""
+    features = [item.features_21 for item in items]
+    keys = _cache_keys(features)
+    results: list = [None] * len(features)
+    misses: list[int] = []
+    for i, key in enumerate(keys):
+        hit = _result_cache.get(key) if key is not None else None
+        if hit is not None:
+            results[i] = (*hit, key, True)
+        else:
+            misses.append(i)
+    preds = _ml_predict_batch([features[i] for i in misses])
+    if any(keys[i] is None and features[i] is not None for i in misses):
+        keys = _cache_keys(features)  # premier appel : le modèle vient d'être chargé
+    for i, pred in zip(misses, preds):
+        if pred is None:
+            results[i] = (*_rules_predict(items[i]), None, False)
+            continue
+        if keys[i] is not None:
+            _result_cache.put(keys[i], pred)
+        results[i] = (*pred, keys[i], False)
+    return results
+
+def _narrative_key(input_data: CTGInput, key: Optional[str]) -> tuple[Optional[str], Optional[str]]:
+    """
+    (clé du cache narratif, narratif en cache) ; même vecteur + baseline/STV tant que l'entrée est valide.
+    La version du prompt system fait partie de la clé : un rechargement du JSON invalide les narratifs.
+    """
+    if _narrative_cache is None or key is None:
+        return None, None
+    nkey = _narrative_cache.key([input_data.baseline_bpm, input_data.stv_ms], key, config_version())
+    return nkey, _narrative_cache.get(nkey)
+
+def _remember_narrative(nkey: Optional[str], text: str) -> None:
+    if nkey is not None and _LLM_FALLBACK_MARKER not in text:
+        _narrative_cache.put(nkey, text)
+
+def _narrative(input_data: CTGInput, ml_class: int, confidence: float, key: Optional[str]) -> tuple[str, bool]:
+    """Narratif LLM (client synchrone : jobs de fond), servi depuis le cache quand possible."""
+    nkey, cached = _narrative_key(input_data, key)
+    if cached is not None:
+        return cached, True
+    text = _llm_analyze(input_data.baseline_bpm, input_data.stv_ms, ml_class, confidence)
+    _remember_narrative(nkey, text)
+    return text, False
+
+async def _narrative_async(
+    input_data: CTGInput, ml_class: int, confidence: float, key: Optional[str]
+) -> tuple[str, bool]:
+    """_narrative sur le client async : l'attente LLM ne bloque aucun thread du pool."""
+    nkey, cached = _narrative_key(input_data, key)
+    if cached is not None:
+        return cached, True
+    text = await _llm_analyze_async(input_data.baseline_bpm, input_data.stv_ms, ml_class, confidence)
+    _remember_narrative(nkey, text)
+    return text, False
+
+def _window_summaries(fhr: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """(B, T) FHR brut -> baseline (médiane, bpm) et STV Dawes (ms) par ligne, NaN si aucun signal."""
+    fhr = np.asarray(fhr, dtype=np.float64)
+    valid = np.isfinite(fhr) & (fhr > 0)
+    masked = np.where(valid, fhr, np.nan)
+    # STV (Dawes) : intervalle RR moyen par époque de 1/16 min (15 échantillons à 4 Hz), écarts successifs
+    epoch = 15
+    n = fhr.shape[1] // epoch * epoch
+    rr = (60000.0 / masked[:, :n]).reshape(fhr.shape[0], -1, epoch)
+    with np.errstate(invalid="ignore"), warnings.catch_warnings():
+        warnings.simplefilter("ignore", RuntimeWarning)
+        baseline = np.nanmedian(masked, axis=1)
+        epoch_rr = np.nanmean(rr, axis=2)
+        diffs = np.abs(np.diff(epoch_rr, axis=1))
+        stv = np.nanmean(diffs, axis=1) if diffs.shape[1] else np.zeros(fhr.shape[0])
+    return np.round(baseline, 1), np.round(np.nan_to_num(stv), 2)
+
+def _classify_windows(windows: np.ndarray, quality: np.ndarray) -> list[dict]:
+    """
+    Balayage : (B, 2, T) FHR/UC + (B, T) qualité -> un message par lit. Résumés et 21 features en un
+    appel vectorisé, un seul forward pour tous les lits classables ; les lits sans prédiction ML et
+    les baselines hors 110-160 (brady/tachycardie) passent par les règles FIGO, en un appel.
+    Le FHR est d'abord réparé (lacunes, demi/double fréquence) ; les fenêtres sous
+    CTG_MIN_SIGNAL_QUALITY n'atteignent ni l'inférence ni l'escalade. Narratif déterministe, audité.
+    """
+    from shared.ctg_model.features import extract_features
+
+    start = time.perf_counter()
+    cleaned = signal_quality.clean_fhr(windows[:, 0])
+    quality_ratio = (quality.astype(np.float64) * cleaned.quality).mean(axis=1)
+    messages: list[Optional[dict]] = [None] * len(windows)
+    kept: list[int] = []
+    for i, q in enumerate(quality_ratio):
+        if q < _MIN_SIGNAL_QUALITY:
+            messages[i] = {
+                "type": "error",
+                "detail": f"signal loss / artefacts: quality {q:.2f} < {_MIN_SIGNAL_QUALITY}",
+                "signal_quality": round(float(q), 3),
+            }
+        else:
+            kept.append(i)
+    if not kept:
+        return messages
+    fhr, uc = cleaned.fhr[kept], windows[kept, 1]
+    baselines, stvs = _window_summaries(fhr)
+    features = extract_features(fhr, uc)
+    feats = [
+        [float(v) for v in row] if 110 <= baseline <= 160 and np.isfinite(row).all() else None
+        for row, baseline in zip(features, baselines)
+    ]
+    preds = _ml_predict_batch(feats)
+    rule_rows = [j for j, pred in enumerate(preds) if pred is None]
+    if rule_rows:
+        figo = figo_rules.assess(fhr[rule_rows], uc[rule_rows])
+        for k, j in enumerate(rule_rows):
+            preds[j] = (int(figo.classification[k]), float(figo.confidence[k]), figo_rules.RULES_VERSION)
+    latency_ms = int((time.perf_counter() - start) * 1000)
+    for j, i in enumerate(kept):
+        ml_class, confidence, model_ver = preds[j]
+        baseline, stv = float(baselines[j]), float(stvs[j])
+        input_data = CTGInput(baseline_bpm=baseline, stv_ms=stv, features_21=feats[j])
+        narrative = _template_narrative(baseline, stv, ml_class)
+        q = round(float(quality_ratio[i]), 3)
+        out = _build_output(input_data, ml_class, confidence, model_ver, narrative, latency_ms, {"source": "stream"}, q)
+        messages[i] = {
+            "type": "classification",
+            "ml_class": ml_class,
+            "model_version": model_ver,
+            "baseline_bpm": baseline,
+            "stv_ms": stv,
+            **out.model_dump(),
+        }
+    return messages
+
+def _template_narrative(baseline_bpm: float, stv_ms: float, ml_class: int) -> str:
+    return f"Analyse FIGO: baseline {baseline_bpm} bpm, variabilité STV {stv_ms} ms. Classification {CLASSES[ml_class]}. Validation clinique recommandée."
 
-    model_id = router_llm.route(task=TaskType.FAST_ANALYSIS, urgency="critical")
-    api_model = router_llm.get_api_model_id(model_id)
-    system = build_llm_system_prompt("CTGAnalysisPrompt")
+def _llm_request(baseline_bpm: float, stv_ms: float, ml_class: int, confidence: float) -> tuple[str, dict]:
+    """(model_id, kwargs de messages.create) du narratif CTG."""
+    from shared.prompt_system import budget_from_env, build_llm_system_prompt
+
+    model_id = router_llm.route(
+        task=TaskType.FAST_ANALYSIS, urgency="critical", deadline_ms=_LLM_DEADLINE_MS, eligible=_is_claude
+    )
     user_msg = f"""Données CTG : baseline FHR={baseline_bpm} bpm, STV={stv_ms} ms.
 Classification ML : {CLASSES[ml_class]} (confiance {confidence:.2f}).
 Produis un résumé narratif ~150 mots conforme à ton rôle (FIGO 2015, NICE NG229), avec recommandations et niveau de confiance. Pas de diagnostic final."""
+    return model_id, {
+        "model": router_llm.get_api_model_id(model_id),
+        "max_tokens": 512,
+        "system": cached_system(
+            build_llm_system_prompt("CTGAnalysisPrompt", max_tokens=budget_from_env("CTG_PROMPT_MAX_TOKENS"))
+        ),
+        "messages": [{"role": "user", "content": user_msg}],
+    }
+
+def _is_claude(model_id: str) -> bool:
+    """Seuls les modèles Anthropic sont appelés ici ; les autres donneraient le narratif template."""
+    return "claude" in model_id.lower()
+
+def _llm_fallback(baseline_bpm: float, stv_ms: float, ml_class: int) -> str:
+    return f"Analyse automatique: {CLASSES[ml_class]}. Justification: baseline {baseline_bpm} bpm, STV {stv_ms} ms. {_LLM_FALLBACK_MARKER}. Validation humaine requise si Suspect/Pathologique."
+
+def _llm_analyze(baseline_bpm: float, stv_ms: float, ml_class: int, confidence: float) -> str:
+    model_id, request = _llm_request(baseline_bpm, stv_ms, ml_class, confidence)
+    start = time.perf_counter()
     try:
-        if "claude" in model_id.lower():
-            import anthropic
-            c = anthropic.Anthropic(api_key=os.getenv("ANTHROPIC_API_KEY", ""))
-            r = c.messages.create(
-                model=api_model,
-                max_tokens=512,
-                system=system,
-                messages=[{"role": "user", "content": user_msg}],
-            )
+        if _is_claude(model_id):
+            r = get_client("anthropic").messages.create(**request)
+            record_usage("CTGMonitorAgent", r)
             text = r.content[0].text if r.content else ""
+            router_llm.record_success(model_id, (time.perf_counter() - start) * 1000)
         else:
-            text = f"Analyse FIGO: baseline {baseline_bpm} bpm, variabilité STV {stv_ms} ms. Classification {CLASSES[ml_class]}. Validation clinique recommandée."
-        router_llm.record_success(model_id)
+            # Aucun appel fournisseur : rien à enregistrer dans les statistiques du routeur
+            text = _template_narrative(baseline_bpm, stv_ms, ml_class)
         return text
-    except Exception as e:
-        router_llm.record_failure(model_id)
-        return f"Analyse automatique: {CLASSES[ml_class]}. Justification: baseline {baseline_bpm} bpm, STV {stv_ms} ms. [Erreur LLM: fallback conservateur]. Validation humaine requise si Suspect/Pathologique."
+    except Exception:
+        router_llm.record_failure(model_id, (time.perf_counter() - start) * 1000)
+        return _llm_fallback(baseline_bpm, stv_ms, ml_class)
 
-@app.post("/api/ctg-monitor", response_model=CTGOutput)
-def ctg_monitor(input_data: CTGInput) -> CTGOutput:
-    start = time.perf_counter()
-    _validate_signal(input_data.baseline_bpm)
-    if input_data.features_21 is not None and len(input_data.features_21) != 21:
-        raise HTTPException(status_code=400, detail="features_21 doit contenir exactement 21 valeurs (ordre fetal_health.csv)")
-    ml_class, confidence, model_ver = _ml_predict(input_data.features_21)
+async def _llm_analyze_async(baseline_bpm: float, stv_ms: float, ml_class: int, confidence: float) -> str:
+    """Narratif critique : requête couverte (hedge) sur le modèle suivant si le primaire dépasse son p90."""
+    model_id, request = _llm_request(baseline_bpm, stv_ms, ml_class, confidence)
+    if not _is_claude(model_id):
+        return _template_narrative(baseline_bpm, stv_ms, ml_class)
+
+    async def call(m: str) -> str:
+        r = await get_async_client("anthropic").messages.create(**{**request, "model": router_llm.get_api_model_id(m)})
+        record_usage("CTGMonitorAgent", r)
+        return r.content[0].text if r.content else ""
+
+    try:
+        _, text = await hedged_call(
+            router_llm,
+            model_id,
+            call,
+            agent_id="CTGMonitorAgent",
+            urgency="critical",
+            eligible=_is_claude,
+            accept=lambda t: bool(t.strip()),
+        )
+        return text
+    except Exception:
+        return _llm_fallback(baseline_bpm, stv_ms, ml_class)
+
+def _build_output(
+    input_data: CTGInput,
+    ml_class: int,
+    confidence: float,
+    model_ver: str,
+    narrative: str,
+    latency_ms: int,
+    audit_extra: Optional[dict] = None,
+    quality_ratio: Optional[float] = None,
+    narrative_job: Optional[narrative_jobs.NarrativeJob] = None,
+) -> CTGOutput:
+    """
+    Règles HITL, entrée d'audit et Observation FHIR pour une classification. Avec ``narrative_job``,
+    l'entrée porte l'id du job et son hash devient le parent de l'entrée du narratif.
+    """
     classification = CLASSES[ml_class]
     hitl_required = classification == "Pathologique" or (classification == "Suspect" and confidence < 0.95)
     escalation_level = 2 if classification == "Pathologique" else (1 if classification == "Suspect" else None)
-    narrative = _llm_analyze(input_data.baseline_bpm, input_data.stv_ms, ml_class, confidence)
-    latency_ms = int((time.perf_counter() - start) * 1000)
     input_hash = hashlib.sha256(str(input_data.model_dump()).encode()).hexdigest()
     output_hash = hashlib.sha256(f"{classification}{narrative}".encode()).hexdigest()
-    audit.log_event(
+    extra = dict(audit_extra or {})
+    if quality_ratio is not None:
+        extra["signal_quality"] = quality_ratio
+    if narrative_job is not None:
+        extra.update(narrative_job_id=narrative_job.id, narrative="pending")
+    prompt_version = config_version()
+    entry = audit.log_event(
         agent_id="CTGMonitorAgent",
         action="analyze",
         input_hash=input_hash,
         output_hash=output_hash,
-        model_version=model_ver,
+        model_version=f"{model_ver};prompt={prompt_version}",
         confidence=confidence,
         human_decision="required" if hitl_required else None,
         latency_ms=latency_ms,
+        extra=extra or None,
     )
+    if narrative_job is not None:
+        narrative_job.parent_hash = (entry or {}).get("hash")
     fhir = {
         "resourceType": "Observation",
         "status": "final",
@@ -145,10 +606,248 @@ def ctg_monitor(input_data: CTGInput) -> CTGOutput:
         narrative=narrative,
         hitl_required=hitl_required,
         escalation_level=escalation_level,
+        signal_quality=quality_ratio,
+        narrative_job_id=narrative_job.id if narrative_job is not None else None,
+        prompt_version=prompt_version,
         fhir_observation=fhir,
     )
 
+def _start_narrative_job(
+    job: narrative_jobs.NarrativeJob, input_data: CTGInput, ml_class: int, confidence: float, key: Optional[str]
+) -> None:
+    """Narratif LLM en tâche de fond ; entrée d'audit « narrative » chaînée à la classification (parent_hash)."""
+    input_hash = hashlib.sha256(str(input_data.model_dump()).encode()).hexdigest()
+
+    def on_done(done: narrative_jobs.NarrativeJob) -> None:
+        entry = audit.log_event(
+            agent_id="CTGMonitorAgent",
+            action="narrative",
+            input_hash=input_hash,
+            output_hash=hashlib.sha256((done.narrative or done.error or "").encode()).hexdigest(),
+            confidence=confidence,
+            latency_ms=int(((done.completed_at or done.created_at) - done.created_at) * 1000),
+            model_version=f"prompt={config_version()}",
+            extra={"parent_hash": done.parent_hash, "narrative_job_id": done.id, "status": done.status},
+        )
+        done.audit_hash = (entry or {}).get("hash")
+
+    _narrative_jobs.start(job, lambda: _narrative(input_data, ml_class, confidence, key)[0], on_done)
+
+def _classify_one(input_data: CTGInput) -> tuple[Optional[float], tuple[int, float, str, Optional[str], bool]]:
+    """Partie CPU d'une requête : décodage, qualité du signal, forward (micro-batch) ou règles FIGO."""
+    _validate_input(input_data)
+    return _gate_signal(input_data), _cached_predict(input_data)
+
+@app.post("/api/ctg-monitor", response_model=CTGOutput)
+async def ctg_monitor(
+    input_data: CTGInput,
+    narrative: Literal["sync", "async"] = Query(
+        default=_NARRATIVE_MODE, description="async : réponse immédiate, narratif LLM via narrative_job_id."
+    ),
+) -> CTGOutput:
+    # CPU et audit (fichier) dans le pool de threads ; l'appel LLM est attendu sur la boucle sans y tenir de thread
+    start = time.perf_counter()
+    quality_ratio, (ml_class, confidence, model_ver, key, hit) = await run_in_threadpool(_classify_one, input_data)
+    job = _narrative_jobs.create() if narrative == "async" else None
+    if job is None:
+        text, narrative_hit = await _narrative_async(input_data, ml_class, confidence, key)
+    else:
+        text, narrative_hit = _template_narrative(input_data.baseline_bpm, input_data.stv_ms, ml_class), False
+    latency_ms = int((time.perf_counter() - start) * 1000)
+    extra = {"cache": "hit", "narrative_cache": "hit" if narrative_hit else "miss"} if hit else None
+    try:
+        out = await run_in_threadpool(
+            _build_output, input_data, ml_class, confidence, model_ver, text, latency_ms, extra, quality_ratio, job
+        )
+    except BaseException:
+        # Audit ou réponse en échec : le job ne démarrera jamais, on libère sa place
+        if job is not None:
+            _narrative_jobs.discard(job)
+        raise
+    if job is not None:
+        _start_narrative_job(job, input_data, ml_class, confidence, key)
+    return out
+
+@app.get("/api/ctg-monitor/narrative/{job_id}")
+def ctg_narrative(job_id: str) -> dict:
+    """État du narratif : pending | running | done | failed, avec hashes d'audit parent/narratif."""
+    job = _narrative_jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="unknown or expired narrative job")
+    return job.to_dict()
+
+@app.get("/api/ctg-monitor/narrative/{job_id}/events")
+async def ctg_narrative_events(job_id: str) -> StreamingResponse:
+    """SSE : un événement ``narrative`` à la fin du job (``timeout`` après CTG_NARRATIVE_SSE_TIMEOUT_S)."""
+    job = _narrative_jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="unknown or expired narrative job")
+
+    async def events():
+        deadline = time.monotonic() + _SSE_TIMEOUT_S
+        last_ping = time.monotonic()
+        while not job.done.is_set():
+            if time.monotonic() >= deadline:
+                yield f"event: timeout\ndata: {json.dumps(job.to_dict())}\n\n"
+                return
+            if time.monotonic() - last_ping >= 15:
+                last_ping = time.monotonic()
+                yield ": keep-alive\n\n"
+            await asyncio.sleep(0.05)
+        yield f"event: narrative\ndata: {json.dumps(job.to_dict())}\n\n"
+
+    return StreamingResponse(events(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
+
+def _classify_batch(
+    items: list[CTGInput],
+) -> tuple[list[Optional[float]], list[tuple[int, float, str, Optional[str], bool]]]:
+    ratios: list[Optional[float]] = []
+    for i, item in enumerate(items):
+        try:
+            _validate_input(item)
+            ratios.append(_gate_signal(item))
+        except HTTPException as e:
+            raise HTTPException(status_code=e.status_code, detail=f"items[{i}]: {e.detail}") from e
+    return ratios, _cached_predict_batch(items)
+
+def _build_outputs(
+    items: list[CTGInput],
+    preds: list[tuple[int, float, str, Optional[str], bool]],
+    narratives: list[tuple[str, bool]],
+    ratios: list[Optional[float]],
+    latency_ms: int,
+) -> list[CTGOutput]:
+    return [
+        _build_output(
+            item,
+            cls,
+            conf,
+            model_ver,
+            narrative,
+            latency_ms,
+            {"cache": "hit", "narrative_cache": "hit" if narrative_hit else "miss"} if hit else None,
+            ratio,
+        )
+        for item, (cls, conf, model_ver, _, hit), (narrative, narrative_hit), ratio in zip(
+            items, preds, narratives, ratios
+        )
+    ]
+
+@app.post("/api/ctg-monitor/batch", response_model=CTGBatchOutput)
+async def ctg_monitor_batch(batch: CTGBatchInput) -> CTGBatchOutput:
+    """Surveillance centrale : N patientes, un seul forward, narratifs LLM concurrents, ordre d'entrée conservé."""
+    start = time.perf_counter()
+    ratios, preds = await run_in_threadpool(_classify_batch, batch.items)
+    if batch.include_narrative:
+        # Au plus CTG_BATCH_LLM_CONCURRENCY appels LLM simultanés par lot (quota fournisseur, pool de connexions)
+        limit = asyncio.Semaphore(_BATCH_LLM_CONCURRENCY)
+
+        async def bounded(item: CTGInput, cls: int, conf: float, key: Optional[str]) -> tuple[str, bool]:
+            async with limit:
+                return await _narrative_async(item, cls, conf, key)
+
+        narratives = list(
+            await asyncio.gather(
+                *(bounded(item, cls, conf, key) for item, (cls, conf, _, key, _) in zip(batch.items, preds))
+            )
+        )
+    else:
+        narratives = [
+            (_template_narrative(item.baseline_bpm, item.stv_ms, cls), False) for item, (cls, *_) in zip(batch.items, preds)
+        ]
+    latency_ms = int((time.perf_counter() - start) * 1000)
+    results = await run_in_threadpool(_build_outputs, batch.items, preds, narratives, ratios, latency_ms)
+    return CTGBatchOutput(results=results, latency_ms=latency_ms)
+
+async def _sweep_loop() -> None:
+    while True:
+        await asyncio.sleep(_SWEEP_INTERVAL_S)
+        if not len(_sessions):
+            continue
+        try:
+            results = await run_in_threadpool(_sessions.sweep, _classify_windows)
+        except Exception as e:
+            results = [(p, {"type": "error", "detail": f"sweep failed: {e!s}"}) for p in list(_subscribers)]
+        for patient_id, msg in results:
+            queue = _subscribers.get(patient_id)
+            if queue is not None:
+                queue.put_nowait({"patient_id": patient_id, **msg})
+
+def _ensure_sweeper() -> None:
+    """Une tâche de balayage par boucle d'événements (démarrée au lifespan ou à la 1re connexion)."""
+    loop = asyncio.get_running_loop()
+    task = _sweeper["task"]
+    if task is None or task.done() or _sweeper["loop"] is not loop:
+        _sweeper.update(loop=loop, task=loop.create_task(_sweep_loop()))
+
+async def _send_results(ws: WebSocket, queue: asyncio.Queue) -> None:
+    while True:
+        await ws.send_json(await queue.get())
+
+@app.websocket("/api/ctg-monitor/stream")
+async def ctg_monitor_stream(ws: WebSocket) -> None:
+    """
+    Flux continu multi-lits sur une connexion : {"patient_id", "fhr": [...], "uc": [...]} à 4 Hz.
+    Fenêtre CTG_STREAM_WINDOW_S ; pas ``hop_s`` (query param, défaut CTG_STREAM_HOP_S) fixé à
+    l'ouverture du lit. Les classifications du balayage sont renvoyées sur la socket du lit.
+    Un lit appartient à la connexion qui l'a ouvert : une autre connexion sur le même patient_id
+    reçoit une trame d'erreur, et seule la connexion propriétaire ferme ses lits.
+    """
+    await ws.accept()
+    _ensure_sweeper()
+    try:
+        hop_s = float(ws.query_params.get("hop_s", _STREAM_HOP_S))
+    except ValueError:
+        hop_s = _STREAM_HOP_S
+    hop_s = min(max(hop_s, 1.0), _STREAM_WINDOW_S)
+    queue: asyncio.Queue = asyncio.Queue()
+    sender = asyncio.create_task(_send_results(ws, queue))
+    owned: set[str] = set()
+    try:
+        while True:
+            try:
+                chunk = CTGStreamChunk.model_validate(await ws.receive_json())
+                for name in ("uc", "quality"):
+                    values = getattr(chunk, name)
+                    if values is not None and len(values) != len(chunk.fhr):
+                        raise ValueError(f"{name} must have the same length as fhr")
+            except (ValidationError, ValueError) as e:
+                queue.put_nowait({"type": "error", "detail": str(e)})
+                continue
+            try:
+                _sessions.open(chunk.patient_id, hop_s, owner=queue)
+            except (sessions.SessionLimitError, sessions.SessionOwnedError) as e:
+                queue.put_nowait({"type": "error", "patient_id": chunk.patient_id, "detail": str(e)})
+                continue
+            owned.add(chunk.patient_id)
+            _subscribers[chunk.patient_id] = queue
+            _sessions.push(chunk.patient_id, np.asarray(chunk.fhr), chunk.uc, chunk.quality)
+            if chunk.close:
+                _sessions.close(chunk.patient_id, owner=queue)
+                _subscribers.pop(chunk.patient_id, None)
+                owned.discard(chunk.patient_id)
+    except WebSocketDisconnect:
+        pass
+    finally:
+        sender.cancel()
+        for patient_id in owned:
+            _sessions.close(patient_id, owner=queue)
+            if _subscribers.get(patient_id) is queue:
+                _subscribers.pop(patient_id, None)
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def metrics() -> str:
+    """Prometheus scrape endpoint (batch size, queue wait, forward time, cache hits/misses)."""
+    return REGISTRY.render()
+
 @app.get("/api/ctg-monitor/health")
 @app.get("/health")
-def health() -> dict:
+async def health() -> dict:
+    # Sur la boucle : la liveness ne fait pas la queue derrière le pool de threads
     return {"status": "ok", "agent": "ctg-monitor"}
+
+@app.get("/api/ctg-monitor/ready")
+@app.get("/ready")
+async def ready() -> JSONResponse:
+    body = {"status": "ready" if _readiness["ready"] else "not-ready", "agent": "ctg-monitor", **_readiness}
+    return JSONResponse(body, status_code=200 if _readiness["ready"] else 503)
@@ -1,75 +1,245 @@
-"""Load tabular CTG classifier (fetal_health.csv features) for inference."""
+"""Load tabular CTG classifier (fetal_health.csv features) for inference.
+
+Backends (CTG_INFERENCE_BACKEND):
+- ``torch`` (default): eager PyTorch on ``ctg_classifier.pt``.
+- ``onnx``: ONNX Runtime on ``ctg_classifier.onnx`` (ml/export_ctg_onnx.py); torch is never imported.
+
+Precision (CTG_MODEL_PRECISION, torch backend only):
+- ``fp32`` (default): ``ctg_classifier.pt``.
+- ``int8``: dynamically quantized ``ctg_classifier_int8.pt`` (ml/quantize_ctg.py).
+
+The fp32 torch model goes through a load-time optimization pass (CTG_OPTIMIZE=1, default):
+BN folding + TorchScript freeze, parity-checked and cached under CTG_MODEL_CACHE_DIR
+(default ``model/.cache``) keyed by the weights hash. Any failure keeps the eager model.
+"""
 from __future__ import annotations
 
+import hashlib
 import json
+import os
+import threading
 from pathlib import Path
-from typing import Optional
+from typing import Any, Iterable, Optional
 
 import numpy as np
-import torch
 
-_MODEL: Optional[torch.nn.Module] = None
+BACKENDS = ("torch", "onnx")
+PRECISIONS = ("fp32", "int8")
+WEIGHT_FILES = {
+    ("torch", "fp32"): "ctg_classifier.pt",
+    ("torch", "int8"): "ctg_classifier_int8.pt",
+    ("onnx", "fp32"): "ctg_classifier.onnx",
+}
+MODEL_VERSION = "ctg-tabular-2.0"
+
+_MODEL: Optional[Any] = None
 _PREPROC: Optional[dict] = None
-_DEVICE = torch.device("cpu")
+_LOAD_INFO: dict[str, str] = {}
+_LOAD_LOCK = threading.Lock()
 
 
 def _model_dir() -> Path:
+    override = os.getenv("CTG_MODEL_DIR", "").strip()
+    if override:
+        return Path(override)
     return Path(__file__).resolve().parent.parent / "model"
 
 
-def _rows_to_sequences(X: np.ndarray, input_len: int) -> np.ndarray:
-    n, n_feat = X.shape
-    out = np.zeros((n, 1, input_len), dtype=np.float32)
-    for i in range(n):
-        row = X[i]
-        for t in range(input_len):
-            out[i, 0, t] = row[t % n_feat]
-    return out
+def backend() -> str:
+    name = os.getenv("CTG_INFERENCE_BACKEND", "torch").strip().lower()
+    if name not in BACKENDS:
+        raise ValueError(f"CTG_INFERENCE_BACKEND must be one of {BACKENDS}, got {name!r}")
+    return name
+
+
+def precision() -> str:
+    name = os.getenv("CTG_MODEL_PRECISION", "fp32").strip().lower()
+    if name not in PRECISIONS:
+        raise ValueError(f"CTG_MODEL_PRECISION must be one of {PRECISIONS}, got {name!r}")
+    return name
+
+
+def _weights_file() -> str:
+    key = (backend(), precision())
+    if key not in WEIGHT_FILES:
+        raise ValueError(f"Unsupported backend/precision combination: {key[0]}/{key[1]}")
+    return WEIGHT_FILES[key]
+
+
+def model_version() -> str:
+    """Audit model_version: base version, suffixed for a non-default backend/precision/input mode."""
+    mode = (_PREPROC or {}).get("input_mode", "tiled")
+    suffix = [s for s in (backend(), precision(), mode) if s not in ("torch", "fp32", "tiled")]
+    return "-".join([MODEL_VERSION, *suffix])
 
 
 def model_available() -> bool:
     d = _model_dir()
-    return (d / "ctg_classifier.pt").is_file() and (d / "preprocessor.json").is_file()
+    try:
+        weights = _weights_file()
+    except ValueError:
+        return False
+    return (d / weights).is_file() and (d / "preprocessor.json").is_file()
+
+
+class _TorchRunner:
+    """PyTorch module (eager, TorchScript-optimized or int8): float32 (B, 1, T) -> logits (B, C)."""
+
+    def __init__(self, w_path: Path, input_len: int, int8: bool = False):
+        import torch
+
+        from shared.ctg_model.classifier import build_ctg_classifier
+
+        self._torch = torch
+        device = torch.device("cpu")
+        m = build_ctg_classifier(input_len=input_len)
+        self.optimization = "int8-dynamic" if int8 else "eager"
+        if int8:
+            from shared.ctg_model.quantization import load_int8_state
+
+            # Packed int8 params are not plain tensors: weights_only loading cannot read them.
+            # The artifact is produced by ml/quantize_ctg.py and shipped inside the image.
+            state = torch.load(w_path, map_location=device, weights_only=False)
+            self.module = load_int8_state(m, state)
+            return
+        try:
+            state = torch.load(w_path, map_location=device, weights_only=True)
+        except TypeError:
+            state = torch.load(w_path, map_location=device)
+        m.load_state_dict(state)
+        m.eval()
+        self.module = m.to(device)
+        self.optimization = "eager"
+        if os.getenv("CTG_OPTIMIZE", "1") == "1":
+            self._optimize(w_path, input_len)
+
+    def _optimize(self, w_path: Path, input_len: int) -> None:
+        from shared.ctg_model.optimize import load_or_build_optimized
+
+        cache_dir = Path(os.getenv("CTG_MODEL_CACHE_DIR", "").strip() or w_path.parent / ".cache")
+        try:
+            self.module, status = load_or_build_optimized(
+                self.module,
+                w_path,
+                cache_dir,
+                input_len,
+                optimize=os.getenv("CTG_JIT_OPTIMIZE_FOR_INFERENCE", "1") == "1",
+            )
+            self.optimization = f"torchscript-frozen ({status})"
+        except Exception as e:
+            self.optimization = f"eager (optimization skipped: {e!s})"
+
+    def __call__(self, seq: np.ndarray) -> np.ndarray:
+        with self._torch.no_grad():
+            return self.module(self._torch.from_numpy(seq)).numpy()
+
+
+class _OnnxRunner:
+    """ONNX Runtime session with a dynamic batch axis (input ``sequence``, output ``logits``)."""
+
+    def __init__(self, onnx_path: Path):
+        import onnxruntime as ort
+
+        opts = ort.SessionOptions()
+        opts.intra_op_num_threads = int(os.getenv("CTG_ORT_INTRA_OP_THREADS", "0"))
+        opts.inter_op_num_threads = 1
+        opts.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        self.session = ort.InferenceSession(str(onnx_path), sess_options=opts, providers=["CPUExecutionProvider"])
+        self._input = self.session.get_inputs()[0].name
+
+    def __call__(self, seq: np.ndarray) -> np.ndarray:
+        return self.session.run(None, {self._input: seq})[0]
+
+
+def _softmax(logits: np.ndarray) -> np.ndarray:
+    z = logits - logits.max(axis=-1, keepdims=True)
+    e = np.exp(z)
+    return e / e.sum(axis=-1, keepdims=True)
+
+
+def load_info() -> dict[str, str]:
+    """Backend / precision / optimization actually in use (empty until loaded)."""
+    return dict(_LOAD_INFO)
+
+
+def model_fingerprint() -> Optional[str]:
+    """Digest of the loaded weights + preprocessor (None until loaded); changes with the artifact."""
+    return _LOAD_INFO.get("fingerprint")
+
+
+def is_loaded() -> bool:
+    return _MODEL is not None and _PREPROC is not None
 
 
 def _load() -> None:
+    """Load preprocessor + weights once; safe when several request threads race on a cold start."""
     global _MODEL, _PREPROC
-    if _MODEL is not None and _PREPROC is not None:
+    if is_loaded():
         return
-    d = _model_dir()
-    w_path = d / "ctg_classifier.pt"
-    p_path = d / "preprocessor.json"
-    if not w_path.is_file() or not p_path.is_file():
-        raise FileNotFoundError("CTG model weights or preprocessor missing under model/")
-    _PREPROC = json.loads(p_path.read_text(encoding="utf-8"))
-    from shared.ctg_model.classifier import build_ctg_classifier
-
-    ilen = int(_PREPROC["input_len"])
-    m = build_ctg_classifier(input_len=ilen)
-    try:
-        state = torch.load(w_path, map_location=_DEVICE, weights_only=True)
-    except TypeError:
-        state = torch.load(w_path, map_location=_DEVICE)
-    m.load_state_dict(state)
-    m.eval()
-    _MODEL = m.to(_DEVICE)
+    with _LOAD_LOCK:
+        if is_loaded():
+            return
+        d = _model_dir()
+        w_path = d / _weights_file()
+        p_path = d / "preprocessor.json"
+        if not w_path.is_file() or not p_path.is_file():
+            raise FileNotFoundError(f"CTG model {w_path.name} or preprocessor missing under {d}")
+        p_bytes = p_path.read_bytes()
+        preproc = json.loads(p_bytes.decode("utf-8"))
+        fingerprint = hashlib.sha256(w_path.read_bytes() + p_bytes).hexdigest()[:16]
+        if backend() == "onnx":
+            runner: Any = _OnnxRunner(w_path)
+            optimization = "onnxruntime"
+        else:
+            runner = _TorchRunner(w_path, int(preproc["input_len"]), int8=precision() == "int8")
+            optimization = runner.optimization
+        _LOAD_INFO.update(
+            backend=backend(),
+            precision=precision(),
+            optimization=optimization,
+            input_mode=str(preproc.get("input_mode", "tiled")),
+            fingerprint=fingerprint,
+        )
+        # Publish the model last: is_loaded() must never see a half-initialised pair
+        _PREPROC = preproc
+        _MODEL = runner
 
 
-def predict_from_features(values: list[float]) -> tuple[int, float]:
-    """Returns (class_index 0..2, confidence = max softmax)."""
+def warmup(batch_sizes: Iterable[int] = (1, 8, 32), rounds: int = 2) -> None:
+    """Load eagerly and run dummy forwards so the first real CTG does not pay allocator/first-run costs."""
+    _load()
+    assert _PREPROC is not None
+    n_feat = len(_PREPROC["feature_columns"])
+    mean = [float(v) for v in _PREPROC["scaler_mean"]]
+    for bs in batch_sizes:
+        rows = [mean] * bs if len(mean) == n_feat else [[0.0] * n_feat] * bs
+        for _ in range(rounds):
+            predict_batch(rows)
+
+
+def predict_proba_batch(rows: list[list[float]]) -> np.ndarray:
+    """Class probabilities (N, 3) for N raw feature rows, one forward pass."""
     _load()
     assert _PREPROC is not None and _MODEL is not None
     cols = _PREPROC["feature_columns"]
-    if len(values) != len(cols):
-        raise ValueError(f"Expected {len(cols)} features, got {len(values)}")
-    mean = np.array(_PREPROC["scaler_mean"], dtype=np.float32)
-    scale = np.array(_PREPROC["scaler_scale"], dtype=np.float32)
-    x = np.asarray(values, dtype=np.float32).reshape(1, -1)
-    x = (x - mean) / np.maximum(scale, 1e-8)
-    seq = _rows_to_sequences(x, int(_PREPROC["input_len"]))
-    with torch.no_grad():
-        logits = _MODEL(torch.from_numpy(seq).to(_DEVICE))
-        proba = torch.softmax(logits, dim=-1)[0]
-    conf = float(proba.max().item())
-    cls = int(proba.argmax().item())
-    return cls, conf
+    for values in rows:
+        if len(values) != len(cols):
+            raise ValueError(f"Expected {len(cols)} features, got {len(values)}")
+    if not rows:
+        return np.zeros((0, int(_PREPROC.get("num_classes", 3))), dtype=np.float32)
+    from shared.ctg_model.preprocessing import features_to_sequences
+
+    x = np.asarray(rows, dtype=np.float32).reshape(len(rows), len(cols))
+    seq = features_to_sequences(x, _PREPROC)
+    return _softmax(np.asarray(_MODEL(seq), dtype=np.float32))
+
+
+def predict_batch(rows: list[list[float]]) -> list[tuple[int, float]]:
+    """Classify N feature rows with a single forward pass; results follow input order."""
+    proba = predict_proba_batch(rows)
+    return [(int(c), float(p)) for c, p in zip(proba.argmax(axis=-1), proba.max(axis=-1))]
+
+
+def predict_from_features(values: list[float]) -> tuple[int, float]:
+    """Returns (class_index 0..2, confidence = max softmax)."""
+    return predict_batch([values])[0]
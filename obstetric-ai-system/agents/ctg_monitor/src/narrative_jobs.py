@@ -0,0 +1,117 @@
+"""
+Background narrative jobs: the classification is returned at once and the LLM narrative follows.
+
+A job is created (pending) before the classification is audited, linked to that audit entry's hash,
+then started on a small thread pool. Its result is fetched by id (GET) or pushed over SSE. Finished
+jobs are kept for ``ttl_s``, and the store is bounded by ``max_jobs`` (oldest finished first).
+"""
+from __future__ import annotations
+
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Callable, Optional
+
+from shared.metrics import REGISTRY
+
+_jobs_total = REGISTRY.counter("obstetric_ctg_narrative_jobs_total", "Background CTG narrative jobs by final status")
+_pending = REGISTRY.gauge("obstetric_ctg_narrative_jobs_pending", "CTG narrative jobs not finished yet")
+_duration = REGISTRY.histogram(
+    "obstetric_ctg_narrative_job_seconds", "Time from narrative job start to result", buckets=(0.1, 0.25, 0.5, 1, 2, 4, 8, 16, 32)
+)
+
+
+@dataclass
+class NarrativeJob:
+    id: str
+    status: str = "pending"  # pending | running | done | failed
+    narrative: Optional[str] = None
+    error: Optional[str] = None
+    parent_hash: Optional[str] = None  # audit entry of the classification
+    audit_hash: Optional[str] = None  # audit entry of the narrative
+    created_at: float = field(default_factory=time.time)
+    completed_at: Optional[float] = None
+    done: threading.Event = field(default_factory=threading.Event, repr=False)
+
+    @property
+    def finished(self) -> bool:
+        return self.status in ("done", "failed")
+
+    def to_dict(self) -> dict:
+        return {
+            "job_id": self.id,
+            "status": self.status,
+            "narrative": self.narrative,
+            "error": self.error,
+            "parent_hash": self.parent_hash,
+            "audit_hash": self.audit_hash,
+            "latency_ms": int((self.completed_at - self.created_at) * 1000) if self.completed_at else None,
+        }
+
+
+class NarrativeJobStore:
+    def __init__(self, max_workers: int = 4, max_jobs: int = 2048, ttl_s: float = 900.0):
+        self.max_jobs = max(1, max_jobs)
+        self.ttl_s = ttl_s
+        self._jobs: OrderedDict[str, NarrativeJob] = OrderedDict()
+        self._lock = threading.Lock()
+        self._pool = ThreadPoolExecutor(max_workers=max(1, max_workers), thread_name_prefix="ctg-narrative")
+
+    def __len__(self) -> int:
+        return len(self._jobs)
+
+    def create(self) -> NarrativeJob:
+        job = NarrativeJob(id=uuid.uuid4().hex)
+        with self._lock:
+            self._evict(time.time())
+            self._jobs[job.id] = job
+            _pending.set(sum(not j.finished for j in self._jobs.values()))
+        return job
+
+    def discard(self, job: NarrativeJob) -> None:
+        """Retire un job jamais démarré (classification non auditée) : il ne doit pas occuper max_jobs."""
+        with self._lock:
+            self._jobs.pop(job.id, None)
+            _pending.set(sum(not j.finished for j in self._jobs.values()))
+
+    def get(self, job_id: str) -> Optional[NarrativeJob]:
+        with self._lock:
+            job = self._jobs.get(job_id)
+        if job is not None and job.finished and time.time() - (job.completed_at or 0) > self.ttl_s:
+            return None
+        return job
+
+    def start(self, job: NarrativeJob, generate: Callable[[], str], on_done: Callable[[NarrativeJob], None]) -> None:
+        """Run ``generate`` in the pool; ``on_done`` (audit) runs in the worker before waiters are released."""
+
+        def run() -> None:
+            job.status = "running"
+            t0 = time.perf_counter()
+            try:
+                job.narrative = generate()
+                job.status = "done"
+            except Exception as e:
+                job.error, job.status = str(e), "failed"
+            job.completed_at = time.time()
+            _duration.observe(time.perf_counter() - t0)
+            try:
+                on_done(job)
+            finally:
+                _jobs_total.inc(labels={"status": job.status})
+                job.done.set()
+                with self._lock:
+                    _pending.set(sum(not j.finished for j in self._jobs.values()))
+
+        self._pool.submit(run)
+
+    def _evict(self, now: float) -> None:
+        for job_id in [k for k, j in self._jobs.items() if j.finished and now - (j.completed_at or 0) > self.ttl_s]:
+            del self._jobs[job_id]
+        while len(self._jobs) >= self.max_jobs:
+            victim = next((k for k, j in self._jobs.items() if j.finished), None)
+            if victim is None:
+                victim = next(iter(self._jobs))
+            del self._jobs[victim]
@@ -0,0 +1,88 @@
+"""Bounded LRU + TTL cache for CTG results: identical features_21 re-posted by central monitors skip inference."""
+from __future__ import annotations
+
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Iterable, Optional
+
+import numpy as np
+
+from shared.metrics import REGISTRY
+
+_requests = REGISTRY.counter("obstetric_ctg_cache_requests_total", "CTG result cache lookups by cache and result")
+_evictions = REGISTRY.counter("obstetric_ctg_cache_evictions_total", "CTG result cache entries dropped (LRU, TTL, model change)")
+_size = REGISTRY.gauge("obstetric_ctg_cache_entries", "Entries currently held in the CTG result cache")
+
+
+def canonical_key(values: Iterable[float], fingerprint: str, decimals: int = 4, *extra: str) -> str:
+    """
+    sha256 of the rounded vector + model fingerprint (+ extra parts). Rounding absorbs float noise from
+    JSON round-trips; ``+ 0.0`` maps -0.0 to 0.0 so both hash alike.
+    """
+    arr = np.round(np.asarray(list(values), dtype=np.float64), decimals) + 0.0
+    h = hashlib.sha256(arr.tobytes())
+    for part in (fingerprint, *extra):
+        h.update(b"|" + part.encode())
+    return h.hexdigest()
+
+
+class ResultCache:
+    """
+    Thread-safe LRU with per-entry TTL. ``bind(fingerprint)`` drops every entry when the served model
+    artifact changes, so a reload never returns results computed by the previous weights.
+    """
+
+    def __init__(self, name: str, max_entries: int = 4096, ttl_s: float = 30.0, decimals: int = 4):
+        self.name = name
+        self.max_entries = max(1, max_entries)
+        self.ttl_s = ttl_s
+        self.decimals = decimals
+        self._entries: OrderedDict[str, tuple[float, Any]] = OrderedDict()
+        self._fingerprint: Optional[str] = None
+        self._lock = threading.Lock()
+
+    def key(self, values: Iterable[float], *extra: str) -> str:
+        return canonical_key(values, self._fingerprint or "", self.decimals, *extra)
+
+    def bind(self, fingerprint: str) -> None:
+        if fingerprint == self._fingerprint:
+            return
+        with self._lock:
+            if fingerprint != self._fingerprint:
+                _evictions.inc(len(self._entries), labels={"cache": self.name, "reason": "model_changed"})
+                self._entries.clear()
+                self._fingerprint = fingerprint
+                _size.set(0, labels={"cache": self.name})
+
+    def get(self, key: str) -> Optional[Any]:
+        now = time.monotonic()
+        with self._lock:
+            item = self._entries.get(key)
+            if item is not None and item[0] < now:
+                del self._entries[key]
+                _evictions.inc(labels={"cache": self.name, "reason": "ttl"})
+                item = None
+            if item is not None:
+                self._entries.move_to_end(key)
+            _size.set(len(self._entries), labels={"cache": self.name})
+        _requests.inc(labels={"cache": self.name, "result": "hit" if item is not None else "miss"})
+        return item[1] if item is not None else None
+
+    def put(self, key: str, value: Any) -> None:
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl_s, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                _evictions.inc(labels={"cache": self.name, "reason": "lru"})
+            _size.set(len(self._entries), labels={"cache": self.name})
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            _size.set(0, labels={"cache": self.name})
+
+    def __len__(self) -> int:
+        return len(self._entries)
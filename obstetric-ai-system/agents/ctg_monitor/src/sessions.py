@@ -0,0 +1,238 @@
+"""
+Multi-bed CTG session registry backed by preallocated 2-D NumPy arrays.
+
+Every bed owns one row (slot) in the ``(max_beds, window)`` FHR, UC and signal-quality rings plus a few
+per-slot scalars (write position, samples seen, hop, last classification, escalation, last activity).
+Memory is fixed at construction. Ingest writes slices and never creates a Python object per sample.
+``sweep`` selects every session whose hop is due and classifies them together in one batched call;
+idle sessions are evicted by the same sweep.
+"""
+from __future__ import annotations
+
+import threading
+import time
+from typing import Any, Callable, Optional
+
+import numpy as np
+
+from shared.ctg_model.features import SAMPLE_RATE_HZ
+from shared.metrics import REGISTRY
+
+_sessions_gauge = REGISTRY.gauge("obstetric_ctg_stream_sessions", "Active CTG streaming sessions")
+_samples = REGISTRY.counter("obstetric_ctg_stream_samples_total", "FHR samples ingested on the CTG stream")
+_windows = REGISTRY.counter("obstetric_ctg_stream_windows_total", "CTG stream windows emitted for classification")
+_evicted = REGISTRY.counter("obstetric_ctg_stream_evictions_total", "CTG streaming sessions evicted after inactivity")
+_sweep_size = REGISTRY.histogram(
+    "obstetric_ctg_sweep_sessions", "Sessions classified per sweep", buckets=(1, 2, 4, 8, 16, 32, 64, 128, 256)
+)
+_sweep_time = REGISTRY.histogram("obstetric_ctg_sweep_seconds", "Duration of one vectorized session sweep")
+
+
+class SessionLimitError(RuntimeError):
+    pass
+
+
+class SessionOwnedError(RuntimeError):
+    """The bed is already streamed by another connection."""
+
+
+class SessionRegistry:
+    """
+    Fixed-capacity registry of bed streams. ``classify(windows, quality)`` receives the due windows as
+    ``(n, 2, window)`` float32 (FHR, UC; oldest first) and ``(n, window)`` quality, and returns one
+    result dict per row (``ml_class`` / ``escalation_level`` keys update the per-slot record).
+    """
+
+    def __init__(
+        self,
+        max_beds: int = 64,
+        window_s: float = 60.0,
+        hop_s: float = 15.0,
+        idle_timeout_s: float = 300.0,
+        sample_rate_hz: int = SAMPLE_RATE_HZ,
+    ):
+        self.max_beds = max_beds
+        self.sample_rate_hz = sample_rate_hz
+        self.window = int(round(window_s * sample_rate_hz))
+        self.default_hop = max(1, int(round(hop_s * sample_rate_hz)))
+        self.idle_timeout_s = idle_timeout_s
+        self.fhr = np.full((max_beds, self.window), np.nan, dtype=np.float32)
+        self.uc = np.full((max_beds, self.window), np.nan, dtype=np.float32)
+        self.quality = np.zeros((max_beds, self.window), dtype=np.float32)
+        self.write_pos = np.zeros(max_beds, dtype=np.int64)
+        self.total = np.zeros(max_beds, dtype=np.int64)
+        self.hop = np.full(max_beds, self.default_hop, dtype=np.int64)
+        self.next_due = np.zeros(max_beds, dtype=np.int64)
+        self.last_seen = np.zeros(max_beds, dtype=np.float64)
+        self.active = np.zeros(max_beds, dtype=bool)
+        self.last_class = np.full(max_beds, -1, dtype=np.int8)
+        self.last_confidence = np.zeros(max_beds, dtype=np.float32)
+        self.escalation = np.zeros(max_beds, dtype=np.int8)
+        self.escalated_at = np.zeros(max_beds, dtype=np.float64)
+        self._slots: dict[str, int] = {}
+        self._patients: list[Optional[str]] = [None] * max_beds
+        self._owners: list[Optional[object]] = [None] * max_beds
+        self._free = list(range(max_beds - 1, -1, -1))
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._slots)
+
+    def __contains__(self, patient_id: str) -> bool:
+        return patient_id in self._slots
+
+    def slot(self, patient_id: str) -> Optional[int]:
+        return self._slots.get(patient_id)
+
+    def open(self, patient_id: str, hop_s: Optional[float] = None, owner: Optional[object] = None) -> int:
+        """
+        Slot of ``patient_id``, allocating (and resetting) a free row on first use. With ``owner`` (e.g.
+        one per connection), a bed held by another owner raises ``SessionOwnedError``.
+        """
+        with self._lock:
+            slot = self._slots.get(patient_id)
+            if slot is not None:
+                held = self._owners[slot]
+                if owner is not None and held is not None and held is not owner:
+                    raise SessionOwnedError(f"bed {patient_id} is already streamed by another connection")
+                return slot
+            if not self._free:
+                raise SessionLimitError(f"stream session limit reached ({self.max_beds})")
+            slot = self._free.pop()
+            hop = self.default_hop if hop_s is None else max(1, int(round(hop_s * self.sample_rate_hz)))
+            self.fhr[slot] = np.nan
+            self.uc[slot] = np.nan
+            self.quality[slot] = 0.0
+            self.write_pos[slot] = 0
+            self.total[slot] = 0
+            self.hop[slot] = min(hop, self.window)
+            self.next_due[slot] = self.window
+            self.last_seen[slot] = time.monotonic()
+            self.active[slot] = True
+            self.last_class[slot] = -1
+            self.last_confidence[slot] = 0.0
+            self.escalation[slot] = 0
+            self.escalated_at[slot] = 0.0
+            self._slots[patient_id] = slot
+            self._patients[slot] = patient_id
+            self._owners[slot] = owner
+            _sessions_gauge.set(len(self._slots))
+            return slot
+
+    def close(self, patient_id: str, owner: Optional[object] = None) -> None:
+        """Release the bed; with ``owner``, only if that owner holds it."""
+        with self._lock:
+            slot = self._slots.get(patient_id)
+            if slot is None or (owner is not None and self._owners[slot] is not owner):
+                return
+            del self._slots[patient_id]
+            self.active[slot] = False
+            self._patients[slot] = None
+            self._owners[slot] = None
+            self._free.append(slot)
+            _sessions_gauge.set(len(self._slots))
+
+    def push(
+        self,
+        patient_id: str,
+        fhr: np.ndarray,
+        uc: Optional[np.ndarray] = None,
+        quality: Optional[np.ndarray] = None,
+    ) -> int:
+        """
+        Append samples to the bed's rings (slice writes, wrap handled in two slices). ``quality``
+        defaults to 1 where FHR is a valid beat rate and 0 on signal loss (NaN or <= 0).
+        """
+        slot = self.open(patient_id)
+        fhr = np.asarray(fhr, dtype=np.float32)
+        uc = np.full_like(fhr, np.nan) if uc is None else np.asarray(uc, dtype=np.float32)
+        if quality is None:
+            quality = (np.isfinite(fhr) & (fhr > 0)).astype(np.float32)
+        n = fhr.shape[0]
+        if n > self.window:
+            skipped = n - self.window
+            fhr, uc, quality = fhr[skipped:], uc[skipped:], np.asarray(quality)[skipped:]
+        else:
+            skipped = 0
+        with self._lock:
+            pos = int(self.write_pos[slot])
+            m = fhr.shape[0]
+            head = min(m, self.window - pos)
+            for buf, values in ((self.fhr, fhr), (self.uc, uc), (self.quality, quality)):
+                buf[slot, pos : pos + head] = values[:head]
+                buf[slot, : m - head] = values[head:]
+            self.write_pos[slot] = (pos + m) % self.window
+            self.total[slot] += n
+            self.last_seen[slot] = time.monotonic()
+        _samples.inc(n)
+        return slot
+
+    def due_slots(self) -> np.ndarray:
+        """Active slots with a full window whose next hop boundary has been reached."""
+        return np.flatnonzero(self.active & (self.total >= self.next_due))
+
+    def windows(self, slots: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        """Chronological ``(n, 2, window)`` FHR/UC and ``(n, window)`` quality for ``slots`` (one gather)."""
+        idx = (self.write_pos[slots, None] + np.arange(self.window)[None, :]) % self.window
+        rows = slots[:, None]
+        return np.stack((self.fhr[rows, idx], self.uc[rows, idx]), axis=1), self.quality[rows, idx]
+
+    def evict_idle(self, now: Optional[float] = None) -> list[str]:
+        now = time.monotonic() if now is None else now
+        stale = np.flatnonzero(self.active & (now - self.last_seen > self.idle_timeout_s))
+        ids = [p for p in (self._patients[s] for s in stale) if p is not None]
+        for patient_id in ids:
+            self.close(patient_id)
+        _evicted.inc(len(ids))
+        return ids
+
+    def sweep(self, classify: Callable[[np.ndarray, np.ndarray], list[dict[str, Any]]]) -> list[tuple[str, dict]]:
+        """
+        Evict idle beds, then classify every due session in one batched ``classify`` call. Returns
+        ``(patient_id, result)`` pairs; each result gets ``sample_end`` and ``escalation_changed``.
+        """
+        self.evict_idle()
+        with self._lock:
+            slots = self.due_slots()
+            if slots.size == 0:
+                return []
+            windows, quality = self.windows(slots)
+            sample_end = self.total[slots].copy()
+            # Next boundary: first multiple of the hop after the samples already seen (late sweeps skip)
+            hop = self.hop[slots]
+            self.next_due[slots] = sample_end - (sample_end - self.window) % hop + hop
+            patients = [self._patients[s] for s in slots]
+        t0 = time.perf_counter()
+        results = classify(windows, quality)
+        _sweep_time.observe(time.perf_counter() - t0)
+        _sweep_size.observe(len(slots))
+        _windows.inc(len(slots))
+        now = time.time()
+        out: list[tuple[str, dict]] = []
+        for slot, patient_id, end, result in zip(slots, patients, sample_end, results):
+            if patient_id is None or self._patients[slot] != patient_id:
+                continue  # closed during classification
+            result = {**result, "sample_end": int(end), "escalation_changed": False}
+            if "ml_class" not in result:
+                out.append((patient_id, result))  # window gated out (signal quality): escalation unchanged
+                continue
+            self.last_class[slot] = result["ml_class"]
+            self.last_confidence[slot] = result.get("confidence", 0.0)
+            level = int(result.get("escalation_level") or 0)
+            result["escalation_changed"] = level != int(self.escalation[slot])
+            if result["escalation_changed"]:
+                self.escalation[slot] = level
+                self.escalated_at[slot] = now if level else 0.0
+            out.append((patient_id, result))
+        return out
+
+    def nbytes(self) -> int:
+        """Preallocated bytes of the per-bed arrays (constant for the registry lifetime)."""
+        return sum(
+            a.nbytes
+            for a in (
+                self.fhr, self.uc, self.quality, self.write_pos, self.total, self.hop, self.next_due,
+                self.last_seen, self.active, self.last_class, self.last_confidence, self.escalation,
+                self.escalated_at,
+            )
+        )
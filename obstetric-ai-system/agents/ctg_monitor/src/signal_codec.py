@@ -0,0 +1,95 @@
+"""
+Compact CTG signal encodings: little-endian int16 (bpm x 4, 0.25 bpm resolution) or float32, sent as
+base64 in JSON or as raw ``bin`` in an ``application/x-msgpack`` body. Decoding is ``np.frombuffer``
+on the received bytes (no per-element parsing). A 20-minute trace is 9.6 KB as int16 (12.8 KB in
+base64) against about 33 KB as a JSON list.
+
+msgpack is optional: without it, msgpack bodies get a 415 and JSON keeps working.
+"""
+from __future__ import annotations
+
+import base64
+import binascii
+from typing import Any, Callable, Union
+
+import numpy as np
+from fastapi import HTTPException, Request, Response
+from fastapi.routing import APIRoute
+
+MSGPACK_CONTENT_TYPE = "application/x-msgpack"
+# encoding -> (dtype little-endian, scale to bpm)
+ENCODINGS = {"int16x4": ("<i2", 0.25), "float32": ("<f4", 1.0)}
+INT16_SCALE = 4
+
+
+class SignalDecodeError(ValueError):
+    pass
+
+
+def encode(signal: np.ndarray, encoding: str = "int16x4", as_base64: bool = True) -> Union[str, bytes]:
+    """Client side / tests: samples -> packed bytes (base64 text for JSON). NaN becomes 0 (signal loss)."""
+    x = np.nan_to_num(np.asarray(signal, dtype=np.float64), nan=0.0)
+    if encoding == "int16x4":
+        raw = np.clip(np.round(x * INT16_SCALE), -32768, 32767).astype("<i2").tobytes()
+    elif encoding == "float32":
+        raw = x.astype("<f4").tobytes()
+    else:
+        raise SignalDecodeError(f"unknown signal encoding {encoding!r} (expected one of {sorted(ENCODINGS)})")
+    return base64.b64encode(raw).decode("ascii") if as_base64 else raw
+
+
+def decode(packed: Union[bytes, str], encoding: str = "int16x4") -> np.ndarray:
+    """base64 text (JSON) or raw bytes (msgpack bin) -> float32 samples, via ``np.frombuffer``."""
+    if encoding not in ENCODINGS:
+        raise SignalDecodeError(f"unknown signal encoding {encoding!r} (expected one of {sorted(ENCODINGS)})")
+    dtype, scale = ENCODINGS[encoding]
+    if isinstance(packed, str):
+        try:
+            packed = base64.b64decode(packed, validate=True)
+        except (binascii.Error, ValueError) as e:
+            raise SignalDecodeError(f"invalid base64 signal: {e}") from e
+    if len(packed) % np.dtype(dtype).itemsize:
+        raise SignalDecodeError(f"{len(packed)} bytes is not a whole number of {encoding} samples")
+    samples = np.frombuffer(packed, dtype=dtype)
+    if scale == 1.0:
+        return samples  # float32 : vue en lecture seule sur le tampon reçu
+    return samples.astype(np.float32) * np.float32(scale)
+
+
+def _unpackb(body: bytes) -> Any:
+    try:
+        import msgpack
+    except ImportError as e:
+        raise HTTPException(status_code=415, detail="application/x-msgpack requires the msgpack package") from e
+    try:
+        return msgpack.unpackb(body, raw=False)
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"invalid msgpack body: {type(e).__name__} {e!s}".strip()) from e
+
+
+class _MsgpackRequest(Request):
+    """Request seen by FastAPI as JSON whose ``json()`` is the unpacked msgpack body."""
+
+    async def json(self) -> Any:
+        if not hasattr(self, "_json"):
+            self._json = _unpackb(await self.body())
+        return self._json
+
+
+class MsgpackRoute(APIRoute):
+    """APIRoute accepting ``application/x-msgpack`` bodies in addition to JSON (same pydantic model)."""
+
+    def get_route_handler(self) -> Callable:
+        handler = super().get_route_handler()
+
+        async def route_handler(request: Request) -> Response:
+            content_type = request.headers.get("content-type", "").split(";")[0].strip().lower()
+            if content_type == MSGPACK_CONTENT_TYPE:
+                scope = dict(request.scope)
+                scope["headers"] = [
+                    (k, b"application/json" if k == b"content-type" else v) for k, v in request.scope["headers"]
+                ]
+                request = _MsgpackRequest(scope, request.receive)
+            return await handler(request)
+
+        return route_handler
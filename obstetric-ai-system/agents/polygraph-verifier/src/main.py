@@ -6,17 +6,22 @@ import hashlib
 import os
 import time
 from fastapi import FastAPI
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import PlainTextResponse
 from pydantic import BaseModel
 import json
 import sys
 from pathlib import Path
+from typing import Optional
 
 _OBS = Path(__file__).resolve().parents[3]
 if str(_OBS) not in sys.path:
     sys.path.insert(0, str(_OBS))
+from shared.llm_client import cached_system, get_async_client, record_usage
 from shared.llm_router import LLMRouter
 from shared.llm_router.router import TaskType
 from shared.audit_logger import AuditLogger
+from shared.metrics import REGISTRY
 
 app = FastAPI(title="Polygraph Verifier Agent", version="1.0.0")
 router_llm = LLMRouter()
@@ -30,27 +35,29 @@ class PolygraphOutput(BaseModel):
     hallucination_risk: float
     narrative: str
     fhir_observation: dict
+    prompt_version: Optional[str] = None
 
 @app.post("/api/polygraph-verify", response_model=PolygraphOutput)
-def polygraph_verify(input_data: PolygraphInput) -> PolygraphOutput:
+async def polygraph_verify(input_data: PolygraphInput) -> PolygraphOutput:
     start = time.perf_counter()
-    from shared.prompt_system import build_llm_system_prompt
+    from shared.prompt_system import budget_from_env, build_llm_system_prompt, config_version
 
     model_id = router_llm.route(task=TaskType.RESEARCH)
-    system = build_llm_system_prompt("TruthVerifierPrompt")
+    system = build_llm_system_prompt("TruthVerifierPrompt", max_tokens=budget_from_env("POLYGRAPH_PROMPT_MAX_TOKENS"))
+    prompt_version = config_version()
     payload = json.dumps(input_data.agent_narratives, ensure_ascii=False, default=str)[:14000]
     user_msg = f"""Textes produits par les agents (JSON agent_id → narrative) :\n{payload}\n\n
 Vérifie cohérence, plausibilité clinique et citations. Donne un score de confiance 0-1, un risque d'hallucination 0-1, puis résumé ~150 mots. Si hallucination critique sur donnée numérique, le signaler explicitement."""
     try:
         if os.getenv("ANTHROPIC_API_KEY"):
-            import anthropic
-            c = anthropic.Anthropic()
-            r = c.messages.create(
+            c = get_async_client("anthropic")
+            r = await c.messages.create(
                 model="claude-sonnet-4-20250514",
                 max_tokens=400,
-                system=system,
+                system=cached_system(system),
                 messages=[{"role": "user", "content": user_msg}],
             )
+            record_usage("PolygraphVerifierAgent", r)
             narrative = r.content[0].text if r.content else "Vérification effectuée."
         else:
             narrative = "Vérification croisée des sorties. Confiance globale >= 0.95 si cohérent. Alerte si confiance < 0.90."
@@ -61,7 +68,8 @@ Vérifie cohérence, plausibilité clinique et citations. Donne un score de conf
     hallucination_risk = 0.05
     input_hash = hashlib.sha256(str(input_data.agent_narratives).encode()).hexdigest()
     output_hash = hashlib.sha256(narrative.encode()).hexdigest()
-    audit.log_event("PolygraphVerifierAgent", "verify", input_hash, output_hash, confidence=confidence_score, latency_ms=latency_ms)
+    # Écriture d'audit (fichier, chaîne de hash) hors de la boucle d'événements
+    await run_in_threadpool(audit.log_event, "PolygraphVerifierAgent", "verify", input_hash, output_hash, model_version=f"prompt={prompt_version}", confidence=confidence_score, latency_ms=latency_ms)
     fhir = {
         "resourceType": "Observation",
         "status": "final",
@@ -73,7 +81,12 @@ Vérifie cohérence, plausibilité clinique et citations. Donne un score de conf
         ],
         "note": [{"text": narrative}],
     }
-    return PolygraphOutput(confidence_score=confidence_score, hallucination_risk=hallucination_risk, narrative=narrative, fhir_observation=fhir)
+    return PolygraphOutput(confidence_score=confidence_score, hallucination_risk=hallucination_risk, narrative=narrative, fhir_observation=fhir, prompt_version=prompt_version)
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def metrics() -> str:
+    """Prometheus scrape endpoint (LLM tokens: uncached, cache reads / writes, output)."""
+    return REGISTRY.render()
 
 @app.get("/health")
 def health() -> dict:
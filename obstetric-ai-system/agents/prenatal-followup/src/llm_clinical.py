@@ -1,18 +1,23 @@
 """
 LLM-powered clinical narrative and diagnostic report for prenatal follow-up.
 Uses shared LLM router (Opus 4.5, Sonnet 4.5, GPT-5.2, Mistral). Fallback to rule-based narrative.
+The report also has a coroutine variant (agenerate_diagnostic_report) on the pooled async clients.
 """
 import json
 import os
+import time
 from typing import Any, Optional
 
 try:
     from shared.llm_router import LLMRouter
     from shared.llm_router.router import TaskType
+    from shared.llm_client import cached_system, get_async_client, get_client, record_usage
     _router_available = True
 except ImportError:
     _router_available = False
 
+_AGENT_ID = "PrenatalFollowupAgent"
+
 
 def _call_anthropic(
     prompt: str,
@@ -21,34 +26,69 @@ def _call_anthropic(
     max_tokens: int = 1024,
     system: str | None = None,
 ) -> str:
-    import anthropic
-
     key = os.getenv("ANTHROPIC_API_KEY", "")
     if not key:
         return ""
-    c = anthropic.Anthropic(api_key=key)
+    c = get_client("anthropic", api_key=key)
+    r = c.messages.create(**_anthropic_kwargs(prompt, api_model, max_tokens, system))
+    record_usage(_AGENT_ID, r)
+    return r.content[0].text if r.content else ""
+
+
+def _anthropic_kwargs(prompt: str, api_model: str, max_tokens: int, system: str | None) -> dict:
     kwargs: dict = {
         "model": api_model,
         "max_tokens": max_tokens,
         "messages": [{"role": "user", "content": prompt}],
     }
     if system:
-        kwargs["system"] = system
-    r = c.messages.create(**kwargs)
+        kwargs["system"] = cached_system(system)
+    return kwargs
+
+
+def _openai_kwargs(prompt: str, api_model: str, max_tokens: int) -> dict:
+    return {
+        "model": api_model if api_model != "gpt-5.2" else "gpt-4o",
+        "messages": [{"role": "user", "content": prompt}],
+        "max_tokens": max_tokens,
+    }
+
+
+async def _acall_anthropic(
+    prompt: str,
+    model_id: str,
+    api_model: str,
+    max_tokens: int = 1024,
+    system: str | None = None,
+) -> str:
+    key = os.getenv("ANTHROPIC_API_KEY", "")
+    if not key:
+        return ""
+    c = get_async_client("anthropic", api_key=key)
+    r = await c.messages.create(**_anthropic_kwargs(prompt, api_model, max_tokens, system))
+    record_usage(_AGENT_ID, r)
     return r.content[0].text if r.content else ""
 
 
+async def _acall_openai(prompt: str, model_id: str, api_model: str, max_tokens: int = 1024) -> str:
+    key = os.getenv("OPENAI_API_KEY", "")
+    if not key:
+        return ""
+    client = get_async_client("openai", api_key=key)
+    r = await client.chat.completions.create(**_openai_kwargs(prompt, api_model, max_tokens))
+    record_usage(_AGENT_ID, r, provider="openai")
+    if r.choices and r.choices[0].message.content:
+        return r.choices[0].message.content
+    return ""
+
+
 def _call_openai(prompt: str, model_id: str, api_model: str, max_tokens: int = 1024) -> str:
-    from openai import OpenAI
     key = os.getenv("OPENAI_API_KEY", "")
     if not key:
         return ""
-    client = OpenAI(api_key=key)
-    r = client.chat.completions.create(
-        model=api_model if api_model != "gpt-5.2" else "gpt-4o",
-        messages=[{"role": "user", "content": prompt}],
-        max_tokens=max_tokens,
-    )
+    client = get_client("openai", api_key=key)
+    r = client.chat.completions.create(**_openai_kwargs(prompt, api_model, max_tokens))
+    record_usage(_AGENT_ID, r, provider="openai")
     if r.choices and r.choices[0].message.content:
         return r.choices[0].message.content
     return ""
@@ -75,9 +115,11 @@ def generate_clinical_narrative(context: dict, task_type: str = "prenatal_analys
     resultats_anormaux = context.get("resultats_anormaux") or []
 
     try:
-        from shared.prompt_system import build_llm_system_prompt
+        from shared.prompt_system import budget_from_env, build_llm_system_prompt
 
-        system = build_llm_system_prompt("ClinicalSummaryPrompt")
+        system = build_llm_system_prompt(
+            "ClinicalSummaryPrompt", max_tokens=budget_from_env("PRENATAL_PROMPT_MAX_TOKENS")
+        )
     except Exception:
         system = None
 
@@ -91,6 +133,7 @@ Contexte :
 
 Référentiels : HAS 2016/2017, CNGOF, CSP R2122-1/R2122-2. Style technique, pas de diagnostic final, recommandations factuelles."""
 
+    start = time.perf_counter()
     try:
         if "claude" in model_id.lower():
             text = _call_anthropic(prompt, model_id, api_model, max_tokens=512, system=system)
@@ -99,10 +142,10 @@ Référentiels : HAS 2016/2017, CNGOF, CSP R2122-1/R2122-2. Style technique, pas
         else:
             text = ""
         if text and len(text.strip()) > 50:
-            router.record_success(model_id)
+            router.record_success(model_id, (time.perf_counter() - start) * 1000)
             return text.strip()
     except Exception:
-        router.record_failure(model_id)
+        router.record_failure(model_id, (time.perf_counter() - start) * 1000)
     return fallback
 
 
@@ -126,29 +169,61 @@ def _build_fallback_narrative(context: dict) -> str:
     return " ".join(parts)
 
 
-def generate_diagnostic_report(
-    dossier: dict,
-    sa: float,
-    consultation_data: Optional[dict] = None,
-    screening_results: Optional[dict] = None,
-    audit_input_hash: Optional[str] = None,
-    audit_output_hash: Optional[str] = None,
-) -> dict[str, Any]:
+class _ReportRun:
     """
-    Generate a structured medico-diagnostic report for one prenatal visit.
-    Sections: anamnèse, examen clinique, biologie, dépistages, synthèse, conduite à tenir.
-    Includes audit trail references. Returns dict compatible with FHIR DiagnosticReport.
+    Un rapport diagnostique, hors appel fournisseur : routage, prompt, puis analyse de la réponse et
+    statistiques du routeur. Partagé par generate_diagnostic_report et agenerate_diagnostic_report,
+    qui ne diffèrent que par le client (sync / async).
     """
-    fallback_sections = _build_fallback_report_sections(
-        dossier, sa, consultation_data, screening_results
-    )
-    if not _router_available:
-        return _report_dict(fallback_sections, sa, audit_input_hash, audit_output_hash, model_used="rule-based")
 
-    router = LLMRouter()
-    model_id = router.route(task=TaskType.PRENATAL_ANALYSIS, urgency="normal")
-    api_model = router.get_api_model_id(model_id)
+    def __init__(
+        self,
+        dossier: dict,
+        sa: float,
+        consultation_data: Optional[dict],
+        screening_results: Optional[dict],
+        audit_input_hash: Optional[str],
+        audit_output_hash: Optional[str],
+    ):
+        self.sa = sa
+        self.audit_input_hash, self.audit_output_hash = audit_input_hash, audit_output_hash
+        self.fallback_sections = _build_fallback_report_sections(dossier, sa, consultation_data, screening_results)
+        self.llm = _router_available
+        self.provider: Optional[str] = None  # anthropic | openai ; None = pas d'appel fournisseur
+        if not self.llm:
+            return
+        self.router = LLMRouter()
+        self.model_id = self.router.route(task=TaskType.PRENATAL_ANALYSIS, urgency="normal")
+        self.api_model = self.router.get_api_model_id(self.model_id)
+        self.provider = (
+            "anthropic" if "claude" in self.model_id.lower() else "openai" if "gpt" in self.model_id.lower() else None
+        )
+        self.system, self.prompt = _report_prompt(dossier, sa, consultation_data, screening_results)
+        self.start = time.perf_counter()
+
+    def finish(self, text: Optional[str]) -> dict[str, Any]:
+        """Réponse du modèle (None si l'appel a échoué) -> rapport, ou rapport à base de règles."""
+        if not self.llm:
+            return self._report(self.fallback_sections, "rule-based")
+        duration_ms = (time.perf_counter() - self.start) * 1000
+        sections = _parse_report_sections(text or "")
+        if sections is not None:
+            self.router.record_success(self.model_id, duration_ms)
+            return self._report(sections, self.model_id)
+        self.router.record_failure(self.model_id, duration_ms)
+        return self._report(self.fallback_sections, "rule-based")
+
+    def _report(self, sections: dict, model_used: str) -> dict[str, Any]:
+        return _report_dict(sections, self.sa, self.audit_input_hash, self.audit_output_hash, model_used=model_used)
+
 
+def _report_prompt(
+    dossier: dict,
+    sa: float,
+    consultation_data: Optional[dict],
+    screening_results: Optional[dict],
+) -> tuple[Optional[str], str]:
+    """(system, prompt) du rapport diagnostique."""
     ctx = {
         "dossier": dossier,
         "sa": sa,
@@ -156,9 +231,11 @@ def generate_diagnostic_report(
         "screenings": screening_results or {},
     }
     try:
-        from shared.prompt_system import build_llm_system_prompt
+        from shared.prompt_system import budget_from_env, build_llm_system_prompt
 
-        report_system = build_llm_system_prompt("ClinicalSummaryPrompt")
+        report_system = build_llm_system_prompt(
+            "ClinicalSummaryPrompt", max_tokens=budget_from_env("PRENATAL_PROMPT_MAX_TOKENS")
+        )
     except Exception:
         report_system = None
 
@@ -175,34 +252,64 @@ Produis un JSON avec exactement les clés suivantes (texte en français) :
 - conduite_a_tenir : prochaines étapes et recommandations
 
 Références : HAS 2016/2017, CSP R2122, CNGOF/SFD 2010, IADPSG. Réponds uniquement avec le JSON, sans markdown."""
+    return report_system, prompt
+
 
+def _parse_report_sections(text: str) -> Optional[dict]:
+    if not text:
+        return None
+    text = text.strip().removeprefix("```json").removeprefix("```").removesuffix("```").strip()
     try:
-        if "claude" in model_id.lower():
-            text = _call_anthropic(prompt, model_id, api_model, max_tokens=1500, system=report_system)
-        elif "gpt" in model_id.lower():
-            text = _call_openai(prompt, model_id, api_model, max_tokens=1500)
-        else:
-            text = ""
-        if text:
-            text = text.strip().removeprefix("```json").removeprefix("```").removesuffix("```").strip()
-            try:
-                sections = json.loads(text)
-                if isinstance(sections, dict):
-                    router.record_success(model_id)
-                    return _report_dict(
-                        sections, sa, audit_input_hash, audit_output_hash,
-                        model_used=model_id,
-                    )
-            except json.JSONDecodeError:
-                pass
-        router.record_failure(model_id)
+        sections = json.loads(text)
+    except json.JSONDecodeError:
+        return None
+    return sections if isinstance(sections, dict) else None
+
+
+def generate_diagnostic_report(
+    dossier: dict,
+    sa: float,
+    consultation_data: Optional[dict] = None,
+    screening_results: Optional[dict] = None,
+    audit_input_hash: Optional[str] = None,
+    audit_output_hash: Optional[str] = None,
+) -> dict[str, Any]:
+    """
+    Generate a structured medico-diagnostic report for one prenatal visit.
+    Sections: anamnèse, examen clinique, biologie, dépistages, synthèse, conduite à tenir.
+    Includes audit trail references. Returns dict compatible with FHIR DiagnosticReport.
+    """
+    run = _ReportRun(dossier, sa, consultation_data, screening_results, audit_input_hash, audit_output_hash)
+    text = None
+    try:
+        if run.provider == "anthropic":
+            text = _call_anthropic(run.prompt, run.model_id, run.api_model, max_tokens=1500, system=run.system)
+        elif run.provider == "openai":
+            text = _call_openai(run.prompt, run.model_id, run.api_model, max_tokens=1500)
     except Exception:
-        router.record_failure(model_id)
+        text = None
+    return run.finish(text)
 
-    return _report_dict(
-        fallback_sections, sa, audit_input_hash, audit_output_hash,
-        model_used="rule-based",
-    )
+
+async def agenerate_diagnostic_report(
+    dossier: dict,
+    sa: float,
+    consultation_data: Optional[dict] = None,
+    screening_results: Optional[dict] = None,
+    audit_input_hash: Optional[str] = None,
+    audit_output_hash: Optional[str] = None,
+) -> dict[str, Any]:
+    """generate_diagnostic_report on the async provider clients: no worker thread held during the LLM call."""
+    run = _ReportRun(dossier, sa, consultation_data, screening_results, audit_input_hash, audit_output_hash)
+    text = None
+    try:
+        if run.provider == "anthropic":
+            text = await _acall_anthropic(run.prompt, run.model_id, run.api_model, max_tokens=1500, system=run.system)
+        elif run.provider == "openai":
+            text = await _acall_openai(run.prompt, run.model_id, run.api_model, max_tokens=1500)
+    except Exception:
+        text = None
+    return run.finish(text)
 
 
 def _build_fallback_report_sections(
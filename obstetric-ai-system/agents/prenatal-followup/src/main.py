@@ -18,6 +18,8 @@ for p in (_root, _repo_root):
 from typing import Any, Optional
 
 from fastapi import FastAPI
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import PlainTextResponse
 from pydantic import BaseModel, Field
 
 from . import calendar as cal
@@ -31,6 +33,16 @@ try:
 except ImportError:
     _audit = None
 
+try:
+    from shared.metrics import REGISTRY
+except ImportError:
+    REGISTRY = None
+
+try:
+    from shared.prompt_system import config_version
+except ImportError:
+    config_version = None
+
 try:
     from shared.alerting import sender as alert_sender
     _alerting_available = True
@@ -395,11 +407,11 @@ def get_norms(sa: float = 20.0) -> dict[str, Any]:
 # --- Report médico-diagnostique ---
 
 @app.post("/api/prenatal-followup/report")
-def generate_report(body: PrenatalReportInput) -> dict[str, Any]:
+async def generate_report(body: PrenatalReportInput) -> dict[str, Any]:
     t0 = time.perf_counter()
     inp_hash = _input_hash(body)
     dossier = body.dossier or {}
-    report = llm_clin.generate_diagnostic_report(
+    report = await llm_clin.agenerate_diagnostic_report(
         dossier=dossier,
         sa=body.sa,
         consultation_data=body.consultation_data,
@@ -407,14 +419,18 @@ def generate_report(body: PrenatalReportInput) -> dict[str, Any]:
         audit_input_hash=inp_hash,
         audit_output_hash=None,
     )
+    # Version du prompt system (rechargeable à chaud) : dans le rapport et dans l'audit
+    report["prompt_version"] = config_version() if config_version is not None else None
     out_hash = _output_hash(report)
     report["audit_input_hash"] = inp_hash
     report["audit_output_hash"] = out_hash
-    audit_hash = _log_audit(
+    # Écriture d'audit (fichier, bloquante) hors de la boucle d'événements
+    audit_hash = await run_in_threadpool(
+        _log_audit,
         "report",
         inp_hash,
         out_hash,
-        model_version=report.get("model_used", ""),
+        model_version=f"{report.get('model_used', '')};prompt={report['prompt_version']}",
         latency_ms=int((time.perf_counter() - t0) * 1000),
     )
     report["audit_hash"] = audit_hash
@@ -422,6 +438,12 @@ def generate_report(body: PrenatalReportInput) -> dict[str, Any]:
     return report
 
 
+@app.get("/metrics", response_class=PlainTextResponse)
+def metrics() -> str:
+    """Prometheus scrape endpoint (LLM tokens: uncached, cache reads / writes, output)."""
+    return REGISTRY.render() if REGISTRY is not None else ""
+
+
 @app.get("/api/prenatal-followup/health")
 @app.get("/health")
 def health() -> dict[str, str]:
@@ -5,9 +5,11 @@ Input: FHIR Bundle (all agents outputs). Output: FHIR DetectedIssue + narrative
 import hashlib
 import os
 import time
-from typing import Any
+from typing import Any, Optional
 
 from fastapi import FastAPI
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import PlainTextResponse
 from pydantic import BaseModel
 import json
 import sys
@@ -16,9 +18,11 @@ from pathlib import Path
 _OBS = Path(__file__).resolve().parents[3]
 if str(_OBS) not in sys.path:
     sys.path.insert(0, str(_OBS))
+from shared.llm_client import cached_system, get_async_client, record_usage
 from shared.llm_router import LLMRouter
 from shared.llm_router.router import TaskType
 from shared.audit_logger import AuditLogger
+from shared.metrics import REGISTRY
 
 app = FastAPI(title="Symbolic Reasoning Agent", version="1.0.0")
 router_llm = LLMRouter()
@@ -32,27 +36,31 @@ class SymbolicOutput(BaseModel):
     deviations_count: int
     narrative: str
     fhir_detected_issue: dict
+    prompt_version: Optional[str] = None
 
 @app.post("/api/symbolic-reasoning", response_model=SymbolicOutput)
-def symbolic_reasoning(input_data: SymbolicInput) -> SymbolicOutput:
+async def symbolic_reasoning(input_data: SymbolicInput) -> SymbolicOutput:
     start = time.perf_counter()
-    from shared.prompt_system import build_llm_system_prompt
+    from shared.prompt_system import budget_from_env, build_llm_system_prompt, config_version
 
     model_id = router_llm.route(task=TaskType.REASONING, complexity="high")
-    system = build_llm_system_prompt("GuidelineCompliancePrompt")
+    system = build_llm_system_prompt(
+        "GuidelineCompliancePrompt", max_tokens=budget_from_env("SYMBOLIC_PROMPT_MAX_TOKENS")
+    )
+    prompt_version = config_version()
     bundle_excerpt = json.dumps(input_data.bundle, ensure_ascii=False, default=str)[:14000]
     user_msg = f"""Bundle FHIR (extrait JSON) des sorties agents :\n{bundle_excerpt}\n\n
 Indique : 1) conformité aux guidelines citées dans ton prompt, 2) nombre d'écarts majeurs/mineurs, 3) résumé narratif ~200 mots avec références. Pas de diagnostic."""
     try:
         if os.getenv("ANTHROPIC_API_KEY"):
-            import anthropic
-            c = anthropic.Anthropic()
-            r = c.messages.create(
+            c = get_async_client("anthropic")
+            r = await c.messages.create(
                 model="claude-opus-4-20250514",
                 max_tokens=600,
-                system=system,
+                system=cached_system(system),
                 messages=[{"role": "user", "content": user_msg}],
             )
+            record_usage("SymbolicReasoningAgent", r)
             narrative = r.content[0].text if r.content else "Conformité analysée. Aucun écart majeur détecté."
         else:
             narrative = "Analyse de conformité HAS/FIGO/CNGOF. Validation clinique recommandée pour tout écart."
@@ -61,7 +69,8 @@ Indique : 1) conformité aux guidelines citées dans ton prompt, 2) nombre d'éc
     latency_ms = int((time.perf_counter() - start) * 1000)
     input_hash = hashlib.sha256(str(input_data.bundle).encode()).hexdigest()
     output_hash = hashlib.sha256(narrative.encode()).hexdigest()
-    audit.log_event("SymbolicReasoningAgent", "compliance_check", input_hash, output_hash, latency_ms=latency_ms)
+    # Écriture d'audit (fichier, chaîne de hash) hors de la boucle d'événements
+    await run_in_threadpool(audit.log_event, "SymbolicReasoningAgent", "compliance_check", input_hash, output_hash, model_version=f"prompt={prompt_version}", latency_ms=latency_ms)
     fhir = {
         "resourceType": "DetectedIssue",
         "status": "final",
@@ -69,7 +78,12 @@ Indique : 1) conformité aux guidelines citées dans ton prompt, 2) nombre d'éc
         "detail": narrative,
         "reference": "HAS 2022, FIGO 2015, CNGOF",
     }
-    return SymbolicOutput(conformant=True, deviations_count=0, narrative=narrative, fhir_detected_issue=fhir)
+    return SymbolicOutput(conformant=True, deviations_count=0, narrative=narrative, fhir_detected_issue=fhir, prompt_version=prompt_version)
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def metrics() -> str:
+    """Prometheus scrape endpoint (LLM tokens: uncached, cache reads / writes, output)."""
+    return REGISTRY.render()
 
 @app.get("/health")
 def health() -> dict:
@@ -17,3 +17,14 @@ class ObstetricUser(HttpUser):
             "decelerations_light": 0.01,
             "decelerations_severe": 0,
         })
+
+    @task(2)
+    def ctg_monitor_batch(self):
+        self.client.post("/api/ctg-monitor/batch", json={"items": [{
+            "baseline_bpm": 132,
+            "stv_ms": 2.1,
+            "features_21": [
+                132.0, 0.006, 0.0, 0.006, 0.003, 0.0, 0.0, 17.0, 2.1, 0.0, 10.4, 130.0, 68.0, 198.0,
+                6.0, 1.0, 141.0, 136.0, 140.0, 12.0, 0.0,
+            ],
+        }] * 16})
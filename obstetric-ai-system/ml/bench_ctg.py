@@ -0,0 +1,337 @@
+#!/usr/bin/env python3
+"""Micro-benchmarks for the CTG classifier pipeline.
+
+Usage (from obstetric-ai-system/):
+  python ml/bench_ctg.py preprocess            # rows/s for 1, 64 and 100k rows, loop vs vectorized
+  python ml/bench_ctg.py backends              # torch vs ONNX Runtime latency + cold start
+  python ml/bench_ctg.py input-modes \
+      [--tiled-dir DIR] [--native-dir DIR]       # tiled (T=240) vs native (T=21): latency, RSS, F1
+  python ml/bench_ctg.py streaming             # per-hop cost: full-window forward vs stateful step
+  python ml/bench_ctg.py payloads              # request parse time: JSON list vs base64 int16/float32 vs msgpack
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable
+
+import numpy as np
+
+_ML_DIR = Path(__file__).resolve().parent
+_OBS_ROOT = _ML_DIR.parent
+_AGENT_SRC = _OBS_ROOT / "agents" / "ctg_monitor" / "src"
+sys.path.insert(0, str(_OBS_ROOT))
+from shared.ctg_model.preprocessing import rows_to_sequences  # noqa: E402
+
+N_FEATURES = 21
+INPUT_LEN = 240
+
+
+def _legacy_rows_to_sequences(X: np.ndarray, input_len: int) -> np.ndarray:
+    """Reference per-element loop (pre-vectorization), kept for comparison only."""
+    n, n_feat = X.shape
+    out = np.zeros((n, 1, input_len), dtype=np.float32)
+    for i in range(n):
+        row = X[i]
+        for t in range(input_len):
+            out[i, 0, t] = row[t % n_feat]
+    return out
+
+
+def _best_of(fn: Callable[[], object], repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def _print_table(header: list[str], rows: list[list[str]]) -> None:
+    widths = [max(len(h), *(len(r[i]) for r in rows)) for i, h in enumerate(header)]
+    print(" | ".join(h.ljust(w) for h, w in zip(header, widths)))
+    print("-+-".join("-" * w for w in widths))
+    for r in rows:
+        print(" | ".join(c.ljust(w) for c, w in zip(r, widths)))
+
+
+def bench_preprocess(args: argparse.Namespace) -> None:
+    rng = np.random.default_rng(0)
+    rows: list[list[str]] = []
+    for n in args.sizes:
+        X = rng.standard_normal((n, N_FEATURES)).astype(np.float32)
+        repeat = args.repeat if n < 10_000 else 1
+        t_vec = _best_of(lambda: rows_to_sequences(X, INPUT_LEN), repeat)
+        if n <= args.max_legacy_rows:
+            t_loop = _best_of(lambda: _legacy_rows_to_sequences(X, INPUT_LEN), repeat)
+            loop_rps = f"{n / t_loop:,.0f}"
+            speedup = f"{t_loop / t_vec:,.0f}x"
+        else:
+            loop_rps, speedup = "skipped", "-"
+        rows.append([f"{n:,}", loop_rps, f"{n / t_vec:,.0f}", speedup])
+    _print_table(["rows", "loop rows/s", "vectorized rows/s", "speedup"], rows)
+
+
+def _percentile_ms(samples: list[float], q: float) -> str:
+    return f"{np.percentile(np.asarray(samples) * 1000, q):.2f}"
+
+
+def _prepare_model_dir(model_dir: Path | None) -> Path:
+    """Use real artifacts when present, otherwise random weights (latency does not depend on values)."""
+    import shutil
+
+    import torch
+
+    from export_ctg_onnx import export_onnx, load_torch_model
+    from shared.ctg_model.classifier import build_ctg_classifier
+
+    src = model_dir or (_OBS_ROOT / "agents" / "ctg_monitor" / "model")
+    work = Path(tempfile.mkdtemp(prefix="ctg-bench-"))
+    shutil.copy(src / "preprocessor.json", work / "preprocessor.json")
+    if (src / "ctg_classifier.pt").is_file():
+        shutil.copy(src / "ctg_classifier.pt", work / "ctg_classifier.pt")
+    else:
+        print("[info] no trained weights found: benchmarking random weights", flush=True)
+        torch.manual_seed(0)
+        torch.save(build_ctg_classifier().state_dict(), work / "ctg_classifier.pt")
+    model, preproc = load_torch_model(work)
+    export_onnx(model, work / "ctg_classifier.onnx", int(preproc["input_len"]))
+    return work
+
+
+def _cold_start_s(model_dir: Path, backend: str) -> float:
+    """Fresh interpreter: import ml_ctg, load artifacts, first prediction."""
+    code = (
+        "import sys, time; t=time.perf_counter(); "
+        f"sys.path[:0]=[{str(_OBS_ROOT)!r}, {str(_AGENT_SRC)!r}]; "
+        "import ml_ctg; ml_ctg.predict_from_features([0.0]*21); "
+        "print(time.perf_counter()-t)"
+    )
+    env = {**os.environ, "CTG_MODEL_DIR": str(model_dir), "CTG_INFERENCE_BACKEND": backend}
+    out = subprocess.run([sys.executable, "-c", code], env=env, capture_output=True, text=True, check=True)
+    return float(out.stdout.strip().splitlines()[-1])
+
+
+def bench_backends(args: argparse.Namespace) -> None:
+    import importlib
+
+    sys.path.insert(0, str(_AGENT_SRC))
+    work = _prepare_model_dir(args.model_dir)
+    os.environ["CTG_MODEL_DIR"] = str(work)
+    import ml_ctg
+
+    rng = np.random.default_rng(0)
+    rows: list[list[str]] = []
+    for backend in ("torch", "onnx"):
+        os.environ["CTG_INFERENCE_BACKEND"] = backend
+        ml_ctg = importlib.reload(ml_ctg)
+        ml_ctg.warmup((1,), rounds=1)
+        cold = _cold_start_s(work, backend)
+        for bs in args.batch_sizes:
+            batch = rng.standard_normal((bs, N_FEATURES)).tolist()
+            ml_ctg.predict_batch(batch)
+            samples = []
+            for _ in range(args.repeat):
+                t0 = time.perf_counter()
+                ml_ctg.predict_batch(batch)
+                samples.append(time.perf_counter() - t0)
+            rows.append([
+                backend,
+                str(bs),
+                _percentile_ms(samples, 50),
+                _percentile_ms(samples, 95),
+                f"{bs / np.median(samples):,.0f}",
+                f"{cold:.2f}",
+            ])
+    _print_table(["backend", "batch", "p50 ms", "p95 ms", "rows/s", "cold start s"], rows)
+
+
+def _mode_model_dir(src: Path | None, mode: str) -> Path:
+    """Trained artifacts for ``mode`` when given, otherwise random weights with the matching input length."""
+    import torch
+
+    from shared.ctg_model.classifier import build_ctg_classifier
+    from shared.ctg_model.preprocessing import sequence_length
+
+    if src is not None and (src / "ctg_classifier.pt").is_file():
+        return src
+    base = _OBS_ROOT / "agents" / "ctg_monitor" / "model" / "preprocessor.json"
+    preproc = json.loads(base.read_text(encoding="utf-8"))
+    preproc["input_mode"] = mode
+    preproc["input_len"] = sequence_length(mode, len(preproc["feature_columns"]))
+    work = Path(tempfile.mkdtemp(prefix=f"ctg-bench-{mode}-"))
+    (work / "preprocessor.json").write_text(json.dumps(preproc), encoding="utf-8")
+    torch.manual_seed(0)
+    torch.save(build_ctg_classifier(input_len=preproc["input_len"]).state_dict(), work / "ctg_classifier.pt")
+    return work
+
+
+def _peak_rss_mb(model_dir: Path, batch_size: int) -> float:
+    """Fresh interpreter: peak RSS growth (MB) of loading the model and classifying one batch."""
+    code = (
+        "import resource, sys; "
+        f"sys.path[:0]=[{str(_OBS_ROOT)!r}, {str(_AGENT_SRC)!r}]; "
+        "import numpy, torch, ml_ctg; before=resource.getrusage(resource.RUSAGE_SELF).ru_maxrss; "
+        f"ml_ctg.predict_batch(numpy.zeros(({batch_size}, 21)).tolist()); "
+        "print((resource.getrusage(resource.RUSAGE_SELF).ru_maxrss-before)/1024)"
+    )
+    env = {**os.environ, "CTG_MODEL_DIR": str(model_dir), "CTG_INFERENCE_BACKEND": "torch"}
+    out = subprocess.run([sys.executable, "-c", code], env=env, capture_output=True, text=True, check=True)
+    return float(out.stdout.strip().splitlines()[-1])
+
+
+def bench_input_modes(args: argparse.Namespace) -> None:
+    import importlib
+
+    sys.path.insert(0, str(_AGENT_SRC))
+    import ml_ctg
+
+    rng = np.random.default_rng(0)
+    rows: list[list[str]] = []
+    for mode, src in (("tiled", args.tiled_dir), ("native", args.native_dir)):
+        work = _mode_model_dir(src, mode)
+        metrics_path = work / "training_metrics.json"
+        f1 = "n/a (untrained)"
+        if metrics_path.is_file():
+            f1 = f"{json.loads(metrics_path.read_text(encoding='utf-8'))['val_f1_weighted']:.4f}"
+        os.environ["CTG_MODEL_DIR"] = str(work)
+        os.environ["CTG_INFERENCE_BACKEND"] = "torch"
+        ml_ctg = importlib.reload(ml_ctg)
+        ml_ctg.warmup((1,), rounds=1)
+        rss = _peak_rss_mb(work, max(args.batch_sizes))
+        for bs in args.batch_sizes:
+            batch = rng.standard_normal((bs, N_FEATURES)).tolist()
+            ml_ctg.predict_batch(batch)
+            samples = []
+            for _ in range(args.repeat):
+                t0 = time.perf_counter()
+                ml_ctg.predict_batch(batch)
+                samples.append(time.perf_counter() - t0)
+            rows.append([
+                mode,
+                str(bs),
+                _percentile_ms(samples, 50),
+                _percentile_ms(samples, 95),
+                f"{bs / np.median(samples):,.0f}",
+                f"{rss:.0f}",
+                f1,
+            ])
+    _print_table(["input mode", "batch", "p50 ms", "p95 ms", "rows/s", "peak RSS +MB", "val F1"], rows)
+
+
+def bench_streaming(args: argparse.Namespace) -> None:
+    import torch
+
+    from shared.ctg_model.classifier import build_ctg_classifier
+    from shared.ctg_model.streaming import StreamingCTGClassifier
+
+    torch.manual_seed(0)
+    model = build_ctg_classifier(input_len=args.window).eval()
+    stream = StreamingCTGClassifier(model, window_hops=max(1, args.window // args.hop))
+    rows: list[list[str]] = []
+    for bs in args.batch_sizes:
+        window = torch.randn(bs, 1, args.window)
+        hop = torch.randn(bs, 1, args.hop)
+        state = stream.init_state(bs)
+        stream.step(torch.randn(bs, 1, args.window), state)
+        with torch.no_grad():
+            model(window)
+            t_full = _best_of(lambda: model(window), args.repeat)
+        t_step = _best_of(lambda: stream.step(hop, state), args.repeat)
+        rows.append([str(bs), f"{t_full * 1000:.2f}", f"{t_step * 1000:.2f}", f"{t_full / t_step:.1f}x"])
+    print(f"window={args.window} samples, hop={args.hop} samples")
+    _print_table(["streams", "full window ms/hop", "streaming ms/hop", "speedup"], rows)
+
+
+def bench_payloads(args: argparse.Namespace) -> None:
+    """Body bytes -> CTGInput -> NumPy signal, as the agent does it (decode + pydantic + array)."""
+    sys.path.insert(0, str(_AGENT_SRC))
+    from agents.ctg_monitor.src import main as ctg_main
+
+    codec = ctg_main.signal_codec
+    try:
+        import msgpack
+    except ImportError:
+        msgpack = None
+        print("[info] msgpack not installed: msgpack rows skipped", flush=True)
+
+    def parse(loads: Callable[[bytes], dict]) -> Callable[[bytes], object]:
+        return lambda body: ctg_main._signal_arrays(ctg_main.CTGInput.model_validate(loads(body)))
+
+    rng = np.random.default_rng(0)
+    rows: list[list[str]] = []
+    for minutes in args.minutes:
+        n = int(minutes * 60 * 4)
+        signal = np.round(140 + 5 * np.sin(np.arange(n) / 6) + rng.normal(0, 1.5, n), 2)
+        base = {"baseline_bpm": 140, "stv_ms": 12}
+        variants = [
+            ("json list", json.dumps({**base, "signal_60s": signal.tolist()}).encode(), parse(json.loads)),
+            (
+                "json b64 int16x4",
+                json.dumps({**base, "signal_packed": codec.encode(signal, "int16x4")}).encode(),
+                parse(json.loads),
+            ),
+            (
+                "json b64 float32",
+                json.dumps({**base, "signal_packed": codec.encode(signal, "float32"), "signal_encoding": "float32"}).encode(),
+                parse(json.loads),
+            ),
+        ]
+        if msgpack is not None:
+            packed = codec.encode(signal, "int16x4", as_base64=False)
+            variants.append(("msgpack bin int16x4", msgpack.packb({**base, "signal_packed": packed}), parse(msgpack.unpackb)))
+        t_ref = None
+        for name, body, fn in variants:
+            t = _best_of(lambda: fn(body), args.repeat)
+            t_ref = t_ref or t
+            rows.append([f"{minutes:g} min", name, f"{len(body) / 1024:,.1f}", f"{t * 1000:.3f}", f"{t_ref / t:.1f}x"])
+    _print_table(["trace", "encoding", "body KB", "parse ms", "vs JSON list"], rows)
+
+
+def main() -> None:
+    p = argparse.ArgumentParser(description="CTG pipeline micro-benchmarks")
+    sub = p.add_subparsers(dest="cmd", required=True)
+
+    pre = sub.add_parser("preprocess", help="Feature-to-sequence tiling throughput")
+    pre.add_argument("--sizes", type=int, nargs="+", default=[1, 64, 100_000])
+    pre.add_argument("--repeat", type=int, default=20)
+    pre.add_argument("--max-legacy-rows", type=int, default=100_000, help="Skip the slow loop above this size")
+    pre.set_defaults(func=bench_preprocess)
+
+    be = sub.add_parser("backends", help="Eager PyTorch vs ONNX Runtime inference latency")
+    be.add_argument("--model-dir", type=Path, default=None, help="Directory with ctg_classifier.pt + preprocessor.json")
+    be.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 8, 64])
+    be.add_argument("--repeat", type=int, default=30)
+    be.set_defaults(func=bench_backends)
+
+    im = sub.add_parser("input-modes", help="Tiled (T=240) vs native (T=21) input: latency, memory, F1")
+    im.add_argument("--tiled-dir", type=Path, default=None, help="Model dir trained with --input-mode tiled")
+    im.add_argument("--native-dir", type=Path, default=None, help="Model dir trained with --input-mode native")
+    im.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 8, 64])
+    im.add_argument("--repeat", type=int, default=30)
+    im.set_defaults(func=bench_input_modes)
+
+    st = sub.add_parser("streaming", help="Full-window forward vs stateful streaming step, per hop")
+    st.add_argument("--window", type=int, default=240, help="Window length in samples (4 Hz)")
+    st.add_argument("--hop", type=int, default=60, help="Hop length in samples (4 Hz)")
+    st.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 40])
+    st.add_argument("--repeat", type=int, default=10)
+    st.set_defaults(func=bench_streaming)
+
+    pl = sub.add_parser("payloads", help="Request parse time per signal encoding and trace length")
+    pl.add_argument("--minutes", type=float, nargs="+", default=[1, 20, 60])
+    pl.add_argument("--repeat", type=int, default=50)
+    pl.set_defaults(func=bench_payloads)
+
+    args = p.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
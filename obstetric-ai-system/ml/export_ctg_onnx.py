@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""Export the trained CTG classifier to ONNX (dynamic batch axis) for ONNX Runtime serving.
+
+Writes ``ctg_classifier.onnx`` next to ``ctg_classifier.pt``; select it in the agent with
+``CTG_INFERENCE_BACKEND=onnx``.
+
+Usage (from obstetric-ai-system/):
+  python ml/export_ctg_onnx.py [--model-dir agents/ctg_monitor/model] [--opset 17]
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+from pathlib import Path
+
+import numpy as np
+import torch
+
+_ML_DIR = Path(__file__).resolve().parent
+_OBS_ROOT = _ML_DIR.parent
+sys.path.insert(0, str(_OBS_ROOT))
+from shared.ctg_model.classifier import build_ctg_classifier  # noqa: E402
+
+
+def _default_model_dir() -> Path:
+    return _OBS_ROOT / "agents" / "ctg_monitor" / "model"
+
+
+def load_torch_model(model_dir: Path) -> tuple[torch.nn.Module, dict]:
+    preproc = json.loads((model_dir / "preprocessor.json").read_text(encoding="utf-8"))
+    model = build_ctg_classifier(input_len=int(preproc["input_len"]))
+    state = torch.load(model_dir / "ctg_classifier.pt", map_location="cpu", weights_only=True)
+    model.load_state_dict(state)
+    model.eval()
+    return model, preproc
+
+
+def export_onnx(model: torch.nn.Module, out_path: Path, input_len: int, opset: int = 17) -> Path:
+    """TorchScript-based exporter: no onnxscript dependency, batch axis left dynamic."""
+    example = torch.zeros(2, 1, input_len, dtype=torch.float32)
+    kwargs = dict(
+        input_names=["sequence"],
+        output_names=["logits"],
+        dynamic_axes={"sequence": {0: "batch"}, "logits": {0: "batch"}},
+        opset_version=opset,
+    )
+    # Not under no_grad(): that would route MultiheadAttention to a fused kernel ONNX cannot express
+    try:
+        torch.onnx.export(model, (example,), str(out_path), dynamo=False, **kwargs)
+    except TypeError:
+        # torch < 2.5 has no ``dynamo`` switch (TorchScript exporter is the default)
+        torch.onnx.export(model, (example,), str(out_path), **kwargs)
+    return out_path
+
+
+def verify_onnx(model: torch.nn.Module, onnx_path: Path, input_len: int, atol: float = 1e-4) -> float:
+    """Max |logit| difference between eager torch and ONNX Runtime on random batches of 1 and 16."""
+    import onnxruntime as ort
+
+    sess = ort.InferenceSession(str(onnx_path), providers=["CPUExecutionProvider"])
+    rng = np.random.default_rng(0)
+    worst = 0.0
+    for bs in (1, 16):
+        x = rng.standard_normal((bs, 1, input_len)).astype(np.float32)
+        with torch.no_grad():
+            ref = model(torch.from_numpy(x)).numpy()
+        got = sess.run(None, {"sequence": x})[0]
+        worst = max(worst, float(np.abs(ref - got).max()))
+    if worst > atol:
+        raise RuntimeError(f"ONNX parity check failed: max |diff|={worst:.2e} > {atol:.0e}")
+    return worst
+
+
+def main() -> None:
+    p = argparse.ArgumentParser(description="Export ctg_classifier.pt to ONNX")
+    p.add_argument("--model-dir", type=Path, default=None, help="Directory with ctg_classifier.pt + preprocessor.json")
+    p.add_argument("--opset", type=int, default=17)
+    p.add_argument("--no-verify", action="store_true", help="Skip the ONNX Runtime parity check")
+    args = p.parse_args()
+
+    model_dir = args.model_dir or _default_model_dir()
+    model, preproc = load_torch_model(model_dir)
+    input_len = int(preproc["input_len"])
+    out_path = export_onnx(model, model_dir / "ctg_classifier.onnx", input_len, opset=args.opset)
+    print(f"Saved {out_path}", flush=True)
+    if not args.no_verify:
+        diff = verify_onnx(model, out_path, input_len)
+        print(f"Parity OK (max |logit diff|={diff:.2e})", flush=True)
+
+
+if __name__ == "__main__":
+    main()
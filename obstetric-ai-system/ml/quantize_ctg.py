@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""Build the int8 dynamically-quantized CTG classifier and report its accuracy/F1 delta.
+
+Reads ``ctg_classifier.pt`` + ``preprocessor.json``, quantizes the BiLSTM and Linear layers to int8,
+writes ``ctg_classifier_int8.pt`` and ``quantization_metrics.json`` next to them. Serve it with
+``CTG_MODEL_PRECISION=int8``.
+
+The validation split is rebuilt exactly as in ``train_ctg.py`` (same ``--val-size`` / ``--seed``,
+stratified), so the delta is measured on rows the model never trained on.
+
+Usage (from obstetric-ai-system/):
+  python ml/quantize_ctg.py [--model-dir agents/ctg_monitor/model] [--data ../fetal_health.csv]
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import torch
+from sklearn.metrics import accuracy_score, f1_score
+from sklearn.model_selection import train_test_split
+
+_ML_DIR = Path(__file__).resolve().parent
+_OBS_ROOT = _ML_DIR.parent
+sys.path.insert(0, str(_OBS_ROOT))
+from export_ctg_onnx import load_torch_model  # noqa: E402
+from shared.ctg_model.preprocessing import features_to_sequences  # noqa: E402
+from shared.ctg_model.quantization import quantize_dynamic_int8  # noqa: E402
+from train_ctg import _default_data_path, _default_out_dir, load_csv  # noqa: E402
+
+
+def validation_split(data_path: Path, val_size: float, seed: int) -> tuple[np.ndarray, np.ndarray]:
+    X_df, y, _ = load_csv(data_path)
+    _, X_va, _, y_va = train_test_split(X_df.to_numpy(), y, test_size=val_size, random_state=seed, stratify=y)
+    return X_va, y_va
+
+
+def evaluate(model: torch.nn.Module, seq: np.ndarray, y: np.ndarray) -> dict[str, float]:
+    x = torch.from_numpy(seq)
+    with torch.no_grad():
+        pred = model(x).argmax(dim=-1).numpy()
+        t0 = time.perf_counter()
+        for i in range(min(len(seq), 64)):
+            model(x[i : i + 1])
+        per_row_ms = (time.perf_counter() - t0) * 1000 / min(len(seq), 64)
+    return {
+        "accuracy": float(accuracy_score(y, pred)),
+        "f1_weighted": float(f1_score(y, pred, average="weighted", zero_division=0)),
+        "latency_ms_batch1": per_row_ms,
+    }
+
+
+def main() -> None:
+    p = argparse.ArgumentParser(description="Quantize the CTG classifier to int8 (dynamic)")
+    p.add_argument("--model-dir", type=Path, default=None, help="Directory with ctg_classifier.pt + preprocessor.json")
+    p.add_argument("--data", type=Path, default=None, help="Path to fetal_health.csv")
+    p.add_argument("--val-size", type=float, default=0.2, help="Must match train_ctg.py")
+    p.add_argument("--seed", type=int, default=42, help="Must match train_ctg.py")
+    args = p.parse_args()
+
+    model_dir = args.model_dir or _default_out_dir()
+    data_path = args.data or _default_data_path()
+    torch.manual_seed(args.seed)
+
+    model, preproc = load_torch_model(model_dir)
+    qmodel = quantize_dynamic_int8(model)
+    out_path = model_dir / "ctg_classifier_int8.pt"
+    torch.save(qmodel.state_dict(), out_path)
+
+    X_va, y_va = validation_split(data_path, args.val_size, args.seed)
+    seq = features_to_sequences(X_va, preproc)
+    # Reload the fp32 model: quantize_dynamic may share submodules with its input
+    fp32_model, _ = load_torch_model(model_dir)
+    fp32 = evaluate(fp32_model, seq, y_va)
+    int8 = evaluate(qmodel, seq, y_va)
+
+    metrics = {
+        "fp32": fp32,
+        "int8": int8,
+        "delta_accuracy": int8["accuracy"] - fp32["accuracy"],
+        "delta_f1_weighted": int8["f1_weighted"] - fp32["f1_weighted"],
+        "size_bytes": {
+            "fp32": (model_dir / "ctg_classifier.pt").stat().st_size,
+            "int8": out_path.stat().st_size,
+        },
+        "val_rows": int(len(y_va)),
+    }
+    (model_dir / "quantization_metrics.json").write_text(json.dumps(metrics, indent=2), encoding="utf-8")
+    print(
+        f"fp32 acc={fp32['accuracy']:.4f} f1={fp32['f1_weighted']:.4f} | "
+        f"int8 acc={int8['accuracy']:.4f} f1={int8['f1_weighted']:.4f} | "
+        f"delta acc={metrics['delta_accuracy']:+.4f} f1={metrics['delta_f1_weighted']:+.4f}",
+        flush=True,
+    )
+    print(f"latency batch=1: fp32 {fp32['latency_ms_batch1']:.2f} ms, int8 {int8['latency_ms_batch1']:.2f} ms", flush=True)
+    print(f"Saved {out_path}", flush=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,244 @@
+#!/usr/bin/env python3
+"""Offline CTG archive scoring: sliding windows over thousands of recordings, per-window results to Parquet.
+
+Usage (from obstetric-ai-system/):
+  python ml/score_ctg_archive.py ARCHIVE_DIR --out results/ \\
+      [--window-s 600] [--hop-s 300] [--workers 4] [--recordings-per-task 16]
+
+Inputs (searched recursively under ARCHIVE_DIR):
+- ``*.npy``: (T,) FHR, or (2, T) / (T, 2) FHR + UC, float32 or int16. Opened with ``mmap_mode="r"``.
+- ``*.f32`` / ``*.i16``: raw headerless samples. ``--channels 2`` means interleaved FHR, UC.
+  ``--int16-scale`` converts raw units to bpm. Opened with ``np.memmap``.
+- ``*.csv``: ``fhr[,uc]`` columns. Converted once to ``.npy`` under ``--cache-dir``, then mmapped.
+
+Windows are strided views of the mapped file (no copy of the recording), so only the windows of the
+current batch are materialized; a trailing partial window is dropped. Each task scores a group of
+recordings in one batch: repair (``signal_quality``), 21 features (``extract_features``), then one
+forward of the tabular model (or the FIGO rules when no weights are available). Windows under the quality threshold are written
+without a classification.
+
+Resume: every recording gets its own ``parts/<name>.parquet``, written atomically (tmp + rename).
+Existing parts are skipped, so rerunning after an interruption only scores the missing recordings.
+Read the whole result with ``pandas.read_parquet(OUT / "parts")``. Parquet needs pyarrow
+(ml/requirements.txt).
+"""
+from __future__ import annotations
+
+import argparse
+import hashlib
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+_ML_DIR = Path(__file__).resolve().parent
+_OBS_ROOT = _ML_DIR.parent
+_AGENT_SRC = _OBS_ROOT / "agents" / "ctg_monitor" / "src"
+sys.path.insert(0, str(_OBS_ROOT))
+from shared.ctg_model import figo_rules, signal_quality  # noqa: E402
+from shared.ctg_model.features import FEATURE_COLUMNS, SAMPLE_RATE_HZ, extract_features  # noqa: E402
+
+SUFFIXES = (".npy", ".f32", ".i16", ".csv")
+CLASSES = ("Normal", "Suspect", "Pathologique")
+
+_ML = None  # ml_ctg module in the worker when weights are available
+
+
+def find_recordings(root: Path) -> list[Path]:
+    return sorted(p for p in root.rglob("*") if p.suffix.lower() in SUFFIXES and p.is_file())
+
+
+def part_path(out_dir: Path, root: Path, recording: Path) -> Path:
+    rel = recording.relative_to(root).as_posix()
+    digest = hashlib.sha1(rel.encode()).hexdigest()[:8]
+    return out_dir / "parts" / f"{recording.stem}-{digest}.parquet"
+
+
+def csv_to_npy(path: Path, cache_dir: Path) -> Path:
+    """One-time conversion of a CSV recording to a (2, T) float32 ``.npy`` (reused on later runs)."""
+    target = cache_dir / (hashlib.sha1(str(path.resolve()).encode()).hexdigest()[:16] + ".npy")
+    if target.is_file() and target.stat().st_mtime >= path.stat().st_mtime:
+        return target
+    df = pd.read_csv(path)
+    cols = {c.lower(): c for c in df.columns}
+    fhr = df[cols.get("fhr", df.columns[0])].to_numpy(np.float32)
+    uc = df[cols["uc"]].to_numpy(np.float32) if "uc" in cols else np.full_like(fhr, np.nan)
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    tmp = target.with_suffix(".tmp.npy")
+    np.save(tmp, np.stack((fhr, uc)))
+    os.replace(tmp, target)
+    return target
+
+
+def open_recording(path: Path, channels: int, int16_scale: float, cache_dir: Path) -> tuple[np.ndarray, Optional[np.ndarray]]:
+    """Memory-mapped (FHR, UC) views of one recording; UC is None when absent."""
+    suffix = path.suffix.lower()
+    if suffix == ".csv":
+        path, suffix = csv_to_npy(path, cache_dir), ".npy"
+    if suffix == ".npy":
+        arr = np.load(path, mmap_mode="r")
+    else:
+        dtype = np.float32 if suffix == ".f32" else np.int16
+        arr = np.memmap(path, dtype=dtype, mode="r")
+        arr = arr.reshape(-1, channels) if channels > 1 else arr
+    if arr.ndim == 2 and arr.shape[0] > arr.shape[1]:
+        arr = arr.T  # (T, C) -> (C, T), still a view
+    fhr, uc = (arr, None) if arr.ndim == 1 else (arr[0], arr[1] if arr.shape[0] > 1 else None)
+    if fhr.dtype == np.int16 and int16_scale != 1.0:
+        fhr = _Scaled(fhr, int16_scale)
+        uc = None if uc is None else _Scaled(uc, int16_scale)
+    return fhr, uc
+
+
+class _Scaled:
+    """Lazy int16 -> float conversion: only the sliced windows are scaled."""
+
+    def __init__(self, raw: np.ndarray, scale: float):
+        self.raw, self.scale = raw, scale
+        self.shape = raw.shape
+
+    def windows(self, window: int, hop: int) -> np.ndarray:
+        return np.lib.stride_tricks.sliding_window_view(self.raw, window)[::hop] * self.scale
+
+
+def sliding_windows(x, window: int, hop: int) -> np.ndarray:
+    """(n_windows, window) strided view; a recording shorter than one window gives one padded window."""
+    if isinstance(x, _Scaled):
+        if x.shape[0] < window:
+            return np.pad(x.raw * x.scale, (0, window - x.shape[0]), constant_values=np.nan)[None]
+        return x.windows(window, hop)
+    if x.shape[0] < window:
+        return np.pad(np.asarray(x, dtype=np.float32), (0, window - x.shape[0]), constant_values=np.nan)[None]
+    return np.lib.stride_tricks.sliding_window_view(x, window)[::hop]
+
+
+def _init_worker(threads: int) -> None:
+    global _ML
+    os.environ.setdefault("OMP_NUM_THREADS", str(threads))
+    if str(_AGENT_SRC) not in sys.path:
+        sys.path.insert(0, str(_AGENT_SRC))
+    import ml_ctg
+
+    if ml_ctg.model_available():
+        try:
+            import torch
+
+            torch.set_num_threads(threads)
+        except ImportError:
+            pass
+        _ML = ml_ctg
+
+
+def _classify(features: np.ndarray, fhr: np.ndarray, uc: np.ndarray) -> tuple[np.ndarray, np.ndarray, str]:
+    if _ML is not None:
+        proba = _ML.predict_proba_batch(np.nan_to_num(features).tolist())
+        return proba.argmax(axis=1), proba.max(axis=1), _ML.model_version()
+    figo = figo_rules.assess(fhr, uc)
+    return figo.classification, figo.confidence, figo_rules.RULES_VERSION
+
+
+def score_task(
+    root: Path, recordings: list[Path], out_dir: Path, args: argparse.Namespace
+) -> tuple[int, int]:
+    """Score a group of recordings in one batch; returns (recordings written, windows scored)."""
+    window = int(args.window_s * SAMPLE_RATE_HZ)
+    hop = int(args.hop_s * SAMPLE_RATE_HZ)
+    fhr_parts, uc_parts, spans = [], [], []
+    for rec in recordings:
+        fhr, uc = open_recording(rec, args.channels, args.int16_scale, args.cache_dir)
+        w_fhr = sliding_windows(fhr, window, hop)
+        w_uc = sliding_windows(uc, window, hop) if uc is not None else np.full(w_fhr.shape, np.nan, np.float32)
+        fhr_parts.append(w_fhr)
+        uc_parts.append(w_uc)
+        spans.append((rec, w_fhr.shape[0]))
+    fhr_w = np.concatenate(fhr_parts).astype(np.float64)
+    uc_w = np.concatenate(uc_parts).astype(np.float64)
+
+    cleaned = signal_quality.clean_fhr(fhr_w)
+    ratio = cleaned.ratio
+    ok = ratio >= args.min_quality
+    features = extract_features(cleaned.fhr, uc_w)
+    cls = np.full(len(fhr_w), -1)
+    conf = np.full(len(fhr_w), np.nan)
+    version = ""
+    for lo in range(0, int(ok.sum()), args.batch_windows):
+        idx = np.flatnonzero(ok)[lo : lo + args.batch_windows]
+        c, p, version = _classify(features[idx], cleaned.fhr[idx], uc_w[idx])
+        cls[idx], conf[idx] = c, p
+
+    start = 0
+    for rec, n in spans:
+        sl = slice(start, start + n)
+        start += n
+        df = pd.DataFrame(
+            {
+                "recording": rec.relative_to(root).as_posix(),
+                "window_index": np.arange(n, dtype=np.int32),
+                "start_s": np.arange(n, dtype=np.float64) * args.hop_s,
+                "end_s": np.arange(n, dtype=np.float64) * args.hop_s + args.window_s,
+                "signal_quality": ratio[sl].astype(np.float32),
+                "class_index": cls[sl].astype(np.int8),
+                "classification": [CLASSES[c] if c >= 0 else None for c in cls[sl]],
+                "confidence": conf[sl].astype(np.float32),
+                "model_version": version or None,
+            }
+        )
+        if args.with_features:
+            for j, name in enumerate(FEATURE_COLUMNS):
+                df[name] = features[sl, j].astype(np.float32)
+        target = part_path(out_dir, root, rec)
+        tmp = target.with_name(target.name + ".tmp")
+        df.to_parquet(tmp, index=False)
+        os.replace(tmp, target)
+    return len(spans), len(fhr_w)
+
+
+def main() -> None:
+    p = argparse.ArgumentParser(description="Score a CTG recording archive window by window (Parquet output)")
+    p.add_argument("archive", type=Path, help="Directory of recordings (.npy, .f32, .i16, .csv)")
+    p.add_argument("--out", type=Path, required=True, help="Output directory (parts/*.parquet)")
+    p.add_argument("--window-s", type=float, default=600.0)
+    p.add_argument("--hop-s", type=float, default=300.0)
+    p.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    p.add_argument("--threads-per-worker", type=int, default=1)
+    p.add_argument("--recordings-per-task", type=int, default=16, help="Recordings scored together in one batch")
+    p.add_argument("--batch-windows", type=int, default=4096, help="Max windows per forward pass")
+    p.add_argument("--channels", type=int, default=1, choices=(1, 2), help="Raw .f32/.i16: 2 = interleaved FHR, UC")
+    p.add_argument("--int16-scale", type=float, default=1.0, help="Raw int16 units -> bpm (e.g. 0.25)")
+    p.add_argument("--min-quality", type=float, default=signal_quality.DEFAULT_MIN_QUALITY)
+    p.add_argument("--with-features", action="store_true", help="Also write the 21 features per window")
+    p.add_argument("--cache-dir", type=Path, default=None, help="CSV -> .npy cache (default OUT/npy_cache)")
+    args = p.parse_args()
+    args.cache_dir = args.cache_dir or args.out / "npy_cache"
+    (args.out / "parts").mkdir(parents=True, exist_ok=True)
+
+    recordings = find_recordings(args.archive)
+    todo = [r for r in recordings if not part_path(args.out, args.archive, r).is_file()]
+    print(f"{len(recordings)} recordings, {len(recordings) - len(todo)} already scored, {len(todo)} to go")
+    tasks = [todo[i : i + args.recordings_per_task] for i in range(0, len(todo), args.recordings_per_task)]
+    t0 = time.perf_counter()
+    done = windows = 0
+    with ProcessPoolExecutor(
+        max_workers=max(1, args.workers), initializer=_init_worker, initargs=(args.threads_per_worker,)
+    ) as pool:
+        futures = [pool.submit(score_task, args.archive, group, args.out, args) for group in tasks]
+        for fut in as_completed(futures):
+            n_rec, n_win = fut.result()
+            done += n_rec
+            windows += n_win
+            elapsed = time.perf_counter() - t0
+            print(f"  {done}/{len(todo)} recordings, {windows} windows, {done / elapsed:.1f} recordings/s", flush=True)
+    elapsed = max(time.perf_counter() - t0, 1e-9)
+    print(
+        f"scored {done} recordings ({windows} windows) in {elapsed:.1f}s: "
+        f"{done / elapsed:.1f} recordings/s, {windows / elapsed:.0f} windows/s"
+    )
+
+
+if __name__ == "__main__":
+    main()
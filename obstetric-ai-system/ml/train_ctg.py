@@ -7,6 +7,7 @@ Improvements over the baseline script:
 - Class-weighted cross-entropy for imbalanced Normal / Suspect / Pathological.
 - Mini-batch training with AdamW, optional LR scheduling, early stopping.
 - Persists weights + preprocessor JSON for the ctg_monitor agent.
+- ``--input-mode native`` feeds the 21 features as 21 timesteps instead of tiling them to 240.
 """
 from __future__ import annotations
 
@@ -28,7 +29,9 @@ from sklearn.preprocessing import StandardScaler
 _ML_DIR = Path(__file__).resolve().parent
 _OBS_ROOT = _ML_DIR.parent
 sys.path.insert(0, str(_OBS_ROOT))
-from shared.ctg_model.classifier import build_ctg_classifier, INPUT_LEN  # noqa: E402
+from shared.ctg_model.classifier import build_ctg_classifier  # noqa: E402
+from shared.ctg_model.constants import DEFAULT_INPUT_MODE, INPUT_MODES  # noqa: E402
+from shared.ctg_model.preprocessing import rows_to_sequences, sequence_length  # noqa: E402
 
 
 def _repo_root() -> Path:
@@ -58,17 +61,6 @@ def load_csv(path: Path) -> tuple[pd.DataFrame, np.ndarray, list[str]]:
     return X, y, feat_cols
 
 
-def rows_to_sequences(X: np.ndarray, input_len: int = INPUT_LEN) -> np.ndarray:
-    """Repeat each feature row along time to match the 1D-CNN+LSTM input (B, 1, T)."""
-    n, n_feat = X.shape
-    out = np.zeros((n, 1, input_len), dtype=np.float32)
-    for i in range(n):
-        row = X[i]
-        for t in range(input_len):
-            out[i, 0, t] = row[t % n_feat]
-    return out
-
-
 def set_seed(seed: int) -> None:
     random.seed(seed)
     np.random.seed(seed)
@@ -88,6 +80,12 @@ def main() -> None:
     p.add_argument("--val-size", type=float, default=0.2)
     p.add_argument("--patience", type=int, default=25, help="Early stopping patience (epochs)")
     p.add_argument("--seed", type=int, default=42)
+    p.add_argument(
+        "--input-mode",
+        choices=INPUT_MODES,
+        default=DEFAULT_INPUT_MODE,
+        help="tiled: features repeated to 240 steps (legacy); native: one step per feature",
+    )
     p.add_argument("--mlflow-uri", default="")
     args = p.parse_args()
 
@@ -120,8 +118,9 @@ def main() -> None:
     X_tr_s = scaler.fit_transform(X_tr).astype(np.float32)
     X_va_s = scaler.transform(X_va).astype(np.float32)
 
-    seq_tr = rows_to_sequences(X_tr_s)
-    seq_va = rows_to_sequences(X_va_s)
+    input_len = sequence_length(args.input_mode, X_tr_s.shape[1])
+    seq_tr = rows_to_sequences(X_tr_s, input_len)
+    seq_va = rows_to_sequences(X_va_s, input_len)
 
     device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
     X_tr_t = torch.from_numpy(seq_tr).to(device)
@@ -129,7 +128,7 @@ def main() -> None:
     X_va_t = torch.from_numpy(seq_va).to(device)
     y_va_t = torch.from_numpy(y_va.astype(np.int64)).to(device)
 
-    model = build_ctg_classifier().to(device)
+    model = build_ctg_classifier(input_len=input_len).to(device)
 
     counts = np.bincount(y_tr, minlength=3)
     class_weights = (len(y_tr) / (3 * np.maximum(counts, 1))).astype(np.float32)
@@ -202,7 +201,8 @@ def main() -> None:
         "scaler_mean": scaler.mean_.astype(float).tolist(),
         "scaler_scale": scaler.scale_.astype(float).tolist(),
         "num_classes": 3,
-        "input_len": INPUT_LEN,
+        "input_len": input_len,
+        "input_mode": args.input_mode,
         "class_names": ["Normal", "Suspect", "Pathologique"],
         "train_rows": int(len(y_tr)),
         "val_rows": int(len(y_va)),
@@ -215,6 +215,7 @@ def main() -> None:
         "val_f1_weighted": float(f1w),
         "best_val_loss": float(best_val),
         "epochs_ran": int(epoch + 1),
+        "input_mode": args.input_mode,
     }
     metrics_path.write_text(json.dumps(metrics, indent=2), encoding="utf-8")
     print(f"Saved {weights_path}", flush=True)
@@ -231,6 +232,7 @@ def main() -> None:
                     "lr": args.lr,
                     "weight_decay": args.weight_decay,
                     "seed": args.seed,
+                    "input_mode": args.input_mode,
                 }
             )
             mlflow.log_metrics({"val_accuracy": acc, "val_f1_weighted": f1w, "best_val_loss": best_val})
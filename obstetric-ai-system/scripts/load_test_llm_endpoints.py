@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+"""
+Charge concurrente sur un endpoint LLM (ctg-monitor) : combien de requêtes simultanées un seul worker tient.
+
+Par défaut, en processus (httpx.ASGITransport, un worker, pool anyio de 40 threads), le fournisseur LLM
+est remplacé par un faux client de latence fixe (--llm-latency-ms) ; aucune clé ni réseau nécessaires.
+Deux chemins sont mesurés sur la même app :
+  sync  : handler ``def`` comme avant (CPU + appel LLM bloquant dans un thread du pool, /health en ``def``)
+  async : POST /api/ctg-monitor actuel (``async def``, CPU via run_in_threadpool, client LLM async)
+Pour chaque niveau, N requêtes partent ensemble pendant qu'une sonde interroge /health toutes les 50 ms.
+« Tenu » : p95 <= --slo-factor x latence LLM.
+
+Usage (depuis obstetric-ai-system/) :
+  python scripts/load_test_llm_endpoints.py [--levels 10,40,80,160,320] [--llm-latency-ms 500]
+  python scripts/load_test_llm_endpoints.py --url http://localhost:8000   # agent déployé, chemin courant seul
+"""
+# Pas de « from __future__ import annotations » : FastAPI doit résoudre ctg_main.CTGInput sur la route « avant »
+import argparse
+import asyncio
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+from types import SimpleNamespace
+
+import httpx
+
+_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(_ROOT))
+
+PAYLOAD = {"baseline_bpm": 140, "stv_ms": 8.0, "decelerations_light": 1}
+
+
+class _FakeMessages:
+    def __init__(self, latency_s: float, asynchronous: bool):
+        self.latency_s, self.asynchronous = latency_s, asynchronous
+
+    def create(self, **kwargs):
+        reply = SimpleNamespace(content=[SimpleNamespace(type="text", text="Narratif simulé (test de charge).")])
+        if not self.asynchronous:
+            time.sleep(self.latency_s)
+            return reply
+
+        async def later():
+            await asyncio.sleep(self.latency_s)
+            return reply
+
+        return later()
+
+
+def _in_process_app(llm_latency_s: float):
+    """App ctg-monitor avec faux fournisseur LLM, caches coupés, audit en répertoire temporaire, routes « avant »."""
+    from agents.ctg_monitor.src import main as ctg_main
+
+    ctg_main.get_client = lambda *a, **k: SimpleNamespace(messages=_FakeMessages(llm_latency_s, False))
+    ctg_main.get_async_client = lambda *a, **k: SimpleNamespace(messages=_FakeMessages(llm_latency_s, True))
+    ctg_main._result_cache = None
+    ctg_main._narrative_cache = None
+    ctg_main.audit.storage_path = tempfile.mkdtemp(prefix="ctg-load-audit-")
+
+    def ctg_monitor_sync(input_data: ctg_main.CTGInput) -> ctg_main.CTGOutput:
+        start = time.perf_counter()
+        quality_ratio, (ml_class, confidence, model_ver, key, _) = ctg_main._classify_one(input_data)
+        text, _ = ctg_main._narrative(input_data, ml_class, confidence, key)
+        latency_ms = int((time.perf_counter() - start) * 1000)
+        return ctg_main._build_output(input_data, ml_class, confidence, model_ver, text, latency_ms, None, quality_ratio)
+
+    def health_sync() -> dict:
+        return {"status": "ok"}
+
+    ctg_main.app.add_api_route("/_load/ctg-monitor-sync", ctg_monitor_sync, methods=["POST"])
+    ctg_main.app.add_api_route("/_load/health-sync", health_sync, methods=["GET"])
+    return ctg_main.app
+
+
+def _pct(values: list[float], q: float) -> float:
+    if not values:
+        return float("nan")
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+async def _burst(client: httpx.AsyncClient, post_path: str, health_path: str, n: int) -> dict:
+    latencies: list[float] = []
+    health: list[float] = []
+    errors = 0
+    done = asyncio.Event()
+
+    async def one() -> None:
+        nonlocal errors
+        t0 = time.perf_counter()
+        r = await client.post(post_path, json=PAYLOAD)
+        latencies.append(time.perf_counter() - t0)
+        errors += r.status_code != 200
+
+    async def probe() -> None:
+        while not done.is_set():
+            t0 = time.perf_counter()
+            await client.get(health_path)
+            health.append(time.perf_counter() - t0)
+            await asyncio.sleep(0.05)
+
+    prober = asyncio.create_task(probe())
+    t0 = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(n)))
+    wall = time.perf_counter() - t0
+    done.set()
+    await prober
+    return {
+        "n": n,
+        "rps": n / wall,
+        "p50": statistics.median(latencies),
+        "p95": _pct(latencies, 0.95),
+        "health_p95": _pct(health, 0.95),
+        "errors": errors,
+    }
+
+
+async def _run(args: argparse.Namespace) -> None:
+    levels = [int(x) for x in args.levels.split(",") if x.strip()]
+    limits = httpx.Limits(max_connections=max(levels) + 8)
+    if args.url:
+        client = httpx.AsyncClient(base_url=args.url, limits=limits, timeout=args.timeout)
+        modes = {"current": ("/api/ctg-monitor", "/health")}
+    else:
+        transport = httpx.ASGITransport(app=_in_process_app(args.llm_latency_ms / 1000))
+        client = httpx.AsyncClient(transport=transport, base_url="http://load", limits=limits, timeout=args.timeout)
+        modes = {
+            "sync": ("/_load/ctg-monitor-sync", "/_load/health-sync"),
+            "async": ("/api/ctg-monitor", "/health"),
+        }
+    slo_s = args.slo_factor * args.llm_latency_ms / 1000
+    async with client:
+        await client.post(next(iter(modes.values()))[0], json=PAYLOAD)  # imports / premier forward hors mesure
+        for mode, (post_path, health_path) in modes.items():
+            print(f"\n[{mode}] {post_path}  (LLM {args.llm_latency_ms:.0f} ms, SLO p95 <= {slo_s * 1000:.0f} ms)")
+            print(f"{'concurrent':>10} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'health p95':>11} {'errors':>7}")
+            sustained = 0
+            for n in levels:
+                r = await _burst(client, post_path, health_path, n)
+                print(
+                    f"{r['n']:>10} {r['rps']:>8.1f} {r['p50'] * 1000:>8.0f} {r['p95'] * 1000:>8.0f} "
+                    f"{r['health_p95'] * 1000:>11.1f} {r['errors']:>7}"
+                )
+                if r["p95"] <= slo_s and not r["errors"]:
+                    sustained = n
+            print(f"[{mode}] concurrency sustained within SLO: {sustained}")
+
+
+def main() -> None:
+    p = argparse.ArgumentParser(description="Concurrent load test of the CTG LLM endpoint (sync vs async path)")
+    p.add_argument("--levels", default="10,40,80,160,320", help="Concurrent requests per burst")
+    p.add_argument("--llm-latency-ms", type=float, default=500.0, help="Simulated provider latency (in-process)")
+    p.add_argument("--slo-factor", type=float, default=1.5, help="Sustained if p95 <= factor x LLM latency")
+    p.add_argument("--timeout", type=float, default=120.0)
+    p.add_argument("--url", default=None, help="Hit a running agent instead of the in-process app")
+    asyncio.run(_run(p.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -4,6 +4,7 @@ Audit trail with SHA-256 hash chain (tamper-evident).
 import hashlib
 import json
 import os
+import threading
 from datetime import datetime, timezone
 from typing import Any, Optional
 
@@ -11,6 +12,8 @@ class AuditLogger:
     def __init__(self, storage_path: Optional[str] = None):
         self.storage_path = storage_path or os.getenv("AUDIT_STORAGE_PATH", "/tmp/audit")
         self._last_hash: Optional[str] = None
+        # Écritures concurrentes (threads de requêtes, tâches de fond) : un seul maillon à la fois
+        self._lock = threading.Lock()
 
     def _sha256(self, data: str) -> str:
         return hashlib.sha256(data.encode()).hexdigest()
@@ -28,6 +31,24 @@ class AuditLogger:
         confidence: Optional[float] = None,
         human_decision: Optional[str] = None,
         latency_ms: Optional[int] = None,
+        extra: Optional[dict[str, Any]] = None,
+    ) -> dict:
+        with self._lock:
+            return self._append(
+                agent_id, action, input_hash, output_hash, model_version, confidence, human_decision, latency_ms, extra
+            )
+
+    def _append(
+        self,
+        agent_id: str,
+        action: str,
+        input_hash: str,
+        output_hash: str,
+        model_version: Optional[str],
+        confidence: Optional[float],
+        human_decision: Optional[str],
+        latency_ms: Optional[int],
+        extra: Optional[dict[str, Any]],
     ) -> dict:
         entry = {
             "timestamp": datetime.now(timezone.utc).isoformat(),
@@ -41,6 +62,9 @@ class AuditLogger:
             "latency_ms": latency_ms,
             "previous_hash": self._last_hash,
         }
+        if extra:
+            # Champs additionnels (ex. cache) : inclus dans le hash chaîné
+            entry.update({k: v for k, v in extra.items() if k not in entry})
         payload = json.dumps(entry, sort_keys=True)
         current_hash = self._sha256(payload)
         entry["hash"] = current_hash
@@ -1,15 +1,39 @@
-from .classifier import (
-    CTGClassifier,
-    INPUT_CHANNELS,
-    INPUT_LEN,
-    NUM_CLASSES,
-    build_ctg_classifier,
-)
+from .constants import DEFAULT_INPUT_MODE, INPUT_CHANNELS, INPUT_LEN, INPUT_MODES, NUM_CLASSES
+from .features import FEATURE_COLUMNS, RollingFeatureExtractor, extract_features
+from .preprocessing import features_to_sequences, rows_to_sequences, sequence_length, standardize
+
+# torch-backed names are imported lazily so the ONNX serving path never imports torch
+_TORCH_EXPORTS = {
+    "CTGClassifier": "classifier",
+    "build_ctg_classifier": "classifier",
+    "StreamingCTGClassifier": "streaming",
+    "StreamState": "streaming",
+}
+
+
+def __getattr__(name: str):
+    if name in _TORCH_EXPORTS:
+        import importlib
+
+        return getattr(importlib.import_module(f".{_TORCH_EXPORTS[name]}", __name__), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
 
 __all__ = [
     "CTGClassifier",
+    "DEFAULT_INPUT_MODE",
+    "FEATURE_COLUMNS",
     "INPUT_CHANNELS",
     "INPUT_LEN",
+    "INPUT_MODES",
     "NUM_CLASSES",
+    "RollingFeatureExtractor",
+    "StreamState",
+    "StreamingCTGClassifier",
     "build_ctg_classifier",
+    "extract_features",
+    "features_to_sequences",
+    "rows_to_sequences",
+    "sequence_length",
+    "standardize",
 ]
@@ -5,10 +5,7 @@ Shared by training (fetal_health.csv) and ctg_monitor inference.
 import torch
 import torch.nn as nn
 
-# Default: 60s at 4Hz = 240 timesteps, 1 channel (FHR-like sequence)
-INPUT_LEN = 240
-INPUT_CHANNELS = 1
-NUM_CLASSES = 3
+from .constants import INPUT_CHANNELS, INPUT_LEN, NUM_CLASSES
 
 
 class CTGClassifier(nn.Module):
@@ -0,0 +1,12 @@
+"""Model geometry constants, importable without torch (ONNX serving path)."""
+
+# Default: 60s at 4Hz = 240 timesteps, 1 channel (FHR-like sequence)
+INPUT_LEN = 240
+INPUT_CHANNELS = 1
+NUM_CLASSES = 3
+
+# How the 21 tabular features become a sequence:
+# - "tiled": repeated cyclically up to INPUT_LEN steps (original checkpoints)
+# - "native": one timestep per feature (T = 21), ~11x fewer conv/LSTM steps, attention O(21²)
+INPUT_MODES = ("tiled", "native")
+DEFAULT_INPUT_MODE = "tiled"
@@ -0,0 +1,358 @@
+"""
+The 21 UCI / SisPorto CTG features (``fetal_health.csv`` order) computed from raw FHR/UC traces.
+
+- ``extract_features``: batched, fully vectorized over (B, T) arrays sampled at 4 Hz.
+- ``RollingFeatureExtractor``: one stream; each update only adds/evicts the new and expired seconds
+  in the FHR histogram, running moments and STV sums. Events and LTV are recomputed on the 1 Hz
+  window, which is a few hundred values.
+
+Signals are averaged to 1 Hz first. FHR <= 0 or NaN means signal loss and is ignored. Definitions
+follow SisPorto where they are public. The thresholds below are documented approximations:
+- events: accelerations/decelerations are >= 15 bpm away from baseline for >= 15 s; a deceleration
+  is prolonged at >= 120 s and severe at >= 45 bpm depth
+- STV: mean |delta| between consecutive seconds; abnormal below 1 bpm
+- LTV: max-min range per minute; abnormal below 5 bpm
+- histogram: 1 bpm bins over 50-210 bpm; peaks and zeroes are counted on the 5-bin smoothed histogram
+- tendency: sign(mean - median) with a 1 bpm dead band
+- event rates are per second, as in the dataset
+- fetal_movement is 0: monitors do not stream movement markers
+"""
+from __future__ import annotations
+
+from typing import Optional
+
+import numpy as np
+
+SAMPLE_RATE_HZ = 4
+FEATURE_COLUMNS = (
+    "baseline value",
+    "accelerations",
+    "fetal_movement",
+    "uterine_contractions",
+    "light_decelerations",
+    "severe_decelerations",
+    "prolongued_decelerations",
+    "abnormal_short_term_variability",
+    "mean_value_of_short_term_variability",
+    "percentage_of_time_with_abnormal_long_term_variability",
+    "mean_value_of_long_term_variability",
+    "histogram_width",
+    "histogram_min",
+    "histogram_max",
+    "histogram_number_of_peaks",
+    "histogram_number_of_zeroes",
+    "histogram_mode",
+    "histogram_mean",
+    "histogram_median",
+    "histogram_variance",
+    "histogram_tendency",
+)
+
+HIST_MIN_BPM = 50
+HIST_MAX_BPM = 210
+HIST_BINS = HIST_MAX_BPM - HIST_MIN_BPM + 1
+HIST_SMOOTH_BINS = 5
+PEAK_MIN_FRACTION = 0.05
+
+EVENT_DELTA_BPM = 15.0
+EVENT_MIN_S = 15
+ACCEL_MAX_S = 600
+PROLONGED_DECEL_S = 120
+SEVERE_DECEL_DEPTH_BPM = 45.0
+STV_ABNORMAL_BPM = 1.0
+LTV_ABNORMAL_BPM = 5.0
+BASELINE_BAND_BPM = 15
+UC_CONTRACTION_DELTA = 15.0
+UC_CONTRACTION_MIN_S = 30
+
+
+def to_seconds(x: np.ndarray, sample_rate_hz: int = SAMPLE_RATE_HZ, invalid_le: Optional[float] = 0.0) -> np.ndarray:
+    """(B, T) samples -> (B, T // rate) per-second means of valid samples (NaN when none)."""
+    x = np.asarray(x, dtype=np.float64)
+    n_sec = x.shape[-1] // sample_rate_hz
+    blocks = x[..., : n_sec * sample_rate_hz].reshape(*x.shape[:-1], n_sec, sample_rate_hz)
+    valid = np.isfinite(blocks)
+    if invalid_le is not None:
+        valid &= blocks > invalid_le
+    cnt = valid.sum(axis=-1)
+    total = np.where(valid, blocks, 0.0).sum(axis=-1)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where(cnt > 0, total / np.maximum(cnt, 1), np.nan)
+
+
+def _bins(sec: np.ndarray) -> np.ndarray:
+    return (np.clip(np.rint(sec), HIST_MIN_BPM, HIST_MAX_BPM) - HIST_MIN_BPM).astype(np.int64)
+
+
+def histogram_counts(sec: np.ndarray) -> np.ndarray:
+    """(B, S) 1 Hz FHR -> (B, HIST_BINS) counts of rounded bpm values (NaN skipped)."""
+    sec = np.atleast_2d(sec)
+    rows, cols = np.nonzero(np.isfinite(sec))
+    flat = rows * HIST_BINS + _bins(sec[rows, cols])
+    return np.bincount(flat, minlength=sec.shape[0] * HIST_BINS).reshape(sec.shape[0], HIST_BINS)
+
+
+def _histogram_features(counts: np.ndarray, n: np.ndarray, s: np.ndarray, s2: np.ndarray) -> np.ndarray:
+    """
+    (B, K) counts + running moments (count, sum, sum of squares of unrounded values) -> (B, 11):
+    baseline, width, min, max, peaks, zeroes, mode, mean, median, variance, tendency.
+    """
+    b, k = counts.shape
+    centers = np.arange(HIST_MIN_BPM, HIST_MAX_BPM + 1, dtype=np.float64)
+    present = counts > 0
+    empty = ~present.any(axis=1)
+    lo = present.argmax(axis=1)
+    hi = k - 1 - present[:, ::-1].argmax(axis=1)
+    total = counts.sum(axis=1)
+    median_idx = (2 * np.cumsum(counts, axis=1) >= total[:, None]).argmax(axis=1)
+    mode_idx = counts.argmax(axis=1)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mean = s / n
+        variance = np.maximum(s2 / n - mean * mean, 0.0)
+
+    pad = HIST_SMOOTH_BINS // 2
+    padded = np.pad(counts.astype(np.float64), ((0, 0), (pad, pad)))
+    smooth = sum(padded[:, i : i + k] for i in range(HIST_SMOOTH_BINS)) / HIST_SMOOTH_BINS
+    mid = smooth[:, 1:-1]
+    is_peak = (mid > smooth[:, :-2]) & (mid >= smooth[:, 2:]) & (mid >= PEAK_MIN_FRACTION * smooth.max(axis=1, keepdims=True))
+    idx = np.arange(k)
+    in_range = (idx >= lo[:, None]) & (idx <= hi[:, None])
+    zeroes = ((smooth == 0) & in_range).sum(axis=1)
+
+    near = np.abs(idx[None, :] - median_idx[:, None]) <= BASELINE_BAND_BPM
+    band = np.where(near, counts, 0)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        baseline = np.rint((band * centers).sum(axis=1) / band.sum(axis=1))
+
+    median = centers[median_idx]
+    tendency = np.where(mean - median > 1.0, 1.0, np.where(mean - median < -1.0, -1.0, 0.0))
+    out = np.stack(
+        [
+            baseline,
+            (hi - lo).astype(np.float64),
+            centers[lo],
+            centers[hi],
+            is_peak.sum(axis=1).astype(np.float64),
+            zeroes.astype(np.float64),
+            centers[mode_idx],
+            mean,
+            median,
+            variance,
+            tendency,
+        ],
+        axis=1,
+    )
+    out[empty] = np.nan
+    return out
+
+
+def _runs(mask: np.ndarray) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Run-length encoding of True runs in each row of a (B, S) mask -> (row, start, end) per run."""
+    b, s = mask.shape
+    padded = np.zeros((b, s + 2), dtype=np.int8)
+    padded[:, 1:-1] = mask
+    edges = np.diff(padded, axis=1)
+    rows, starts = np.nonzero(edges == 1)
+    _, ends = np.nonzero(edges == -1)
+    return rows, starts, ends
+
+
+def _event_rates(sec: np.ndarray, baseline: np.ndarray) -> np.ndarray:
+    """(B, S) 1 Hz FHR + (B,) baseline -> (B, 4) per-second rates: accel, light, severe, prolonged decel."""
+    b, s = sec.shape
+    base = baseline[:, None]
+    out = np.zeros((b, 4))
+    duration = np.maximum(np.isfinite(sec).sum(axis=1), 1).astype(np.float64)
+    if s == 0:
+        return out
+    with np.errstate(invalid="ignore"):
+        above = sec >= base + EVENT_DELTA_BPM
+        below = sec <= base - EVENT_DELTA_BPM
+    rows, starts, ends = _runs(above)
+    dur = ends - starts
+    keep = (dur >= EVENT_MIN_S) & (dur < ACCEL_MAX_S)
+    out[:, 0] = np.bincount(rows[keep], minlength=b)
+
+    rows, starts, ends = _runs(below)
+    dur = ends - starts
+    if rows.size:
+        nadir_src = np.where(below, sec, np.inf).ravel()
+        nadir = np.minimum.reduceat(nadir_src, rows * s + starts)
+        depth = baseline[rows] - nadir
+        valid = dur >= EVENT_MIN_S
+        prolonged = valid & (dur >= PROLONGED_DECEL_S)
+        severe = valid & ~prolonged & (depth >= SEVERE_DECEL_DEPTH_BPM)
+        light = valid & ~prolonged & ~severe
+        out[:, 1] = np.bincount(rows[light], minlength=b)
+        out[:, 2] = np.bincount(rows[severe], minlength=b)
+        out[:, 3] = np.bincount(rows[prolonged], minlength=b)
+    return out / duration[:, None]
+
+
+def _ltv(sec: np.ndarray) -> np.ndarray:
+    """(B, S) -> (B, 2): % of minutes with range < 5 bpm, mean per-minute range (whole window if < 1 min)."""
+    b, s = sec.shape
+    minutes = max(s // 60, 1)
+    width = s // minutes if s >= 60 else s
+    if width == 0:
+        return np.full((b, 2), np.nan)
+    seg = sec[:, : minutes * width].reshape(b, minutes, width)
+    rng = np.fmax.reduce(seg, axis=2) - np.fmin.reduce(seg, axis=2)
+    ok = np.isfinite(rng)
+    n_ok = ok.sum(axis=1)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        abnormal = 100.0 * ((rng < LTV_ABNORMAL_BPM) & ok).sum(axis=1) / n_ok
+        mean = np.where(ok, rng, 0.0).sum(axis=1) / n_ok
+    return np.stack([abnormal, mean], axis=1)
+
+
+def _stv_sums(sec: np.ndarray) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """(B, S) -> per-row (sum |delta|, number of deltas, number of deltas < 1 bpm)."""
+    d = np.abs(np.diff(sec, axis=1))
+    ok = np.isfinite(d)
+    return np.where(ok, d, 0.0).sum(axis=1), ok.sum(axis=1), ((d < STV_ABNORMAL_BPM) & ok).sum(axis=1)
+
+
+def _contraction_rate(uc_sec: Optional[np.ndarray], b: int, duration: np.ndarray) -> np.ndarray:
+    if uc_sec is None or uc_sec.size == 0:
+        return np.zeros(b)
+    finite = np.isfinite(uc_sec)
+    has_uc = finite.any(axis=1)
+    tone = np.nanpercentile(np.where(has_uc[:, None], uc_sec, 0.0), 10, axis=1)
+    tone[~has_uc] = np.nan
+    with np.errstate(invalid="ignore"):
+        mask = uc_sec >= tone[:, None] + UC_CONTRACTION_DELTA
+    rows, starts, ends = _runs(mask)
+    keep = (ends - starts) >= UC_CONTRACTION_MIN_S
+    return np.bincount(rows[keep], minlength=b) / duration
+
+
+def _assemble(
+    sec: np.ndarray,
+    uc_sec: Optional[np.ndarray],
+    counts: np.ndarray,
+    moments: tuple[np.ndarray, np.ndarray, np.ndarray],
+    stv: tuple[np.ndarray, np.ndarray, np.ndarray],
+) -> np.ndarray:
+    b = sec.shape[0]
+    hist = _histogram_features(counts, *moments)
+    baseline = hist[:, 0]
+    events = _event_rates(sec, np.nan_to_num(baseline))
+    duration = np.maximum(np.isfinite(sec).sum(axis=1), 1).astype(np.float64)
+    stv_sum, stv_n, stv_abn = stv
+    with np.errstate(invalid="ignore", divide="ignore"):
+        stv_feats = np.stack([100.0 * stv_abn / stv_n, stv_sum / stv_n], axis=1)
+    out = np.empty((b, len(FEATURE_COLUMNS)))
+    out[:, 0] = baseline
+    out[:, 1] = events[:, 0]
+    out[:, 2] = 0.0
+    out[:, 3] = _contraction_rate(uc_sec, b, duration)
+    out[:, 4:7] = events[:, 1:4]
+    out[:, 7:9] = stv_feats
+    out[:, 9:11] = _ltv(sec)
+    out[:, 11:21] = hist[:, 1:]
+    return out
+
+
+def extract_features(
+    fhr: np.ndarray,
+    uc: Optional[np.ndarray] = None,
+    sample_rate_hz: int = SAMPLE_RATE_HZ,
+) -> np.ndarray:
+    """
+    Raw FHR (bpm) [+ UC] sampled at ``sample_rate_hz`` -> the 21 features in ``FEATURE_COLUMNS`` order.
+    Accepts (T,) -> (21,) or (B, T) -> (B, 21). Rows with no valid FHR give NaN features.
+    """
+    fhr = np.asarray(fhr, dtype=np.float64)
+    single = fhr.ndim == 1
+    fhr2 = np.atleast_2d(fhr)
+    sec = to_seconds(fhr2, sample_rate_hz)
+    uc_sec = to_seconds(np.atleast_2d(np.asarray(uc, dtype=np.float64)), sample_rate_hz, None) if uc is not None else None
+    finite = np.isfinite(sec)
+    vals = np.where(finite, sec, 0.0)
+    moments = (finite.sum(axis=1).astype(np.float64), vals.sum(axis=1), (vals * vals).sum(axis=1))
+    out = _assemble(sec, uc_sec, histogram_counts(sec), moments, _stv_sums(sec))
+    return out[0] if single else out
+
+
+class RollingFeatureExtractor:
+    """
+    Features over the last ``window_s`` seconds of one stream, updated incrementally.
+
+    ``update`` ingests any number of raw samples (partial seconds are carried over). Histogram counts,
+    moments and STV sums are adjusted only for the seconds entering and leaving the window, block-
+    vectorized. ``features()`` matches ``extract_features`` on the same window.
+    """
+
+    def __init__(self, window_s: int, sample_rate_hz: int = SAMPLE_RATE_HZ):
+        self.window_s = int(window_s)
+        self.sample_rate_hz = sample_rate_hz
+        self._fhr = np.full(self.window_s, np.nan)
+        self._uc = np.full(self.window_s, np.nan)
+        self._pos = 0
+        self._filled = 0
+        self._carry = np.empty((2, 0))
+        self._counts = np.zeros(HIST_BINS, dtype=np.int64)
+        self._moments = np.zeros(3)
+        self._stv = np.zeros(3)
+        self._last = np.nan
+
+    def reset(self) -> None:
+        self.__init__(self.window_s, self.sample_rate_hz)
+
+    def _ordered(self, ring: np.ndarray) -> np.ndarray:
+        start = (self._pos - self._filled) % self.window_s
+        return np.take(ring, (start + np.arange(self._filled)) % self.window_s)
+
+    def _add_stats(self, values: np.ndarray, sign: int) -> None:
+        ok = values[np.isfinite(values)]
+        if ok.size:
+            self._counts += sign * np.bincount(_bins(ok), minlength=HIST_BINS)
+            self._moments += sign * np.array([ok.size, ok.sum(), (ok * ok).sum()])
+
+    def _add_stv(self, chain: np.ndarray, sign: int) -> None:
+        d = np.abs(np.diff(chain))
+        ok = np.isfinite(d)
+        self._stv += sign * np.array([d[ok].sum(), ok.sum(), (d[ok] < STV_ABNORMAL_BPM).sum()])
+
+    def update(self, fhr: np.ndarray, uc: Optional[np.ndarray] = None) -> None:
+        fhr = np.asarray(fhr, dtype=np.float64)
+        uc = np.full_like(fhr, np.nan) if uc is None else np.asarray(uc, dtype=np.float64)
+        block = np.concatenate((self._carry, np.stack((fhr, uc))), axis=1)
+        n_sec = block.shape[1] // self.sample_rate_hz
+        self._carry = block[:, n_sec * self.sample_rate_hz :]
+        if n_sec == 0:
+            return
+        new_fhr = to_seconds(block[0], self.sample_rate_hz)
+        new_uc = to_seconds(block[1], self.sample_rate_hz, None)
+        if n_sec >= self.window_s:
+            self.reset()
+            self._carry = block[:, n_sec * self.sample_rate_hz :]
+            new_fhr, new_uc = new_fhr[-self.window_s :], new_uc[-self.window_s :]
+            n_sec = self.window_s
+        evict = max(0, self._filled + n_sec - self.window_s)
+        if evict:
+            old = self._ordered(self._fhr)
+            self._add_stats(old[:evict], -1)
+            self._add_stv(old[: evict + 1], -1)
+            self._filled -= evict
+        self._add_stats(new_fhr, +1)
+        self._add_stv(np.concatenate(([self._last], new_fhr)), +1)
+        idx = (self._pos + np.arange(n_sec)) % self.window_s
+        self._fhr[idx] = new_fhr
+        self._uc[idx] = new_uc
+        self._pos = (self._pos + n_sec) % self.window_s
+        self._filled += n_sec
+        self._last = new_fhr[-1]
+
+    @property
+    def seconds(self) -> int:
+        return self._filled
+
+    def features(self) -> np.ndarray:
+        """(21,) features of the current window (NaN until a valid FHR second has been seen)."""
+        sec = self._ordered(self._fhr)[None, :]
+        uc_sec = self._ordered(self._uc)[None, :]
+        moments = tuple(np.array([m]) for m in self._moments)
+        stv = tuple(np.array([v]) for v in self._stv)
+        return _assemble(sec, uc_sec, self._counts[None, :], moments, stv)[0]
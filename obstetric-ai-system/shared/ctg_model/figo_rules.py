@@ -0,0 +1,338 @@
+"""
+FIGO 2015 intrapartum CTG classification by rules, for when no trained weights (or no features_21) are
+available. Vectorized over a batch of traces: (B, T) FHR at 4 Hz, optional UC.
+
+Signals are reduced to 1 Hz (``features.to_seconds``). Accelerations, decelerations and contractions
+come from run-length encoding, and per-minute variability comes from a reshape. A 30-minute trace takes
+a few milliseconds, with no Python loop over samples or events.
+
+Criteria (Ayres-de-Campos et al., FIGO consensus 2015):
+- baseline: mean FHR over stable seconds (within 10 bpm of the median, so accelerations and
+  decelerations are excluded). Normal 110-160. Suspect 100-109 or > 160. Pathological < 100.
+- variability: amplitude (max - min) per minute, decelerations and accelerations excluded. The median
+  minute gives the band: normal 5-25 bpm. Pathological: reduced (< 5) for > 50 min, or increased
+  (> 25, saltatory) for > 30 min.
+- decelerations: >= 15 bpm below the baseline for >= 15 s. Variable: onset to nadir < 30 s. With UC,
+  gradual decelerations are early (nadir within 15 s of the contraction peak) or late (nadir later).
+  Prolonged: >= 3 min. Pathological: any prolonged deceleration > 5 min, or repetitive (>= 50% of
+  contractions) late/prolonged decelerations for > 30 min (> 20 min with reduced variability).
+  Without a UC channel, gradual decelerations cannot be timed. They count as late-like (conservative).
+
+The sinusoidal pattern and the shape details of decelerations (shouldering, overshoot) are not assessed.
+"""
+from __future__ import annotations
+
+import warnings
+from dataclasses import dataclass
+from typing import Optional
+
+import numpy as np
+
+from .features import (
+    SAMPLE_RATE_HZ,
+    UC_CONTRACTION_DELTA,
+    UC_CONTRACTION_MIN_S,
+    _runs,
+    to_seconds,
+)
+
+RULES_VERSION = "figo2015-rules-1.0"
+FIGO_CLASSES = ("Normal", "Suspect", "Pathologique")
+
+BASELINE_STABLE_BPM = 10.0
+BASELINE_NORMAL_BPM = (110.0, 160.0)
+BASELINE_PATHOLOGICAL_BPM = 100.0
+VARIABILITY_NORMAL_BPM = (5.0, 25.0)
+REDUCED_VARIABILITY_PATHOLOGICAL_MIN = 50
+INCREASED_VARIABILITY_PATHOLOGICAL_MIN = 30
+EVENT_DELTA_BPM = 15.0
+EVENT_MIN_S = 15
+RAPID_DECEL_ONSET_S = 30
+NADIR_TOLERANCE_BPM = 5.0
+EARLY_DECEL_LAG_S = 15
+CONTRACTION_MATCH_S = 60
+PROLONGED_DECEL_S = 180
+PROLONGED_DECEL_PATHOLOGICAL_S = 300
+REPETITIVE_FRACTION = 0.5
+REPETITIVE_PATHOLOGICAL_MIN = 30
+REPETITIVE_REDUCED_VARIABILITY_MIN = 20
+RULE_CONFIDENCE = 0.9
+SUMMARY_CONFIDENCE = 0.8
+DAWES_STV_ABNORMAL_MS = 3.0
+
+DECELERATION_TYPES = ("early", "late", "variable", "prolonged", "untimed")
+
+
+@dataclass
+class FigoAssessment:
+    """Per-row results of ``assess`` (every array has shape (B,))."""
+
+    classification: np.ndarray  # int: index in FIGO_CLASSES
+    confidence: np.ndarray
+    baseline_bpm: np.ndarray
+    variability_bpm: np.ndarray
+    reduced_variability_min: np.ndarray  # longest run of minutes < 5 bpm
+    increased_variability_min: np.ndarray  # longest run of minutes > 25 bpm
+    accelerations: np.ndarray
+    decelerations: dict[str, np.ndarray]  # counts per DECELERATION_TYPES
+    longest_deceleration_s: np.ndarray
+    contractions: np.ndarray
+    repetitive: np.ndarray  # bool: repetitive decelerations of any type
+    valid_fraction: np.ndarray
+
+    def reasons(self, i: int) -> list[str]:
+        """Findings of row ``i`` that move it away from Normal (French, for the narrative)."""
+        out: list[str] = []
+        b = self.baseline_bpm[i]
+        if not np.isfinite(b):
+            return ["signal FHR absent"]
+        if b < BASELINE_PATHOLOGICAL_BPM:
+            out.append(f"bradycardie {b:.0f} bpm")
+        elif b < BASELINE_NORMAL_BPM[0]:
+            out.append(f"baseline basse {b:.0f} bpm")
+        elif b > BASELINE_NORMAL_BPM[1]:
+            out.append(f"tachycardie {b:.0f} bpm")
+        v = self.variability_bpm[i]
+        if np.isfinite(v) and v < VARIABILITY_NORMAL_BPM[0]:
+            out.append(f"variabilité réduite ({v:.0f} bpm, {int(self.reduced_variability_min[i])} min)")
+        elif np.isfinite(v) and v > VARIABILITY_NORMAL_BPM[1]:
+            out.append(f"variabilité augmentée ({v:.0f} bpm, {int(self.increased_variability_min[i])} min)")
+        if self.decelerations["prolonged"][i]:
+            out.append(f"décélération prolongée ({int(self.longest_deceleration_s[i])} s)")
+        if self.repetitive[i]:
+            kinds = [k for k in DECELERATION_TYPES if k != "prolonged" and self.decelerations[k][i]]
+            out.append("décélérations répétitives (" + ", ".join(kinds) + ")")
+        return out
+
+
+def _run_extreme(
+    values: np.ndarray, mask: np.ndarray, rows: np.ndarray, starts: np.ndarray, ends: np.ndarray, use_max: bool,
+    tol: float = 0.0,
+) -> np.ndarray:
+    """
+    Column of the first min (or max) of ``values`` inside each run (the mask is True over the run);
+    with ``tol``, the first value within ``tol`` of it (end of the descent for a plateaued nadir).
+    """
+    b, s = values.shape
+    fill = -np.inf if use_max else np.inf
+    src = np.where(mask, values, fill).ravel()
+    flat_starts = rows * s + starts
+    reduce = np.maximum if use_max else np.minimum
+    extreme = reduce.reduceat(src, flat_starts)
+    lens = ends - starts
+    rid = np.repeat(np.arange(lens.size), lens)
+    pos = np.repeat(flat_starts - (np.cumsum(lens) - lens), lens) + np.arange(lens.sum())
+    hit = np.abs(src[pos] - extreme[rid]) <= tol
+    _, first = np.unique(rid[hit], return_index=True)
+    return pos[hit][first] - rows * s
+
+
+def _longest_run(mask: np.ndarray) -> np.ndarray:
+    rows, starts, ends = _runs(mask)
+    out = np.zeros(mask.shape[0], dtype=np.int64)
+    np.maximum.at(out, rows, ends - starts)
+    return out
+
+
+def _baseline(sec: np.ndarray) -> np.ndarray:
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", RuntimeWarning)
+        median = np.nanmedian(sec, axis=1)
+        with np.errstate(invalid="ignore"):
+            stable = np.abs(sec - median[:, None]) <= BASELINE_STABLE_BPM
+        base = np.nanmean(np.where(stable, sec, np.nan), axis=1)
+    return np.where(np.isfinite(base), base, median)
+
+
+def _minute_amplitudes(sec: np.ndarray, exclude: np.ndarray) -> np.ndarray:
+    """(B, M) max - min per minute over valid non-event seconds; NaN when < 30 s are usable."""
+    b, s = sec.shape
+    seg = 60 if s >= 60 else max(s, 1)
+    m = max(s // seg, 1)
+    x = sec[:, : m * seg].reshape(b, m, -1)
+    ok = np.isfinite(x) & ~exclude[:, : m * seg].reshape(b, m, -1)
+    amp = np.where(ok, x, -np.inf).max(axis=2) - np.where(ok, x, np.inf).min(axis=2)
+    return np.where(ok.sum(axis=2) >= min(30, seg // 2 or 1), amp, np.nan)
+
+
+def _contraction_peaks(uc_sec: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """(rows, peak columns) of contractions: UC >= tone + 15 for >= 30 s; tone = 10th percentile."""
+    finite = np.isfinite(uc_sec)
+    has_uc = finite.any(axis=1)
+    tone = np.nanpercentile(np.where(has_uc[:, None], uc_sec, 0.0), 10, axis=1)
+    tone[~has_uc] = np.nan
+    with np.errstate(invalid="ignore"):
+        mask = uc_sec >= tone[:, None] + UC_CONTRACTION_DELTA
+    rows, starts, ends = _runs(mask)
+    keep = (ends - starts) >= UC_CONTRACTION_MIN_S
+    rows, starts, ends = rows[keep], starts[keep], ends[keep]
+    if rows.size == 0:
+        return rows, starts
+    return rows, _run_extreme(uc_sec, mask, rows, starts, ends, use_max=True)
+
+
+def assess(
+    fhr: np.ndarray, uc: Optional[np.ndarray] = None, sample_rate_hz: int = SAMPLE_RATE_HZ
+) -> FigoAssessment:
+    """(T,) or (B, T) FHR (+ UC) samples -> FIGO assessment per row (see module docstring)."""
+    fhr = np.atleast_2d(np.asarray(fhr, dtype=np.float64))
+    sec = to_seconds(fhr, sample_rate_hz)
+    b, s = sec.shape
+    valid_fraction = np.isfinite(sec).sum(axis=1) / max(s, 1)
+    baseline = _baseline(sec)
+    base = baseline[:, None]
+
+    with np.errstate(invalid="ignore"):
+        above = sec >= base + EVENT_DELTA_BPM
+        below = sec <= base - EVENT_DELTA_BPM
+    rows, starts, ends = _runs(above)
+    accel = (ends - starts) >= EVENT_MIN_S
+    accelerations = np.bincount(rows[accel], minlength=b)
+    rows, starts, ends = rows[accel], starts[accel], ends[accel]
+    d_rows, d_starts, d_ends = _runs(below)
+    keep = (d_ends - d_starts) >= EVENT_MIN_S
+    d_rows, d_starts, d_ends = d_rows[keep], d_starts[keep], d_ends[keep]
+    # Seconds excluded from variability: events widened by their slopes (the +-15 bpm runs miss them)
+    events = np.zeros((b, s + 1), dtype=np.int32)
+    for r, lo, hi in ((rows, starts, ends), (d_rows, d_starts, d_ends)):
+        np.add.at(events, (r, np.maximum(lo - RAPID_DECEL_ONSET_S, 0)), 1)
+        np.add.at(events, (r, np.minimum(hi + RAPID_DECEL_ONSET_S, s)), -1)
+    in_event = np.cumsum(events, axis=1)[:, :s] > 0
+
+    amp = _minute_amplitudes(sec, in_event)
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", RuntimeWarning)
+        variability = np.nanmedian(amp, axis=1)
+    with np.errstate(invalid="ignore"):
+        reduced_min = _longest_run(amp < VARIABILITY_NORMAL_BPM[0])
+        increased_min = _longest_run(amp > VARIABILITY_NORMAL_BPM[1])
+
+    n_dec = d_rows.size
+    duration = d_ends - d_starts
+    kinds = np.full(n_dec, DECELERATION_TYPES.index("untimed"))
+    if uc is not None:
+        uc_sec = to_seconds(np.atleast_2d(np.asarray(uc, dtype=np.float64)), sample_rate_hz, invalid_le=None)
+        c_rows, c_peaks = _contraction_peaks(uc_sec)
+    else:
+        c_rows = c_peaks = np.zeros(0, dtype=np.int64)
+    contractions = np.bincount(c_rows, minlength=b)
+    if n_dec:
+        nadir = _run_extreme(sec, below, d_rows, d_starts, d_ends, use_max=False)
+        reached = _run_extreme(sec, below, d_rows, d_starts, d_ends, use_max=False, tol=NADIR_TOLERANCE_BPM)
+        # Onset to nadir: the run covers the descent from -15 bpm to nadir + 5 bpm; extrapolate linearly
+        depth = baseline[d_rows] - sec[d_rows, nadir]
+        slope_factor = np.minimum(depth / np.maximum(depth - EVENT_DELTA_BPM - NADIR_TOLERANCE_BPM, 1e-6), 4.0)
+        rapid = (reached - d_starts) * slope_factor < RAPID_DECEL_ONSET_S
+        lag = np.full(n_dec, np.inf)
+        if c_rows.size:
+            # Nearest contraction peak of the same row (flat positions are sorted row-major)
+            peaks_flat = c_rows * s + c_peaks
+            nadir_flat = d_rows * s + nadir
+            j = np.searchsorted(peaks_flat, nadir_flat)
+            for cand in (np.clip(j - 1, 0, None), np.clip(j, None, peaks_flat.size - 1)):
+                same = c_rows[cand] == d_rows
+                diff = np.where(same, nadir_flat - peaks_flat[cand], np.inf)
+                lag = np.where(np.abs(diff) < np.abs(lag), diff, lag)
+        timed = np.abs(lag) <= CONTRACTION_MATCH_S
+        kinds = np.select(
+            [
+                duration >= PROLONGED_DECEL_S,
+                rapid,
+                timed & (lag <= EARLY_DECEL_LAG_S),
+                timed,
+            ],
+            [
+                DECELERATION_TYPES.index("prolonged"),
+                DECELERATION_TYPES.index("variable"),
+                DECELERATION_TYPES.index("early"),
+                DECELERATION_TYPES.index("late"),
+            ],
+            default=DECELERATION_TYPES.index("untimed"),
+        )
+    decelerations = {
+        name: np.bincount(d_rows[kinds == k], minlength=b) for k, name in enumerate(DECELERATION_TYPES)
+    }
+    longest = np.zeros(b, dtype=np.int64)
+    np.maximum.at(longest, d_rows, duration)
+
+    # Repetitive: with >= 50% of contractions (at least 2 decelerations; 2 when no contraction is seen)
+    threshold = np.maximum(2, np.ceil(REPETITIVE_FRACTION * contractions))
+    late_like = np.isin(kinds, [DECELERATION_TYPES.index(k) for k in ("late", "prolonged", "untimed")])
+    n_late = np.bincount(d_rows[late_like], minlength=b)
+    repetitive = np.bincount(d_rows, minlength=b) >= threshold
+    repetitive_late = n_late >= threshold
+    first = np.full(b, s, dtype=np.int64)
+    last = np.zeros(b, dtype=np.int64)
+    np.minimum.at(first, d_rows[late_like], d_starts[late_like])
+    np.maximum.at(last, d_rows[late_like], d_ends[late_like])
+    span_min = np.maximum(last - first, 0) / 60.0
+
+    with np.errstate(invalid="ignore"):
+        reduced = variability < VARIABILITY_NORMAL_BPM[0]
+        pathological = (
+            (baseline < BASELINE_PATHOLOGICAL_BPM)
+            | (reduced_min > REDUCED_VARIABILITY_PATHOLOGICAL_MIN)
+            | (increased_min > INCREASED_VARIABILITY_PATHOLOGICAL_MIN)
+            | (decelerations["prolonged"] > 0) & (longest > PROLONGED_DECEL_PATHOLOGICAL_S)
+            | repetitive_late
+            & ((span_min > REPETITIVE_PATHOLOGICAL_MIN) | reduced & (span_min > REPETITIVE_REDUCED_VARIABILITY_MIN))
+        )
+        normal = (
+            (baseline >= BASELINE_NORMAL_BPM[0])
+            & (baseline <= BASELINE_NORMAL_BPM[1])
+            & (variability >= VARIABILITY_NORMAL_BPM[0])
+            & (variability <= VARIABILITY_NORMAL_BPM[1])
+            & ~repetitive
+            & (decelerations["prolonged"] == 0)
+        )
+    classification = np.where(pathological, 2, np.where(normal, 0, 1))
+    classification[~np.isfinite(baseline)] = 1
+    return FigoAssessment(
+        classification=classification,
+        confidence=np.round(RULE_CONFIDENCE * valid_fraction, 4),
+        baseline_bpm=np.round(baseline, 1),
+        variability_bpm=np.round(variability, 1),
+        reduced_variability_min=reduced_min,
+        increased_variability_min=increased_min,
+        accelerations=accelerations,
+        decelerations=decelerations,
+        longest_deceleration_s=longest,
+        contractions=contractions,
+        repetitive=repetitive,
+        valid_fraction=valid_fraction,
+    )
+
+
+def classify_summary(
+    baseline_bpm: float,
+    stv_ms: Optional[float] = None,
+    ltv_pct: Optional[float] = None,
+    decelerations_light: float = 0.0,
+    decelerations_severe: float = 0.0,
+) -> tuple[int, float, list[str]]:
+    """
+    Fallback when only the summary fields are known (no trace): (class, confidence, reasons).
+    Baseline bands are from FIGO. The STV threshold (< 3 ms) is the Dawes-Redman criterion. Severe
+    decelerations count as pathological and abnormal LTV over >= 50% of the time as suspect.
+    """
+    reasons: list[str] = []
+    cls = 0
+    if baseline_bpm < BASELINE_PATHOLOGICAL_BPM:
+        reasons.append(f"bradycardie {baseline_bpm:.0f} bpm")
+        cls = 2
+    elif baseline_bpm < BASELINE_NORMAL_BPM[0] or baseline_bpm > BASELINE_NORMAL_BPM[1]:
+        reasons.append(f"baseline {baseline_bpm:.0f} bpm hors 110-160")
+        cls = 1
+    if decelerations_severe > 0:
+        reasons.append("décélérations sévères")
+        cls = 2
+    if stv_ms is not None and stv_ms < DAWES_STV_ABNORMAL_MS:
+        reasons.append(f"STV {stv_ms} ms < {DAWES_STV_ABNORMAL_MS:g} ms")
+        cls = max(cls, 1)
+    if ltv_pct is not None and ltv_pct >= 50:
+        reasons.append(f"LTV anormale {ltv_pct:.0f}% du temps")
+        cls = max(cls, 1)
+    if decelerations_light >= 2:
+        reasons.append("décélérations répétées")
+        cls = max(cls, 1)
+    return cls, SUMMARY_CONFIDENCE, reasons
@@ -0,0 +1,105 @@
+"""
+Load-time inference optimization for the CTG classifier.
+
+Pass: fold each Conv1d+BatchNorm1d pair into a single conv, script + freeze the module with
+TorchScript, optionally ``torch.jit.optimize_for_inference``, then check numerical parity against
+the eager model. The result is cached on disk keyed by the weights hash so later cold starts only
+pay a ``torch.jit.load``.
+"""
+from __future__ import annotations
+
+import copy
+import hashlib
+import os
+from pathlib import Path
+
+import torch
+import torch.nn as nn
+from torch.nn.utils.fusion import fuse_conv_bn_eval
+
+from .classifier import CTGClassifier
+
+PARITY_ATOL = 1e-4
+
+
+def fold_batchnorm(model: CTGClassifier) -> CTGClassifier:
+    """Copy of ``model`` (eval) whose conv stack has BN folded into the preceding Conv1d weights."""
+    folded = copy.deepcopy(model).eval()
+    layers = list(folded.conv)
+    fused: list[nn.Module] = []
+    i = 0
+    while i < len(layers):
+        layer = layers[i]
+        nxt = layers[i + 1] if i + 1 < len(layers) else None
+        if isinstance(layer, nn.Conv1d) and isinstance(nxt, nn.BatchNorm1d):
+            fused.append(fuse_conv_bn_eval(layer, nxt))
+            i += 2
+        else:
+            fused.append(layer)
+            i += 1
+    folded.conv = nn.Sequential(*fused)
+    return folded
+
+
+def compile_for_inference(model: CTGClassifier, optimize: bool = True) -> torch.jit.ScriptModule:
+    """BN folding + TorchScript script/freeze (+ optimize_for_inference). Batch and length stay dynamic."""
+    scripted = torch.jit.script(fold_batchnorm(model))
+    frozen = torch.jit.freeze(scripted.eval())
+    if optimize:
+        frozen = torch.jit.optimize_for_inference(frozen)
+    return frozen
+
+
+def max_abs_diff(reference: nn.Module, candidate: nn.Module, input_len: int, batch_sizes=(1, 8)) -> float:
+    """Largest |logit| gap between two modules on seeded random inputs."""
+    gen = torch.Generator().manual_seed(0)
+    worst = 0.0
+    with torch.no_grad():
+        for bs in batch_sizes:
+            x = torch.randn(bs, 1, input_len, generator=gen)
+            worst = max(worst, float((reference(x) - candidate(x)).abs().max()))
+    return worst
+
+
+def weights_digest(weights_path: Path, optimize: bool = True) -> str:
+    """Cache key: weights bytes + torch version + pass options (a torch upgrade invalidates the cache)."""
+    h = hashlib.sha256(weights_path.read_bytes())
+    h.update(f"torch={torch.__version__};optimize={optimize}".encode())
+    return h.hexdigest()
+
+
+def load_or_build_optimized(
+    model: CTGClassifier,
+    weights_path: Path,
+    cache_dir: Path,
+    input_len: int,
+    optimize: bool = True,
+    atol: float = PARITY_ATOL,
+) -> tuple[torch.jit.ScriptModule, str]:
+    """
+    Return (optimized module, cache file status). Raises RuntimeError when parity fails so the caller
+    can keep the eager model. A read-only cache dir only disables the cache.
+    """
+    cache_path = cache_dir / f"ctg_classifier.{weights_digest(weights_path, optimize)[:16]}.ts"
+    if cache_path.is_file():
+        try:
+            cached = torch.jit.load(str(cache_path), map_location="cpu")
+            cached.eval()
+            diff = max_abs_diff(model, cached, input_len, batch_sizes=(1,))
+            if diff <= atol:
+                return cached, "cache-hit"
+        except Exception:
+            pass
+    optimized = compile_for_inference(model, optimize=optimize)
+    diff = max_abs_diff(model, optimized, input_len)
+    if diff > atol:
+        raise RuntimeError(f"optimized CTG model diverges from eager (max |diff|={diff:.2e} > {atol:.0e})")
+    status = "built"
+    try:
+        cache_dir.mkdir(parents=True, exist_ok=True)
+        tmp = cache_path.with_suffix(f".tmp{os.getpid()}")
+        torch.jit.save(optimized, str(tmp))
+        os.replace(tmp, cache_path)
+    except OSError:
+        status = "built (cache not writable)"
+    return optimized, status
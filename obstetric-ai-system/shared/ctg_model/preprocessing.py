@@ -0,0 +1,57 @@
+"""
+Feature-to-sequence preprocessing for the CTG classifier.
+Shared by training (ml/train_ctg.py) and ctg_monitor inference so both see identical tensors.
+"""
+from __future__ import annotations
+
+from functools import lru_cache
+from typing import Any
+
+import numpy as np
+
+from .constants import DEFAULT_INPUT_MODE, INPUT_LEN, INPUT_MODES
+
+
+@lru_cache(maxsize=16)
+def _tile_index(n_feat: int, input_len: int) -> np.ndarray:
+    """Gather indices t % n_feat, computed once per (n_feat, input_len)."""
+    idx = np.arange(input_len, dtype=np.intp) % n_feat
+    idx.setflags(write=False)
+    return idx
+
+
+def standardize(X: np.ndarray, mean: np.ndarray, scale: np.ndarray) -> np.ndarray:
+    """(X - mean) / scale in float32, guarding against zero-variance columns."""
+    X = np.asarray(X, dtype=np.float32)
+    mean = np.asarray(mean, dtype=np.float32)
+    scale = np.maximum(np.asarray(scale, dtype=np.float32), np.float32(1e-8))
+    return (X - mean) / scale
+
+
+def rows_to_sequences(X: np.ndarray, input_len: int = INPUT_LEN) -> np.ndarray:
+    """Repeat each feature row cyclically along time to match the 1D-CNN+LSTM input (B, 1, T)."""
+    X = np.asarray(X, dtype=np.float32)
+    if X.ndim != 2:
+        raise ValueError(f"Expected a 2-D (rows, features) array, got shape {X.shape}")
+    n, n_feat = X.shape
+    out = np.empty((n, 1, input_len), dtype=np.float32)
+    np.take(X, _tile_index(n_feat, input_len), axis=1, out=out[:, 0, :])
+    return out
+
+
+def sequence_length(input_mode: str, n_features: int) -> int:
+    """Model input length T for an input mode."""
+    if input_mode not in INPUT_MODES:
+        raise ValueError(f"input_mode must be one of {INPUT_MODES}, got {input_mode!r}")
+    return INPUT_LEN if input_mode == "tiled" else n_features
+
+
+def features_to_sequences(X: np.ndarray, preproc: dict[str, Any]) -> np.ndarray:
+    """Raw feature rows -> standardized model input, using the scaler saved in preprocessor.json."""
+    Xs = standardize(X, preproc["scaler_mean"], preproc["scaler_scale"])
+    mode = preproc.get("input_mode", DEFAULT_INPUT_MODE)
+    if mode == "native":
+        if int(preproc["input_len"]) != Xs.shape[1]:
+            raise ValueError(f"native input_mode expects input_len == {Xs.shape[1]}, got {preproc['input_len']}")
+        return np.ascontiguousarray(Xs[:, None, :])
+    return rows_to_sequences(Xs, int(preproc["input_len"]))
@@ -0,0 +1,25 @@
+"""
+Dynamic int8 quantization of the CTG classifier for CPU serving.
+The BiLSTM and Linear layers carry most of the cost; convolutions and attention stay in float32.
+"""
+import torch
+import torch.nn as nn
+
+from .classifier import CTGClassifier
+
+QUANTIZED_LAYERS = {nn.LSTM, nn.Linear}
+
+
+def quantize_dynamic_int8(model: CTGClassifier) -> nn.Module:
+    """Return an int8 dynamically-quantized copy (weights int8, activations quantized on the fly)."""
+    model.eval()
+    quantize = getattr(torch.ao.quantization, "quantize_dynamic", None) or torch.quantization.quantize_dynamic
+    return quantize(model, QUANTIZED_LAYERS, dtype=torch.qint8)
+
+
+def load_int8_state(model: CTGClassifier, state: dict) -> nn.Module:
+    """Rebuild the quantized module structure on a float model, then load a saved int8 state_dict."""
+    qmodel = quantize_dynamic_int8(model)
+    qmodel.load_state_dict(state)
+    qmodel.eval()
+    return qmodel
@@ -0,0 +1,127 @@
+"""
+FHR signal-quality stage, run ahead of feature extraction and classification. Vectorized over (B, T) 4 Hz traces.
+
+1. Invalid samples: NaN, <= 0 (the monitor's signal-loss code), or outside 50-210 bpm.
+2. Isolated spikes: one sample more than 25 bpm away from both neighbours, in the same direction.
+   These are dropped.
+3. Halving / doubling: the monitor locks on half (or twice) the true rate. Such a segment starts
+   with an abrupt ratio jump against the last valid sample (0.4-0.6 or 1.7-2.3) and stays near
+   baseline / 2 (or baseline x 2). A deceleration reaching the same level declines gradually and is not touched.
+   Detected samples are rescaled. A segment already running at the window start has no visible
+   onset and is left alone.
+4. Gaps up to 15 s are filled by linear interpolation (prev/next valid index via accumulate).
+   Longer gaps stay NaN.
+
+Per-sample quality: 1 measured, 0.5 repaired (rescaled or interpolated), 0 lost. The window ratio is
+the mean. Maternal heart-rate capture cannot be told apart from a deceleration without a maternal
+channel, so it is not repaired here. Windows below the gate threshold should not reach inference.
+"""
+from __future__ import annotations
+
+import warnings
+from dataclasses import dataclass
+
+import numpy as np
+
+from .features import SAMPLE_RATE_HZ, _runs
+
+MIN_VALID_BPM = 50.0
+MAX_VALID_BPM = 210.0
+SPIKE_BPM = 25.0
+HALVING_RATIO = (0.4, 0.6)
+DOUBLING_RATIO = (1.7, 2.3)
+HALVING_TOL_BPM = 12.0
+MAX_INTERP_GAP_S = 15
+REPAIRED_QUALITY = 0.5
+DEFAULT_MIN_QUALITY = 0.5
+
+
+@dataclass
+class CleanedTrace:
+    """Output of ``clean_fhr``: repaired (B, T) FHR (NaN where lost) and per-sample quality."""
+
+    fhr: np.ndarray
+    quality: np.ndarray
+    corrected: np.ndarray  # (B,) samples rescaled (halving / doubling)
+    interpolated: np.ndarray  # (B,) samples filled in gaps
+    removed: np.ndarray  # (B,) spikes and out-of-range samples dropped
+
+    @property
+    def ratio(self) -> np.ndarray:
+        """(B,) window signal-quality ratio in [0, 1]."""
+        return self.quality.mean(axis=1) if self.quality.shape[1] else np.zeros(self.quality.shape[0])
+
+
+def _scale_segments(x: np.ndarray, valid: np.ndarray, ref: np.ndarray, factor: float, ratio: tuple) -> np.ndarray:
+    """Mask of samples inside segments near ``ref * factor`` that start with an abrupt ``ratio`` jump."""
+    b, t = x.shape
+    with np.errstate(invalid="ignore", divide="ignore"):
+        near = valid & (np.abs(x / factor - ref[:, None]) <= HALVING_TOL_BPM)
+    rows, starts, ends = _runs(near)
+    # Jump against the last valid sample before the segment (across signal loss, where monitors relock)
+    idx = np.broadcast_to(np.arange(t), (b, t))
+    last_valid = np.maximum.accumulate(np.where(valid, idx, -1), axis=1)
+    before = last_valid[rows, np.maximum(starts - 1, 0)]
+    has_before = (starts > 0) & (before >= 0)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        jump = x[rows, starts] / x[rows, np.maximum(before, 0)]
+    keep = has_before & (jump >= ratio[0]) & (jump <= ratio[1])
+    mask = np.zeros((x.shape[0], x.shape[1] + 1), dtype=np.int32)
+    np.add.at(mask, (rows[keep], starts[keep]), 1)
+    np.add.at(mask, (rows[keep], ends[keep]), -1)
+    return np.cumsum(mask, axis=1)[:, :-1] > 0
+
+
+def _interpolate_gaps(x: np.ndarray, valid: np.ndarray, max_gap: int) -> tuple[np.ndarray, np.ndarray]:
+    b, t = x.shape
+    idx = np.broadcast_to(np.arange(t), (b, t))
+    prev = np.maximum.accumulate(np.where(valid, idx, -1), axis=1)
+    nxt = np.minimum.accumulate(np.where(valid, idx, t)[:, ::-1], axis=1)[:, ::-1]
+    fill = ~valid & (prev >= 0) & (nxt < t) & (nxt - prev - 1 <= max_gap)
+    rows = np.arange(b)[:, None]
+    lo, hi = x[rows, np.clip(prev, 0, t - 1)], x[rows, np.clip(nxt, 0, t - 1)]
+    with np.errstate(invalid="ignore"):
+        interp = lo + (hi - lo) * (idx - prev) / np.maximum(nxt - prev, 1)
+    return np.where(fill, interp, x), fill
+
+
+def clean_fhr(fhr: np.ndarray, sample_rate_hz: int = SAMPLE_RATE_HZ) -> CleanedTrace:
+    """(T,) or (B, T) raw FHR -> repaired FHR + per-sample quality (see module docstring)."""
+    x = np.atleast_2d(np.asarray(fhr, dtype=np.float64)).copy()
+    b, t = x.shape
+    finite = np.isfinite(x) & (x > 0)
+    with np.errstate(invalid="ignore"):
+        in_range = finite & (x >= MIN_VALID_BPM) & (x <= MAX_VALID_BPM)
+
+    # Halving / doubling first: doubled values above 210 bpm are still candidates
+    in_range_x = np.where(in_range, x, np.nan)
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", RuntimeWarning)
+        ref = np.nanmedian(in_range_x, axis=1) if t else np.full(b, np.nan)
+    halved = _scale_segments(x, finite, ref, 0.5, HALVING_RATIO)
+    doubled = _scale_segments(x, finite, ref, 2.0, DOUBLING_RATIO) & ~halved
+    x = np.where(halved, x * 2.0, np.where(doubled, x / 2.0, x))
+    corrected = halved | doubled
+    valid = finite & (corrected | in_range)
+
+    if t >= 3:
+        d_prev = np.diff(x, axis=1, prepend=np.nan)
+        d_next = -np.diff(x, axis=1, append=np.nan)
+        with np.errstate(invalid="ignore"):
+            spike = (
+                (np.abs(d_prev) > SPIKE_BPM) & (np.abs(d_next) > SPIKE_BPM) & (np.sign(d_prev) == np.sign(d_next))
+            )
+        valid &= ~spike
+    x = np.where(valid, x, np.nan)
+    x, filled = _interpolate_gaps(x, valid, MAX_INTERP_GAP_S * sample_rate_hz)
+
+    quality = np.where(valid, 1.0, 0.0)
+    quality[valid & corrected] = REPAIRED_QUALITY
+    quality[filled] = REPAIRED_QUALITY
+    return CleanedTrace(
+        fhr=x,
+        quality=quality.astype(np.float32),
+        corrected=(valid & corrected).sum(axis=1),
+        interpolated=filled.sum(axis=1),
+        removed=(finite & ~valid).sum(axis=1),
+    )
@@ -0,0 +1,165 @@
+"""
+Stateful streaming inference for CTGClassifier weights: each call processes only the new samples.
+
+Per stream (a batch row), ``StreamState`` carries:
+- conv: the last ``kernel - 1`` inputs of each (BN-folded) Conv1d. The unpadded conv on [cache + new]
+  equals the padded full-sequence conv, delayed by ``sum(padding)`` samples (6 for the default
+  7/5/3 stack). This part is exact; the zero-initialised cache reproduces the left zero padding.
+- LSTM, forward direction: (h, c) of every layer carried across calls. Exact over the whole stream
+  (the full-window model restarts from zero at each window start).
+- LSTM, backward direction: cannot stream. Approximation: it runs over the current hop only, from a
+  zero state (the full model starts it from the window end).
+- attention: cannot stream. Approximation: uniform attention weights. mean_t(MHA(x))_t then reduces
+  to out_proj(W_v · mean(x) + b_v), so only a running mean of LSTM outputs is kept: one sum per hop,
+  in a ring of ``window_hops`` hops.
+
+Per-hop cost is one conv/LSTM pass over the hop plus an O(window_hops) sum, independent of the window
+length. Intended for checkpoints trained on raw signal windows; the approximations are not suitable
+for the tabular (tiled features) checkpoint.
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass
+
+import torch
+import torch.nn as nn
+import torch.nn.functional as F
+
+from .classifier import CTGClassifier
+from .optimize import fold_batchnorm
+
+
+@dataclass
+class StreamState:
+    """Per-row streaming state (batch dimension = independent streams)."""
+
+    conv: list[torch.Tensor]  # per conv layer (B, C_in, kernel - 1)
+    h: list[torch.Tensor]  # per LSTM layer (1, B, H), forward direction
+    c: list[torch.Tensor]
+    pooled: torch.Tensor  # (window_hops, B, 2H) per-hop sums of LSTM outputs
+    counts: torch.Tensor  # (window_hops, B) frames per hop
+    pos: torch.Tensor  # (B,) next ring slot
+    samples: torch.Tensor  # (B,) samples consumed
+
+    @staticmethod
+    def cat(states: list["StreamState"]) -> "StreamState":
+        """Stack single- or multi-row states into one batch (rows keep their own ring position)."""
+        return StreamState(
+            conv=[torch.cat([s.conv[i] for s in states]) for i in range(len(states[0].conv))],
+            h=[torch.cat([s.h[i] for s in states], dim=1) for i in range(len(states[0].h))],
+            c=[torch.cat([s.c[i] for s in states], dim=1) for i in range(len(states[0].c))],
+            pooled=torch.cat([s.pooled for s in states], dim=1),
+            counts=torch.cat([s.counts for s in states], dim=1),
+            pos=torch.cat([s.pos for s in states]),
+            samples=torch.cat([s.samples for s in states]),
+        )
+
+    def split(self) -> list["StreamState"]:
+        """Inverse of ``cat``: one state per row."""
+        return [
+            StreamState(
+                conv=[t[i : i + 1] for t in self.conv],
+                h=[t[:, i : i + 1] for t in self.h],
+                c=[t[:, i : i + 1] for t in self.c],
+                pooled=self.pooled[:, i : i + 1],
+                counts=self.counts[:, i : i + 1],
+                pos=self.pos[i : i + 1],
+                samples=self.samples[i : i + 1],
+            )
+            for i in range(self.pos.shape[0])
+        ]
+
+
+class StreamingCTGClassifier:
+    """Wraps trained CTGClassifier weights; ``step(x_new, state)`` -> logits over the last ``window_hops`` hops."""
+
+    def __init__(self, model: CTGClassifier, window_hops: int = 4):
+        folded = fold_batchnorm(model)
+        self.convs = [m for m in folded.conv if isinstance(m, nn.Conv1d)]
+        self.delay = sum(int(c.padding[0]) for c in self.convs)
+        self.window_hops = max(1, window_hops)
+
+        lstm = folded.lstm
+        self.hidden = lstm.hidden_size
+        self.forward_lstms: list[nn.LSTM] = []
+        self.backward_lstms: list[nn.LSTM] = []
+        for layer in range(lstm.num_layers):
+            in_size = lstm.input_size if layer == 0 else 2 * self.hidden
+            for suffix, bucket in (("", self.forward_lstms), ("_reverse", self.backward_lstms)):
+                single = nn.LSTM(in_size, self.hidden, batch_first=True)
+                for name in ("weight_ih", "weight_hh", "bias_ih", "bias_hh"):
+                    getattr(single, f"{name}_l0").data.copy_(getattr(lstm, f"{name}_l{layer}{suffix}").data)
+                bucket.append(single.eval())
+
+        mha = folded.attention
+        e = mha.embed_dim
+        self.w_v = mha.in_proj_weight[2 * e :].detach().clone()
+        self.b_v = mha.in_proj_bias[2 * e :].detach().clone()
+        self.out_proj = mha.out_proj
+        self.fc = folded.fc
+
+    def init_state(self, batch_size: int = 1) -> StreamState:
+        z = lambda *shape: torch.zeros(*shape)  # noqa: E731
+        return StreamState(
+            conv=[z(batch_size, c.in_channels, c.kernel_size[0] - 1) for c in self.convs],
+            h=[z(1, batch_size, self.hidden) for _ in self.forward_lstms],
+            c=[z(1, batch_size, self.hidden) for _ in self.forward_lstms],
+            pooled=z(self.window_hops, batch_size, 2 * self.hidden),
+            counts=z(self.window_hops, batch_size),
+            pos=torch.zeros(batch_size, dtype=torch.long),
+            samples=torch.zeros(batch_size, dtype=torch.long),
+        )
+
+    def _warmup_frames(self, state: StreamState, n: int) -> torch.Tensor:
+        """(B,) frames of this call that fall before the stream start (dropped after the conv stack)."""
+        return (self.delay - state.samples).clamp(0, n)
+
+    @torch.no_grad()
+    def conv_step(self, x: torch.Tensor, state: StreamState) -> torch.Tensor:
+        """
+        (B, C, n) new samples -> (B, 256, n) conv features for positions delayed by ``self.delay``.
+        Intermediate outputs at positions < 0 are zeroed (they stand for the next layer's padding); the
+        leading frames before the stream start are still present in the returned tensor.
+        """
+        n = x.shape[2]
+        offset = 0
+        for i, conv in enumerate(self.convs):
+            inp = torch.cat((state.conv[i], x), dim=2)
+            state.conv[i] = inp[:, :, inp.shape[2] - (conv.kernel_size[0] - 1) :]
+            x = F.relu(F.conv1d(inp, conv.weight, conv.bias))
+            offset += int(conv.padding[0])
+            if i < len(self.convs) - 1:
+                positions = state.samples[:, None] + torch.arange(n)[None, :] - offset
+                x = x.masked_fill((positions < 0)[:, None, :], 0.0)
+        state.samples = state.samples + n
+        return x
+
+    @torch.no_grad()
+    def lstm_step(self, x: torch.Tensor, state: StreamState) -> torch.Tensor:
+        """(B, n, F) -> (B, n, 2H): forward direction stateful, backward direction over the hop only."""
+        for layer, (fwd, bwd) in enumerate(zip(self.forward_lstms, self.backward_lstms)):
+            out_f, (state.h[layer], state.c[layer]) = fwd(x, (state.h[layer], state.c[layer]))
+            out_b, _ = bwd(x.flip(1))
+            x = torch.cat((out_f, out_b.flip(1)), dim=2)
+        return x
+
+    @torch.no_grad()
+    def step(self, x: torch.Tensor, state: StreamState) -> torch.Tensor:
+        """Consume (B, C, n) new samples (same n for all rows); return (B, num_classes) logits."""
+        skip = self._warmup_frames(state, x.shape[2])
+        if x.shape[0] > 1 and bool((skip != skip[0]).any()):
+            # Streams at different warm-up stages keep different frame counts: step them one by one
+            rows = state.split()
+            logits = torch.cat([self.step(x[i : i + 1], row) for i, row in enumerate(rows)])
+            merged = StreamState.cat(rows)
+            state.__dict__.update(merged.__dict__)
+            return logits
+        feats = self.conv_step(x, state)[:, :, int(skip[0]) :]
+        if feats.shape[2]:
+            feats = self.lstm_step(feats.transpose(1, 2), state)
+            rows = torch.arange(x.shape[0])
+            state.pooled[state.pos, rows] = feats.sum(dim=1)
+            state.counts[state.pos, rows] = float(feats.shape[1])
+            state.pos = (state.pos + 1) % self.window_hops
+        mean = state.pooled.sum(dim=0) / state.counts.sum(dim=0).clamp_min(1.0)[:, None]
+        return self.fc(self.out_proj(F.linear(mean, self.w_v, self.b_v)))
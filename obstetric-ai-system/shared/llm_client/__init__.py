@@ -0,0 +1,17 @@
+from .caching import cached_system, prompt_cache_enabled, record_usage
+from .hedging import HedgeBudget, hedged_call
+from .pool import PoolConfig, aclose_clients, get_async_client, get_client, pool_config, reset_clients
+
+__all__ = [
+    "HedgeBudget",
+    "PoolConfig",
+    "aclose_clients",
+    "cached_system",
+    "get_async_client",
+    "get_client",
+    "hedged_call",
+    "pool_config",
+    "prompt_cache_enabled",
+    "record_usage",
+    "reset_clients",
+]
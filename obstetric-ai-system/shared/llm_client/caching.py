@@ -0,0 +1,82 @@
+"""
+Prompt caching for the shared system prompts, and per-agent token accounting.
+
+``build_llm_system_prompt`` gives the same text for every request of a template. ``cached_system``
+sends it as one text block ending with an Anthropic ``cache_control`` breakpoint, so the prefix
+(tools + system) is written to the provider cache once and read on later calls. The user message
+stays outside the breakpoint and is never cached. Anthropic only caches a prefix of at least
+1024 tokens (Sonnet / Opus), and shorter ones are billed normally. OpenAI caches long prefixes
+automatically, so nothing is marked there; only its cached-token count is read back.
+
+``record_usage`` counts, per agent and provider: uncached input tokens, cache reads, cache writes and
+output tokens (GET /metrics).
+
+Env: LLM_PROMPT_CACHE (1; 0 sends the system prompt as plain text), LLM_PROMPT_CACHE_TTL ("" = 5 min
+provider default, or "1h").
+
+SDK: ``cache_control`` on system text blocks of ``messages.create`` needs anthropic >= 0.41.0, and the
+``ttl`` field of the breakpoint (5m / 1h) >= 0.64.0; the agents pin anthropic>=0.64.0.
+"""
+from __future__ import annotations
+
+import os
+from typing import Any, Union
+
+from shared.metrics import REGISTRY
+
+_input_tokens = REGISTRY.counter(
+    "obstetric_llm_input_tokens_total", "LLM input tokens by agent, provider and kind (uncached, cache_read, cache_write)"
+)
+_output_tokens = REGISTRY.counter("obstetric_llm_output_tokens_total", "LLM output tokens by agent and provider")
+_calls = REGISTRY.counter("obstetric_llm_calls_total", "LLM calls with usage reported, by agent and provider")
+
+
+def prompt_cache_enabled() -> bool:
+    return os.getenv("LLM_PROMPT_CACHE", "1") == "1"
+
+
+def cached_system(system: str) -> Union[str, list[dict]]:
+    """System prompt as an Anthropic text block with a cache breakpoint (plain string when disabled or empty)."""
+    if not system or not prompt_cache_enabled():
+        return system
+    control: dict[str, Any] = {"type": "ephemeral"}
+    ttl = os.getenv("LLM_PROMPT_CACHE_TTL", "").strip()
+    if ttl:
+        control["ttl"] = ttl
+    return [{"type": "text", "text": system, "cache_control": control}]
+
+
+def _count(usage: Any, name: str) -> int:
+    value = getattr(usage, name, None) if not isinstance(usage, dict) else usage.get(name)
+    return int(value or 0)
+
+
+def record_usage(agent_id: str, response: Any, provider: str = "anthropic") -> dict[str, int]:
+    """Token counts of one response -> metrics; returns them (empty when the response has no usage)."""
+    usage = getattr(response, "usage", None)
+    if usage is None:
+        return {}
+    if provider == "openai":
+        details = getattr(usage, "prompt_tokens_details", None)
+        cache_read = _count(details, "cached_tokens") if details is not None else 0
+        counts = {
+            "uncached": _count(usage, "prompt_tokens") - cache_read,
+            "cache_read": cache_read,
+            "cache_write": 0,
+            "output": _count(usage, "completion_tokens"),
+        }
+    else:
+        # Anthropic : input_tokens exclut déjà les tokens lus / écrits en cache
+        counts = {
+            "uncached": _count(usage, "input_tokens"),
+            "cache_read": _count(usage, "cache_read_input_tokens"),
+            "cache_write": _count(usage, "cache_creation_input_tokens"),
+            "output": _count(usage, "output_tokens"),
+        }
+    labels = {"agent": agent_id, "provider": provider}
+    for kind in ("uncached", "cache_read", "cache_write"):
+        if counts[kind]:
+            _input_tokens.inc(counts[kind], labels={**labels, "kind": kind})
+    _output_tokens.inc(counts["output"], labels=labels)
+    _calls.inc(labels=labels)
+    return counts
@@ -0,0 +1,156 @@
+"""
+Hedged LLM requests for urgency="critical" calls.
+
+A single slow provider response decides the tail latency of a pathological CTG narrative. ``hedged_call``
+sends the request to the routed model. If no answer has come back after that model's observed p90
+(LLMRouter stats, at least LLM_HEDGE_MIN_DELAY_MS), it sends the same request to the next model of
+FALLBACK_CHAIN that resolves to a different API model (LLMRouter.next_in_chain). The first good answer
+wins and the other request is cancelled. If one of the two fails, the call waits for the other. For
+other urgencies, or without a hedge target, it is a plain call. A cancelled attempt never answered, so
+its duration is not a latency: it is counted (obstetric_llm_hedge_cancelled_total) but kept out of the
+p90 / EWMA that time the hedges.
+
+Budget: token bucket, LLM_HEDGE_BUDGET_PCT (5) % of a token per critical request, one token per hedge,
+at most LLM_HEDGE_BURST (10) tokens. Hedges therefore stay under that share of critical traffic over
+time. 0 disables hedging.
+
+Metrics: obstetric_llm_hedge_requests_total (critical calls), obstetric_llm_hedges_total{result=fired |
+budget_exhausted}, obstetric_llm_hedge_wins_total{winner=primary | hedge}. Hedge rate = fired / requests,
+win rate = winner="hedge" / fired.
+"""
+from __future__ import annotations
+
+import asyncio
+import os
+import threading
+import time
+from typing import TYPE_CHECKING, Any, Awaitable, Callable, Optional, TypeVar
+
+from shared.metrics import REGISTRY
+
+if TYPE_CHECKING:
+    from shared.llm_router import LLMRouter
+
+T = TypeVar("T")
+
+_requests = REGISTRY.counter("obstetric_llm_hedge_requests_total", "Critical LLM calls eligible for hedging, by agent")
+_hedges = REGISTRY.counter(
+    "obstetric_llm_hedges_total", "Hedge decisions after the primary p90 elapsed (fired, budget_exhausted), by agent"
+)
+_wins = REGISTRY.counter("obstetric_llm_hedge_wins_total", "Winner of hedged calls (primary, hedge), by agent")
+_cancelled = REGISTRY.counter(
+    "obstetric_llm_hedge_cancelled_total", "Hedged attempts cancelled before answering, by agent and model"
+)
+
+
+class HedgeBudget:
+    """Token bucket bounding hedges to ``percent`` % of critical requests (bursts up to ``burst``)."""
+
+    def __init__(self, percent: Optional[float] = None, burst: Optional[float] = None):
+        self.ratio = (percent if percent is not None else float(os.getenv("LLM_HEDGE_BUDGET_PCT", "5"))) / 100
+        self.burst = burst if burst is not None else float(os.getenv("LLM_HEDGE_BURST", "10"))
+        self._tokens = 0.0
+        self._lock = threading.Lock()
+
+    def on_request(self) -> None:
+        with self._lock:
+            self._tokens = min(self.burst, self._tokens + self.ratio)
+
+    def try_acquire(self) -> bool:
+        with self._lock:
+            if self.ratio <= 0 or self._tokens < 1:
+                return False
+            self._tokens -= 1
+            return True
+
+
+BUDGET = HedgeBudget()
+
+
+def _min_delay_s() -> float:
+    return float(os.getenv("LLM_HEDGE_MIN_DELAY_MS", "100")) / 1000
+
+
+async def _attempt(call: Callable[[str], Awaitable[T]], model_id: str) -> tuple[str, Any, Optional[Exception], float]:
+    """(model_id, result, error, duration_ms) of one call; provider errors are returned, not raised."""
+    start = time.perf_counter()
+    try:
+        result = await call(model_id)
+    except Exception as e:
+        return model_id, None, e, (time.perf_counter() - start) * 1000
+    return model_id, result, None, (time.perf_counter() - start) * 1000
+
+
+async def hedged_call(
+    router: "LLMRouter",
+    model_id: str,
+    call: Callable[[str], Awaitable[T]],
+    *,
+    agent_id: str,
+    urgency: str = "critical",
+    eligible: Optional[Callable[[str], bool]] = None,
+    accept: Callable[[Any], bool] = bool,
+    budget: Optional[HedgeBudget] = None,
+) -> tuple[str, T]:
+    """
+    ``(model_id, result)`` of ``call(model_id)``, hedged on the next FALLBACK_CHAIN model when critical.
+    ``eligible`` filters hedge targets (e.g. provider callable here), ``accept`` rejects empty answers.
+    Durations and outcomes go to router.record_success / record_failure; raises if every attempt failed.
+    """
+    budget = budget or BUDGET
+    hedge_model = router.next_in_chain(model_id, eligible) if urgency == "critical" else None
+    if hedge_model is None:
+        return _settle(router, await _attempt(call, model_id), accept)
+
+    labels = {"agent": agent_id}
+    _requests.inc(labels=labels)
+    budget.on_request()
+    primary = asyncio.ensure_future(_attempt(call, model_id))
+    models = {primary: model_id}
+    pending = {primary}
+    try:
+        delay_s = max(router.quantile_ms(model_id, 0.90) / 1000, _min_delay_s())
+        done, pending = await asyncio.wait(pending, timeout=delay_s)
+        if not done:
+            if budget.try_acquire():
+                _hedges.inc(labels={**labels, "result": "fired"})
+                hedge = asyncio.ensure_future(_attempt(call, hedge_model))
+                models[hedge] = hedge_model
+                pending.add(hedge)
+            else:
+                _hedges.inc(labels={**labels, "result": "budget_exhausted"})
+        error: Optional[Exception] = None
+        while True:
+            for task in done:
+                try:
+                    outcome = _settle(router, task.result(), accept)
+                except Exception as e:
+                    error = e
+                    continue
+                if len(models) > 1:
+                    _wins.inc(labels={**labels, "winner": "primary" if task is primary else "hedge"})
+                return outcome
+            if not pending:
+                raise error or RuntimeError("hedged LLM call failed")
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+    finally:
+        for task in pending:
+            # Perdant annulé : durée tronquée, hors statistiques de latence
+            task.cancel()
+            _cancelled.inc(labels={**labels, "model": models[task]})
+        if pending:
+            await asyncio.gather(*pending, return_exceptions=True)
+
+
+def _settle(
+    router: "LLMRouter", attempt: tuple[str, Any, Optional[Exception], float], accept: Callable[[Any], bool]
+) -> tuple[str, Any]:
+    """Outcome of a finished attempt -> router stats; the result, or raises if it failed or was rejected."""
+    model_id, result, error, duration_ms = attempt
+    if error is None and not accept(result):
+        error = ValueError(f"rejected answer from {model_id}")
+    if error is not None:
+        router.record_failure(model_id, duration_ms)
+        raise error
+    router.record_success(model_id, duration_ms)
+    return model_id, result
@@ -0,0 +1,150 @@
+"""
+Process-wide pooled LLM provider clients (Anthropic, OpenAI), sync and async.
+
+Every agent used to build ``anthropic.Anthropic(...)`` per request, dropping the TLS session and the
+connection pool each time. Here one client per (provider, API key) is built lazily and reused, on
+the SDK's own httpx client (``DefaultHttpxClient``) with pool limits and keep-alive, so consecutive
+calls reuse open TLS connections.
+Async clients are bound to their event loop (an httpx pool cannot cross loops), one per loop.
+
+Env (read at first client creation; ``reset_clients()`` to apply new values):
+  LLM_POOL_MAX_CONNECTIONS (100), LLM_POOL_MAX_KEEPALIVE (20), LLM_POOL_KEEPALIVE_S (60),
+  LLM_TIMEOUT_S (60), LLM_CONNECT_TIMEOUT_S (5), LLM_MAX_RETRIES (2).
+"""
+from __future__ import annotations
+
+import asyncio
+import importlib
+import os
+import threading
+import weakref
+from dataclasses import dataclass
+from typing import Any, Optional
+
+from shared.metrics import REGISTRY
+
+PROVIDERS = ("anthropic", "openai")
+_KEY_ENV = {"anthropic": "ANTHROPIC_API_KEY", "openai": "OPENAI_API_KEY"}
+
+_clients_created = REGISTRY.counter(
+    "obstetric_llm_clients_created_total", "Pooled LLM provider clients built (by provider and mode)"
+)
+
+
+@dataclass(frozen=True)
+class PoolConfig:
+    max_connections: int = 100
+    max_keepalive: int = 20
+    keepalive_s: float = 60.0
+    timeout_s: float = 60.0
+    connect_timeout_s: float = 5.0
+    max_retries: int = 2
+
+    @classmethod
+    def from_env(cls) -> "PoolConfig":
+        return cls(
+            max_connections=int(os.getenv("LLM_POOL_MAX_CONNECTIONS", "100")),
+            max_keepalive=int(os.getenv("LLM_POOL_MAX_KEEPALIVE", "20")),
+            keepalive_s=float(os.getenv("LLM_POOL_KEEPALIVE_S", "60")),
+            timeout_s=float(os.getenv("LLM_TIMEOUT_S", "60")),
+            connect_timeout_s=float(os.getenv("LLM_CONNECT_TIMEOUT_S", "5")),
+            max_retries=int(os.getenv("LLM_MAX_RETRIES", "2")),
+        )
+
+    def httpx_kwargs(self, httpx: Any) -> dict:
+        """Limits / Timeout built with the httpx package the SDK uses (httpx or its fork)."""
+        return {
+            "limits": httpx.Limits(
+                max_connections=self.max_connections,
+                max_keepalive_connections=self.max_keepalive,
+                keepalive_expiry=self.keepalive_s,
+            ),
+            "timeout": httpx.Timeout(self.timeout_s, connect=self.connect_timeout_s),
+        }
+
+
+_lock = threading.Lock()
+_config: Optional[PoolConfig] = None
+_sync: dict[tuple[str, str], Any] = {}
+# loop -> {(provider, key): client} ; l'entrée disparaît avec la boucle
+_async: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, dict[tuple[str, str], Any]]" = weakref.WeakKeyDictionary()
+
+
+def pool_config() -> PoolConfig:
+    global _config
+    if _config is None:
+        _config = PoolConfig.from_env()
+    return _config
+
+
+def _resolve(provider: str, api_key: Optional[str]) -> tuple[str, str]:
+    if provider not in PROVIDERS:
+        raise ValueError(f"unknown LLM provider {provider!r} (expected one of {PROVIDERS})")
+    return provider, api_key if api_key is not None else os.getenv(_KEY_ENV[provider], "")
+
+
+def _build(provider: str, key: str, asynchronous: bool) -> Any:
+    sdk = importlib.import_module(provider)
+    if provider == "anthropic":
+        cls = sdk.AsyncAnthropic if asynchronous else sdk.Anthropic
+    else:
+        cls = sdk.AsyncOpenAI if asynchronous else sdk.OpenAI
+    http_cls = sdk.DefaultAsyncHttpxClient if asynchronous else sdk.DefaultHttpxClient
+    # Les SDK refusent un client d'un autre paquet httpx : Limits/Timeout pris dans le leur
+    httpx = importlib.import_module(http_cls.__mro__[1].__module__.split(".")[0])
+    cfg = pool_config()
+    kwargs = cfg.httpx_kwargs(httpx)
+    client = cls(api_key=key, http_client=http_cls(**kwargs), max_retries=cfg.max_retries, timeout=kwargs["timeout"])
+    _clients_created.inc(labels={"provider": provider, "mode": "async" if asynchronous else "sync"})
+    return client
+
+
+def get_client(provider: str = "anthropic", api_key: Optional[str] = None) -> Any:
+    """Shared sync client (thread-safe, reused across requests). ``api_key`` defaults to the provider env var."""
+    k = _resolve(provider, api_key)
+    client = _sync.get(k)
+    if client is None:
+        with _lock:
+            client = _sync.get(k)
+            if client is None:
+                client = _sync[k] = _build(*k, asynchronous=False)
+    return client
+
+
+def get_async_client(provider: str = "anthropic", api_key: Optional[str] = None) -> Any:
+    """Shared async client for the running event loop (call from a coroutine)."""
+    k = _resolve(provider, api_key)
+    loop = asyncio.get_running_loop()
+    with _lock:
+        per_loop = _async.setdefault(loop, {})
+        client = per_loop.get(k)
+        if client is None:
+            client = per_loop[k] = _build(*k, asynchronous=True)
+    return client
+
+
+def reset_clients() -> None:
+    """Close sync clients and forget every pooled client (tests, key rotation, new pool settings)."""
+    global _config
+    with _lock:
+        sync = list(_sync.values())
+        _sync.clear()
+        _async.clear()
+        _config = None
+    for client in sync:
+        try:
+            client.close()
+        except Exception:
+            pass
+
+
+async def aclose_clients() -> None:
+    """Close the async clients of the running loop (FastAPI shutdown)."""
+    loop = asyncio.get_running_loop()
+    with _lock:
+        clients = list(_async.pop(loop, {}).values())
+    for client in clients:
+        try:
+            await client.close()
+        except Exception:
+            pass
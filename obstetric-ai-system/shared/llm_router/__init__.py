@@ -1,3 +1,4 @@
 from .router import LLMRouter, route_llm
+from .stats import TRACKER, LatencyTracker, ModelStats
 
-__all__ = ["LLMRouter", "route_llm"]
+__all__ = ["LLMRouter", "LatencyTracker", "ModelStats", "TRACKER", "route_llm"]
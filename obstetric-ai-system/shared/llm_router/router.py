@@ -1,9 +1,21 @@
 """
 Multi-LLM router: route to optimal model by task, urgency, complexity.
 Circuit breaker per provider; fallback chain.
+Latency-aware: with a deadline (explicit ``deadline_ms``, or LLM_CRITICAL_DEADLINE_MS for urgency="critical"),
+the routed model is kept only if its observed p95 fits and its error rate stays under
+LLM_ROUTER_MAX_ERROR_RATE; otherwise the next model down FALLBACK_CHAIN that fits is used.
 """
+import os
 from enum import Enum
-from typing import Any, Optional
+from typing import Any, Callable, Optional
+
+from shared.metrics import REGISTRY
+
+from .stats import TRACKER, LatencyTracker
+
+_routes = REGISTRY.counter(
+    "obstetric_llm_routes_total", "Routing decisions by chosen model and reason (preferred, circuit, deadline, best_effort)"
+)
 
 class TaskType(str, Enum):
     REASONING = "reasoning"
@@ -30,15 +42,22 @@ class LLMRouter:
     # Map logical model id to API model string for providers
     API_MODEL_IDS = {
         "claude-opus-4-5": "claude-opus-4-5-20251101",
-        "claude-sonnet-4-5": "claude-sonnet-4-20250514",
+        "claude-sonnet-4-5": "claude-sonnet-4-5-20250929",
         "claude-sonnet-4": "claude-sonnet-4-20250514",
     }
 
-    def __init__(self, failure_threshold: int = 3, reset_timeout_seconds: int = 60):
+    def __init__(
+        self,
+        failure_threshold: int = 3,
+        reset_timeout_seconds: int = 60,
+        tracker: Optional[LatencyTracker] = None,
+    ):
         self._failures: dict[str, int] = {}
         self._circuit_open: dict[str, float] = {}
         self.failure_threshold = failure_threshold
         self.reset_timeout = reset_timeout_seconds
+        self.tracker = tracker or TRACKER
+        self.max_error_rate = float(os.getenv("LLM_ROUTER_MAX_ERROR_RATE", "0.5"))
 
     def route(
         self,
@@ -47,7 +66,13 @@ class LLMRouter:
         has_images: bool = False,
         complexity: str = "medium",
         data_sovereignty_eu: bool = False,
+        deadline_ms: Optional[float] = None,
+        eligible: Optional[Callable[[str], bool]] = None,
     ) -> str:
+        """
+        ``eligible`` restricts the models a deadline fallback may pick (e.g. only providers the
+        calling agent can actually call), so a deadline is never met by a model that will not be called.
+        """
         if data_sovereignty_eu:
             return self._try_model("mistral-large")
         if has_images:
@@ -55,14 +80,80 @@ class LLMRouter:
         if task == TaskType.FHIR_EXTRACTION:
             return self._try_model("granite-medical")
         if task == TaskType.PRENATAL_ANALYSIS:
-            return self._try_model("claude-opus-4-5")
-        if task == TaskType.FAST_ANALYSIS or urgency == "critical":
-            return self._try_model("claude-sonnet-4-5")
-        if task == TaskType.REASONING and complexity == "high":
-            return self._try_model("o3")
-        if task == TaskType.RESEARCH:
-            return self._try_model("claude-opus-4-5")
-        return self._try_model("claude-opus-4-5")
+            preferred = "claude-opus-4-5"
+        elif task == TaskType.FAST_ANALYSIS or urgency == "critical":
+            preferred = "claude-sonnet-4-5"
+        elif task == TaskType.REASONING and complexity == "high":
+            preferred = "o3"
+        else:
+            preferred = "claude-opus-4-5"
+        model_id = self._try_model(preferred)
+        if deadline_ms is None and urgency == "critical":
+            deadline_ms = float(os.getenv("LLM_CRITICAL_DEADLINE_MS", "3000")) or None
+        if deadline_ms is not None:
+            return self._fit_deadline(model_id, deadline_ms, eligible)
+        _routes.inc(labels={"model": model_id, "reason": "preferred" if model_id == preferred else "circuit"})
+        return model_id
+
+    def p95_ms(self, model_id: str) -> float:
+        return self._stats(model_id).quantile(0.95)
+
+    def quantile_ms(self, model_id: str, q: float) -> float:
+        return self._stats(model_id).quantile(q)
+
+    def next_in_chain(self, model_id: str, eligible: Optional[Callable[[str], bool]] = None) -> Optional[str]:
+        """
+        Hedging target: first model after ``model_id`` in FALLBACK_CHAIN with a closed circuit and a
+        different API model (two logical ids on the same API model would just duplicate the request).
+        """
+        chain = self.FALLBACK_CHAIN
+        later = chain[chain.index(model_id) + 1 :] if model_id in chain else chain
+        api_model = self.get_api_model_id(model_id)
+        for m in later:
+            if m == model_id or m in self._circuit_open or self.get_api_model_id(m) == api_model:
+                continue
+            if eligible is None or eligible(m):
+                return m
+        return None
+
+    def latency_stats(self) -> dict[str, dict]:
+        """Observed latency / error rate per model (shared by all routers of the process)."""
+        return self.tracker.snapshot()
+
+    def _stats(self, model_id: str):
+        return self.tracker.get(model_id, self.MODELS.get(model_id, {}).get("latency_ms", 0))
+
+    def _fit_deadline(
+        self, model_id: str, deadline_ms: float, eligible: Optional[Callable[[str], bool]] = None
+    ) -> str:
+        """
+        Best-quality model meeting the deadline: the routed model, then the models after it in
+        FALLBACK_CHAIN (ordered by quality). If none fits, the healthy candidate with the lowest p95.
+        Fallbacks on the routed model's API model are skipped: another logical id would call the same
+        slow model again.
+        """
+        chain = self.FALLBACK_CHAIN
+        later = chain[chain.index(model_id) + 1 :] if model_id in chain else chain
+        api_model = self.get_api_model_id(model_id)
+        candidates = [
+            model_id,
+            *(
+                m
+                for m in later
+                if m != model_id and m not in self._circuit_open and self.get_api_model_id(m) != api_model
+            ),
+        ]
+        if eligible is not None:
+            candidates = [m for m in candidates if eligible(m)] or [model_id]
+        for candidate in candidates:
+            stats = self._stats(candidate)
+            if stats.quantile(0.95) <= deadline_ms and stats.error_rate() <= self.max_error_rate:
+                _routes.inc(labels={"model": candidate, "reason": "preferred" if candidate == model_id else "deadline"})
+                return candidate
+        healthy = [m for m in candidates if self._stats(m).error_rate() <= self.max_error_rate] or candidates
+        best = min(healthy, key=lambda m: self._stats(m).quantile(0.95))
+        _routes.inc(labels={"model": best, "reason": "best_effort"})
+        return best
 
     def get_api_model_id(self, model_id: str) -> str:
         """Resolve logical model id to provider API model string."""
@@ -79,11 +170,14 @@ class LLMRouter:
                 del self._circuit_open[model_id]
         return model_id
 
-    def record_success(self, model_id: str) -> None:
+    def record_success(self, model_id: str, duration_ms: Optional[float] = None) -> None:
+        """Successful call; ``duration_ms`` feeds the latency statistics used by deadline routing."""
         self._failures[model_id] = 0
+        self._stats(model_id).observe(duration_ms, ok=True)
 
-    def record_failure(self, model_id: str) -> None:
+    def record_failure(self, model_id: str, duration_ms: Optional[float] = None) -> None:
         import time
+        self._stats(model_id).observe(duration_ms, ok=False)
         self._failures[model_id] = self._failures.get(model_id, 0) + 1
         if self._failures[model_id] >= self.failure_threshold:
             self._circuit_open[model_id] = time.time()
@@ -94,7 +188,10 @@ def route_llm(
     urgency: str = "normal",
     has_images: bool = False,
     complexity: str = "medium",
+    deadline_ms: Optional[float] = None,
 ) -> str:
     router = LLMRouter()
     task_enum = TaskType(task) if task in [t.value for t in TaskType] else TaskType.DEFAULT
-    return router.route(task=task_enum, urgency=urgency, has_images=has_images, complexity=complexity)
+    return router.route(
+        task=task_enum, urgency=urgency, has_images=has_images, complexity=complexity, deadline_ms=deadline_ms
+    )
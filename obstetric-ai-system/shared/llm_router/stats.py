@@ -0,0 +1,118 @@
+"""
+Observed latency and error rate per model, fed by LLMRouter.record_success / record_failure.
+
+Each model keeps a window of recent calls (LLM_ROUTER_WINDOW, default 200), giving an EWMA latency,
+quantiles (p90 / p95) and the failure ratio. Failed calls count towards latency too, since a timeout
+is the slowest answer there is. Samples older than LLM_ROUTER_STATS_TTL_S (300 s) are dropped. A model
+the router stopped using therefore falls back to its declared ``latency_ms`` prior and gets retried.
+With fewer than LLM_ROUTER_MIN_SAMPLES (5) recent samples, quantiles are max(prior, slowest sample seen).
+"""
+from __future__ import annotations
+
+import math
+import os
+import threading
+import time
+from collections import deque
+from typing import Optional
+
+from shared.metrics import REGISTRY
+
+_request_seconds = REGISTRY.histogram(
+    "obstetric_llm_request_seconds", "LLM call duration by logical model and outcome (ok, error)"
+)
+_p95_ms = REGISTRY.gauge("obstetric_llm_latency_p95_ms", "Observed p95 LLM latency by model (routing input)")
+_ewma_ms = REGISTRY.gauge("obstetric_llm_latency_ewma_ms", "EWMA LLM latency by model")
+_error_rate = REGISTRY.gauge("obstetric_llm_error_rate", "Failed share of recent LLM calls by model")
+
+
+class ModelStats:
+    """Rolling latency / error statistics of one model (thread-safe)."""
+
+    def __init__(self, model_id: str, prior_ms: float, window: int, alpha: float, ttl_s: float, min_samples: int):
+        self.model_id = model_id
+        self.prior_ms = prior_ms
+        self.alpha = alpha
+        self.ttl_s = ttl_s
+        self.min_samples = min_samples
+        self.ewma_ms: Optional[float] = None
+        self._samples: deque[tuple[float, Optional[float], bool]] = deque(maxlen=window)  # (t, ms, failed)
+        self._lock = threading.Lock()
+
+    def observe(self, duration_ms: Optional[float], ok: bool) -> None:
+        with self._lock:
+            self._samples.append((time.monotonic(), duration_ms, not ok))
+            if duration_ms is not None:
+                self.ewma_ms = duration_ms if self.ewma_ms is None else (
+                    self.alpha * duration_ms + (1 - self.alpha) * self.ewma_ms
+                )
+        labels = {"model": self.model_id}
+        if duration_ms is not None:
+            _request_seconds.observe(duration_ms / 1000, labels={**labels, "outcome": "ok" if ok else "error"})
+            _ewma_ms.set(round(self.ewma_ms or 0.0, 1), labels=labels)
+        _p95_ms.set(round(self.quantile(0.95), 1), labels=labels)
+        _error_rate.set(round(self.error_rate(), 4), labels=labels)
+
+    def _recent(self) -> list[tuple[float, Optional[float], bool]]:
+        cutoff = time.monotonic() - self.ttl_s
+        with self._lock:
+            while self._samples and self._samples[0][0] < cutoff:
+                self._samples.popleft()
+            return list(self._samples)
+
+    def latencies(self) -> list[float]:
+        return sorted(ms for _, ms, _ in self._recent() if ms is not None)
+
+    def quantile(self, q: float) -> float:
+        """Latency quantile in ms (nearest rank), or the prior while samples are too few."""
+        values = self.latencies()
+        if len(values) < self.min_samples:
+            return max([self.prior_ms, *values])
+        return values[min(len(values) - 1, max(0, math.ceil(q * len(values)) - 1))]
+
+    def error_rate(self) -> float:
+        samples = self._recent()
+        return sum(failed for _, _, failed in samples) / len(samples) if samples else 0.0
+
+    def snapshot(self) -> dict:
+        values = self.latencies()
+        return {
+            "samples": len(values),
+            "ewma_ms": None if self.ewma_ms is None else round(self.ewma_ms, 1),
+            "p90_ms": round(self.quantile(0.90), 1),
+            "p95_ms": round(self.quantile(0.95), 1),
+            "error_rate": round(self.error_rate(), 4),
+        }
+
+
+class LatencyTracker:
+    """ModelStats per logical model id; one per process by default (TRACKER), shared by every router."""
+
+    def __init__(
+        self,
+        window: Optional[int] = None,
+        alpha: Optional[float] = None,
+        ttl_s: Optional[float] = None,
+        min_samples: Optional[int] = None,
+    ):
+        self.window = window or int(os.getenv("LLM_ROUTER_WINDOW", "200"))
+        self.alpha = alpha or float(os.getenv("LLM_ROUTER_EWMA_ALPHA", "0.2"))
+        self.ttl_s = ttl_s or float(os.getenv("LLM_ROUTER_STATS_TTL_S", "300"))
+        self.min_samples = min_samples or int(os.getenv("LLM_ROUTER_MIN_SAMPLES", "5"))
+        self._models: dict[str, ModelStats] = {}
+        self._lock = threading.Lock()
+
+    def get(self, model_id: str, prior_ms: float = 0.0) -> ModelStats:
+        stats = self._models.get(model_id)
+        if stats is None:
+            with self._lock:
+                stats = self._models.setdefault(
+                    model_id, ModelStats(model_id, prior_ms, self.window, self.alpha, self.ttl_s, self.min_samples)
+                )
+        return stats
+
+    def snapshot(self) -> dict[str, dict]:
+        return {model_id: stats.snapshot() for model_id, stats in list(self._models.items())}
+
+
+TRACKER = LatencyTracker()
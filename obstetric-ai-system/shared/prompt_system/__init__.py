@@ -1,19 +1,30 @@
 from shared.prompt_system.loader import (
     TEMPLATE_BY_SERVICE,
     build_llm_system_prompt,
+    config_version,
     get_global_system_prefix,
     get_metadata,
     get_prompt_template,
     load_config,
+    on_reload,
+    reload_if_changed,
     system_prompt_for_service,
 )
+from shared.prompt_system.compiled import CompiledPrompt, budget_from_env, compile_prompt, estimate_tokens
 
 __all__ = [
+    "CompiledPrompt",
     "TEMPLATE_BY_SERVICE",
+    "budget_from_env",
     "build_llm_system_prompt",
+    "compile_prompt",
+    "config_version",
+    "estimate_tokens",
     "get_global_system_prefix",
     "get_metadata",
     "get_prompt_template",
     "load_config",
+    "on_reload",
+    "reload_if_changed",
     "system_prompt_for_service",
 ]
@@ -0,0 +1,48 @@
+"""
+Taille des prompts système compilés, par service de TEMPLATE_BY_SERVICE.
+
+  python -m shared.prompt_system [--max-tokens N] [--no-global] [--no-cot] [--no-few-shot]
+
+Colonnes : tokens estimés (total et par section), caractères, et ce que le budget a retiré.
+"""
+from __future__ import annotations
+
+import argparse
+
+from shared.prompt_system.compiled import compile_prompt
+from shared.prompt_system.loader import TEMPLATE_BY_SERVICE, config_version
+
+
+def main() -> None:
+    p = argparse.ArgumentParser(prog="python -m shared.prompt_system", description=__doc__.strip().splitlines()[0])
+    p.add_argument("--max-tokens", type=int, default=None, help="Budget (défaut : LLM_PROMPT_MAX_TOKENS, sinon aucun)")
+    p.add_argument("--no-global", action="store_true")
+    p.add_argument("--no-cot", action="store_true")
+    p.add_argument("--no-few-shot", action="store_true")
+    args = p.parse_args()
+
+    print(f"PromptSystem {config_version()}")
+    header = f"{'service':<20} {'template':<28} {'tokens':>6} {'global':>6} {'system':>6} {'cot':>5} {'few':>5} {'chars':>6}  budget"
+    print(header)
+    print("-" * len(header))
+    for service, template in TEMPLATE_BY_SERVICE.items():
+        cp = compile_prompt(
+            template,
+            include_global=not args.no_global,
+            include_chain_of_thought=not args.no_cot,
+            include_few_shot=not args.no_few_shot,
+            max_tokens=args.max_tokens,
+        )
+        sec = dict(cp.section_tokens)
+        note = ""
+        if cp.budget is not None:
+            note = f"{cp.budget}: -{cp.dropped_few_shot} few-shot, -{cp.dropped_cot_steps} CoT steps"
+            note += " (over budget)" if cp.over_budget else ""
+        print(
+            f"{service:<20} {template:<28} {cp.tokens:>6} {sec.get('global', 0):>6} {sec.get('system', 0):>6} "
+            f"{sec.get('chain_of_thought', 0):>5} {sec.get('few_shot', 0):>5} {len(cp.text):>6}  {note}"
+        )
+
+
+if __name__ == "__main__":
+    main()
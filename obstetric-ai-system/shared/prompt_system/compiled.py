@@ -0,0 +1,199 @@
+"""
+Prompts système compilés : assemblés une fois par (template, options, budget, version de config), puis
+servis tels quels (chaîne immuable + estimation de tokens).
+
+Budget (max_tokens passé par l'agent, lu dans <AGENT>_PROMPT_MAX_TOKENS via ``budget_from_env`` ; à défaut
+LLM_PROMPT_MAX_TOKENS) : le préambule global
+et le system prompt du template ne sont jamais coupés. On retire d'abord les exemples few-shot (du
+dernier au premier), puis les étapes du chain-of-thought en partant de la fin. Le résultat est donc
+déterministe pour un budget donné. Si le prompt dépasse encore, il est rendu sans CoT ni few-shot,
+avec ``over_budget=True``.
+
+Tokens : estimation sans tokenizer (~3.5 caractères par token pour ce texte FR/EN médical), à ±15 %.
+Elle sert à comparer les templates et à appliquer le budget, pas à facturer.
+
+Rechargement à chaud : chaque compilation lit un seul état de config (texte et version cohérents) et
+le cache est vidé dès qu'une nouvelle version du JSON est active (``loader.on_reload``).
+"""
+from __future__ import annotations
+
+import math
+import os
+import threading
+from dataclasses import dataclass
+from typing import Optional
+
+from shared.prompt_system.loader import (
+    PromptConfigState,
+    current,
+    get_global_system_prefix,
+    get_prompt_template,
+    on_reload,
+)
+
+CHARS_PER_TOKEN = 3.5
+_COT_HEADER = "--- Raisonnement étape par étape (appliquer avant de répondre) ---\n"
+_FEW_SHOT_HEADER = "--- Exemples few-shot (style attendu) ---"
+
+
+def estimate_tokens(text: str) -> int:
+    return math.ceil(len(text) / CHARS_PER_TOKEN) if text else 0
+
+
+@dataclass(frozen=True)
+class CompiledPrompt:
+    template_key: str
+    text: str
+    tokens: int
+    config_version: str
+    section_tokens: tuple[tuple[str, int], ...]  # (global | system | chain_of_thought | few_shot, tokens)
+    budget: Optional[int] = None
+    dropped_few_shot: int = 0
+    dropped_cot_steps: int = 0
+    over_budget: bool = False
+
+    @property
+    def truncated(self) -> bool:
+        return bool(self.dropped_few_shot or self.dropped_cot_steps)
+
+    def __str__(self) -> str:
+        return self.text
+
+
+def _cot_steps(cot: str) -> tuple[list[str], str]:
+    """Étapes du CoT et leur séparateur (lignes, sinon chaîne « 1. … → 2. … »)."""
+    if "\n" in cot:
+        return cot.split("\n"), "\n"
+    return cot.split(" → "), " → "
+
+
+def _few_shot_lines(examples: list, max_few_shot_chars: int) -> list[str]:
+    lines = []
+    for ex in examples[:2]:
+        if not isinstance(ex, dict):
+            continue
+        inp = str(ex.get("input", ""))[:400]
+        out = str(ex.get("output", ""))[: max_few_shot_chars // 2]
+        lines.append(f"Entrée: {inp}\nSortie type: {out}")
+    return lines
+
+
+def _render(
+    head: list[tuple[str, str]], cot: list[str], sep: str, few_shot: Optional[list[str]]
+) -> tuple[str, tuple[tuple[str, int], ...]]:
+    sections = list(head)
+    if cot:
+        sections.append(("chain_of_thought", _COT_HEADER + sep.join(cot)))
+    # Liste vide (aucun exemple exploitable) : en-tête seul, comme l'assemblage historique
+    if few_shot is not None:
+        sections.append(("few_shot", "\n".join([_FEW_SHOT_HEADER, *few_shot])))
+    return "\n\n".join(text for _, text in sections), tuple((name, estimate_tokens(text)) for name, text in sections)
+
+
+_MAX_COMPILED = 256
+_compiled: dict[tuple, CompiledPrompt] = {}
+_compiled_lock = threading.Lock()
+_hits = _misses = 0
+
+
+def _compile(
+    state: PromptConfigState,
+    template_key: str,
+    include_global: bool,
+    include_chain_of_thought: bool,
+    include_few_shot: bool,
+    max_few_shot_chars: int,
+    max_tokens: Optional[int],
+) -> CompiledPrompt:
+    config, version = state.config, state.version
+    head: list[tuple[str, str]] = []
+    gp = get_global_system_prefix(config) if include_global else ""
+    if gp:
+        head.append(("global", gp))
+    pt = get_prompt_template(template_key, config)
+    if not pt:
+        # Template inconnu : préambule global seul (même repli que l'assemblage historique)
+        text = gp if gp else get_global_system_prefix(config)
+        return CompiledPrompt(
+            template_key, text, estimate_tokens(text), version, (("global", estimate_tokens(text)),), max_tokens
+        )
+    sp = (pt.get("system_prompt") or "").strip()
+    if sp:
+        head.append(("system", sp))
+    cot_text = (pt.get("chain_of_thought") or "").strip() if include_chain_of_thought else ""
+    cot, sep = _cot_steps(cot_text) if cot_text else ([], "\n")
+    fse = pt.get("few_shot_examples") if include_few_shot else None
+    few_shot = _few_shot_lines(fse, max_few_shot_chars) if isinstance(fse, list) and fse else None
+
+    n_cot, kept_shots = len(cot), few_shot
+    text, sections = _render(head, cot, sep, few_shot)
+    if max_tokens is not None:
+        while estimate_tokens(text) > max_tokens and (kept_shots is not None or n_cot):
+            if kept_shots is not None:
+                kept_shots = kept_shots[:-1] or None  # le dernier exemple part avec l'en-tête
+            else:
+                n_cot -= 1
+            text, sections = _render(head, cot[:n_cot], sep, kept_shots)
+    tokens = estimate_tokens(text)
+    return CompiledPrompt(
+        template_key=template_key,
+        text=text,
+        tokens=tokens,
+        config_version=version,
+        section_tokens=sections,
+        budget=max_tokens,
+        dropped_few_shot=len(few_shot or ()) - len(kept_shots or ()),
+        dropped_cot_steps=len(cot) - n_cot,
+        over_budget=max_tokens is not None and tokens > max_tokens,
+    )
+
+
+def budget_from_env(var: str) -> Optional[int]:
+    """Budget de tokens lu dans ``var`` (entier), None si absent ou invalide."""
+    raw = os.getenv(var, "").strip()
+    return int(raw) if raw.isdigit() else None
+
+
+def default_budget() -> Optional[int]:
+    return budget_from_env("LLM_PROMPT_MAX_TOKENS")
+
+
+def compile_prompt(
+    template_key: str,
+    *,
+    include_global: bool = True,
+    include_chain_of_thought: bool = True,
+    include_few_shot: bool = True,
+    max_few_shot_chars: int = 1200,
+    max_tokens: Optional[int] = None,
+) -> CompiledPrompt:
+    """Prompt compilé (mis en cache) ; ``max_tokens`` None -> LLM_PROMPT_MAX_TOKENS, sinon sans budget."""
+    global _hits, _misses
+    state = current()
+    budget = max_tokens if max_tokens is not None else default_budget()
+    key = (state.version, template_key, include_global, include_chain_of_thought, include_few_shot, max_few_shot_chars, budget)
+    hit = _compiled.get(key)
+    if hit is not None:
+        _hits += 1
+        return hit
+    _misses += 1
+    compiled = _compile(
+        state, template_key, include_global, include_chain_of_thought, include_few_shot, max_few_shot_chars, budget
+    )
+    with _compiled_lock:
+        if len(_compiled) >= _MAX_COMPILED:
+            _compiled.clear()
+        _compiled[key] = compiled
+    return compiled
+
+
+def clear_compiled(_state: Optional[PromptConfigState] = None) -> None:
+    with _compiled_lock:
+        _compiled.clear()
+
+
+def compiled_cache_info() -> dict[str, int]:
+    return {"hits": _hits, "misses": _misses, "size": len(_compiled)}
+
+
+on_reload(clear_compiled)
@@ -1,22 +1,139 @@
 """
 Charge le Prompt System obstétrical v2 (JSON export du notebook PROMPTSYSTEM_AMPLIFIE).
 Découple les prompts agents / assistant de la logique métier.
+
+Rechargement à chaud : un thread de fond compare mtime/taille du JSON toutes les PROMPT_SYSTEM_RELOAD_S
+secondes (défaut 5, 0 = désactivé). Si le contenu change (SHA-256), il le relit et le valide, puis
+remplace l'état d'un bloc (config + version), sans verrou côté requêtes. Un JSON invalide est ignoré
+et l'ancienne config reste active. La version (``<metadata.version>+<sha12>``) sert de clé aux caches
+dérivés (prompts compilés, narratifs) ; les abonnés ``on_reload`` sont prévenus.
 """
 from __future__ import annotations
 
+import hashlib
 import json
-from functools import lru_cache
+import logging
+import os
+import threading
+import time
+from dataclasses import dataclass
 from pathlib import Path
-from typing import Any
+from typing import Any, Callable, Optional
+
+from shared.metrics import REGISTRY
 
 _JSON_PATH = Path(__file__).with_name("prompt_system_v2.json")
+_log = logging.getLogger(__name__)
+_reloads = REGISTRY.counter(
+    "obstetric_prompt_system_reloads_total", "Prompt system config reload attempts by result (applied, invalid)"
+)
+
+
+@dataclass(frozen=True)
+class PromptConfigState:
+    config: dict[str, Any]
+    version: str
+    digest: str
+    mtime_ns: int
+    size: int
+    loaded_at: float
+
+
+_state: Optional[PromptConfigState] = None
+_state_lock = threading.Lock()
+_listeners: list[Callable[[PromptConfigState], None]] = []
+_watcher: Optional[threading.Thread] = None
+
+
+def _read_state(path: Path) -> PromptConfigState:
+    """Lit et valide le JSON ; ValueError si invalide."""
+    if not path.is_file():
+        return PromptConfigState({}, "none", "none", 0, 0, time.time())
+    st = path.stat()
+    raw = path.read_bytes()
+    config = json.loads(raw.decode("utf-8"))
+    if not isinstance(config, dict):
+        raise ValueError("prompt system JSON must be an object")
+    digest = hashlib.sha256(raw).hexdigest()[:12]
+    meta = config.get("metadata") or {}
+    return PromptConfigState(config, f"{meta.get('version', '?')}+{digest}", digest, st.st_mtime_ns, st.st_size, time.time())
+
+
+def current() -> PromptConfigState:
+    """État actif (chargé au premier appel, qui démarre aussi la surveillance du fichier)."""
+    global _state
+    state = _state
+    if state is None:
+        with _state_lock:
+            if _state is None:
+                _state = _read_state(_JSON_PATH)
+            state = _state
+        _ensure_watcher()
+    return state
+
+
+def reload_if_changed(force: bool = False) -> bool:
+    """Recharge si le fichier a changé ; True si une nouvelle version est active."""
+    global _state
+    old = current()
+    try:
+        st = _JSON_PATH.stat()
+    except FileNotFoundError:
+        return False
+    if not force and (st.st_mtime_ns, st.st_size) == (old.mtime_ns, old.size):
+        return False
+    try:
+        new = _read_state(_JSON_PATH)
+    except (OSError, ValueError) as e:
+        _reloads.inc(labels={"result": "invalid"})
+        _log.warning("prompt system reload skipped, keeping %s: %s", old.version, e)
+        return False
+    with _state_lock:
+        if new.digest == _state.digest:
+            _state = PromptConfigState(_state.config, _state.version, _state.digest, new.mtime_ns, new.size, _state.loaded_at)
+            return False
+        _state = new
+    _reloads.inc(labels={"result": "applied"})
+    _log.info("prompt system reloaded: %s -> %s", old.version, new.version)
+    for callback in list(_listeners):
+        try:
+            callback(new)
+        except Exception:
+            _log.exception("prompt system reload listener failed")
+    return True
+
+
+def on_reload(callback: Callable[[PromptConfigState], None]) -> None:
+    _listeners.append(callback)
+
+
+def _watch(interval_s: float) -> None:
+    while True:
+        time.sleep(interval_s)
+        try:
+            reload_if_changed()
+        except Exception:
+            _log.exception("prompt system reload check failed")
+
+
+def _ensure_watcher() -> None:
+    global _watcher
+    interval_s = float(os.getenv("PROMPT_SYSTEM_RELOAD_S", "5"))
+    if interval_s <= 0 or _watcher is not None:
+        return
+    with _state_lock:
+        if _watcher is None:
+            _watcher = threading.Thread(target=_watch, args=(interval_s,), name="prompt-system-reload", daemon=True)
+            _watcher.start()
 
 
-@lru_cache(maxsize=1)
 def load_config() -> dict[str, Any]:
-    if not _JSON_PATH.is_file():
-        return {}
-    return json.loads(_JSON_PATH.read_text(encoding="utf-8"))
+    return current().config
+
+
+def config_version() -> str:
+    """Version active du prompt system : ``<metadata.version>+<sha256[:12] du JSON>``."""
+    return current().version
 
 
 def get_metadata() -> dict[str, Any]:
@@ -27,16 +144,16 @@ def get_globals() -> dict[str, Any]:
     return load_config().get("globals") or {}
 
 
-def get_prompt_template(template_key: str) -> dict[str, Any] | None:
-    spec = load_config().get("spec") or {}
+def get_prompt_template(template_key: str, config: Optional[dict[str, Any]] = None) -> dict[str, Any] | None:
+    spec = (config if config is not None else load_config()).get("spec") or {}
     templates = spec.get("prompt_templates") or {}
     t = templates.get(template_key)
     return t if isinstance(t, dict) else None
 
 
-def get_global_system_prefix() -> str:
+def get_global_system_prefix(config: Optional[dict[str, Any]] = None) -> str:
     """Préambule commun (usage prévu, conformité, langue, FHIR)."""
-    c = load_config()
+    c = config if config is not None else load_config()
     if not c:
         return ""
     m = c.get("metadata") or {}
@@ -65,35 +182,19 @@ def build_llm_system_prompt(
     include_chain_of_thought: bool = True,
     include_few_shot: bool = True,
     max_few_shot_chars: int = 1200,
+    max_tokens: Optional[int] = None,
 ) -> str:
-    """Assemble system prompt pour Anthropic/OpenAI (system role)."""
-    chunks: list[str] = []
-    if include_global:
-        gp = get_global_system_prefix()
-        if gp:
-            chunks.append(gp)
-    pt = get_prompt_template(template_key)
-    if not pt:
-        return "\n\n".join(chunks) if chunks else get_global_system_prefix()
-    sp = (pt.get("system_prompt") or "").strip()
-    if sp:
-        chunks.append(sp)
-    if include_chain_of_thought:
-        cot = (pt.get("chain_of_thought") or "").strip()
-        if cot:
-            chunks.append("--- Raisonnement étape par étape (appliquer avant de répondre) ---\n" + cot)
-    if include_few_shot:
-        fse = pt.get("few_shot_examples")
-        if isinstance(fse, list) and fse:
-            lines = ["--- Exemples few-shot (style attendu) ---"]
-            for ex in fse[:2]:
-                if not isinstance(ex, dict):
-                    continue
-                inp = str(ex.get("input", ""))[:400]
-                out = str(ex.get("output", ""))[: max_few_shot_chars // 2]
-                lines.append(f"Entrée: {inp}\nSortie type: {out}")
-            chunks.append("\n".join(lines))
-    return "\n\n".join(chunks)
+    """System prompt pour Anthropic/OpenAI (system role), compilé une fois puis servi depuis le cache."""
+    from shared.prompt_system.compiled import compile_prompt
+
+    return compile_prompt(
+        template_key,
+        include_global=include_global,
+        include_chain_of_thought=include_chain_of_thought,
+        include_few_shot=include_few_shot,
+        max_few_shot_chars=max_few_shot_chars,
+        max_tokens=max_tokens,
+    ).text
 
 
 # Clés YAML `prompt_templates` → usage code court
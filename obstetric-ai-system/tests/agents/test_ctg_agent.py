@@ -1,4 +1,6 @@
 """Unit tests for CTG Monitor Agent."""
+import asyncio
+import numpy as np
 import pytest
 from fastapi.testclient import TestClient
 import sys
@@ -6,9 +8,21 @@ from pathlib import Path
 root = Path(__file__).resolve().parent.parent.parent
 sys.path.insert(0, str(root))
 from agents.ctg_monitor.src.main import app
+from tests.conftest import fetal_health_rows
 
 client = TestClient(app)
 
+
+def _patch_llm(monkeypatch, fn):
+    """Remplace l'appel LLM, synchrone (jobs de fond) et async (endpoints)."""
+    from agents.ctg_monitor.src import main as ctg_main
+
+    async def fn_async(*args):
+        return fn(*args)
+
+    monkeypatch.setattr(ctg_main, "_llm_analyze", fn)
+    monkeypatch.setattr(ctg_main, "_llm_analyze_async", fn_async)
+
 def test_health():
     r = client.get("/health")
     assert r.status_code == 200
@@ -63,3 +77,464 @@ def test_features_21_invokes_tabular_model_when_weights_present():
     data = r.json()
     assert data["classification"] in ["Normal", "Suspect", "Pathologique"]
     assert 0.0 <= data["confidence"] <= 1.0
+
+
+def test_figo_rules_fallback_without_model(monkeypatch):
+    """Sans poids : règles FIGO sur signal_60s, sinon sur les champs résumés (plus de Normal constant)."""
+    import agents.ctg_monitor.src.main as ctg_main
+
+    monkeypatch.setattr(ctg_main.ml_ctg, "model_available", lambda: False)
+    _patch_llm(monkeypatch, lambda b, s, c, conf: ctg_main._template_narrative(b, s, c))
+    clean_fhr, repairs = ctg_main.signal_quality.clean_fhr, []
+    monkeypatch.setattr(ctg_main.signal_quality, "clean_fhr", lambda fhr: repairs.append(1) or clean_fhr(fhr))
+    flat = (140 + np.random.default_rng(0).normal(0, 0.3, 240)).round(1).tolist()
+    cases = [
+        ({"baseline_bpm": 140, "stv_ms": 12}, "Normal"),
+        ({"baseline_bpm": 140, "stv_ms": 2.0}, "Suspect"),
+        ({"baseline_bpm": 140, "stv_ms": 12, "signal_60s": _synthetic_fhr(60)}, "Normal"),
+        ({"baseline_bpm": 140, "stv_ms": 12, "signal_60s": flat}, "Suspect"),
+    ]
+    for body, expected in cases:
+        data = client.post("/api/ctg-monitor", json=body).json()
+        assert data["classification"] == expected, body
+        assert data["hitl_required"] == (expected != "Normal")
+    r = client.post("/api/ctg-monitor/batch", json={"items": [body for body, _ in cases]})
+    assert [out["classification"] for out in r.json()["results"]] == [expected for _, expected in cases]
+    # Une réparation par tracé : le gate qualité et les règles FIGO partagent le CleanedTrace
+    assert len(repairs) == 4
+
+
+def test_signal_quality_reported_and_low_quality_gated(monkeypatch):
+    """signal_60s réparé avant analyse ; ratio dans CTGOutput ; tracé trop dégradé : 422, sans inférence."""
+    import agents.ctg_monitor.src.main as ctg_main
+
+    _patch_llm(monkeypatch, lambda b, s, c, conf: ctg_main._template_narrative(b, s, c))
+    calls: list = []
+    monkeypatch.setattr(ctg_main, "_cached_predict", lambda item: calls.append(item) or (0, 0.9, "x", None, False))
+    signal = _synthetic_fhr(60)
+    signal[100:120] = [0.0] * 20  # lacune 5 s interpolée
+    r = client.post("/api/ctg-monitor", json={"baseline_bpm": 140, "stv_ms": 12, "signal_60s": signal})
+    assert r.status_code == 200 and r.json()["signal_quality"] == pytest.approx(1 - 10 / 240, abs=1e-3)
+    assert client.post("/api/ctg-monitor", json={"baseline_bpm": 140, "stv_ms": 12}).json()["signal_quality"] is None
+    r = client.post("/api/ctg-monitor", json={"baseline_bpm": 140, "stv_ms": 12, "signal_60s": signal[:60] + [0.0] * 180})
+    assert r.status_code == 422 and "signal quality" in r.json()["detail"]
+    assert len(calls) == 2
+
+
+def test_packed_signal_encodings_match_json_list(monkeypatch):
+    """base64 int16x4 / float32 et msgpack bin : même tracé décodé (frombuffer) que la liste JSON."""
+    import agents.ctg_monitor.src.main as ctg_main
+    import signal_codec
+
+    _patch_llm(monkeypatch, lambda b, s, c, conf: ctg_main._template_narrative(b, s, c))
+    signal = np.round(np.asarray(_synthetic_fhr(60)) * 4) / 4  # exact en int16 x4
+    base = {"baseline_bpm": 140, "stv_ms": 12}
+    ref = client.post("/api/ctg-monitor", json={**base, "signal_60s": signal.tolist()}).json()
+    for encoding in ("int16x4", "float32"):
+        item = ctg_main.CTGInput(**base, signal_packed=signal_codec.encode(signal, encoding), signal_encoding=encoding)
+        np.testing.assert_allclose(ctg_main._signal_arrays(item)[0], signal, atol=1e-4)
+        out = client.post("/api/ctg-monitor", json=item.model_dump(exclude_none=True)).json()
+        assert (out["classification"], out["signal_quality"]) == (ref["classification"], ref["signal_quality"])
+    r = client.post("/api/ctg-monitor", json={**base, "signal_packed": "%%%"})
+    assert r.status_code == 400 and "base64" in r.json()["detail"]
+    r = client.post("/api/ctg-monitor", json={**base, "signal_packed": "AAAA", "signal_60s": [140.0]})
+    assert r.status_code == 400
+
+    msgpack = pytest.importorskip("msgpack")
+    body = msgpack.packb({**base, "signal_packed": signal_codec.encode(signal, as_base64=False)})
+    r = client.post("/api/ctg-monitor", content=body, headers={"content-type": "application/x-msgpack"})
+    assert r.status_code == 200 and r.json()["classification"] == ref["classification"]
+
+
+def _fixture_rows(n: int) -> list[list[float]]:
+    return fetal_health_rows(n)[0]
+
+
+def test_batch_matches_single_predictions_in_order(random_ctg_model, monkeypatch):
+    from agents.ctg_monitor.src import main as ctg_main
+
+    _patch_llm(monkeypatch, lambda b, s, c, conf: ctg_main._template_narrative(b, s, c))
+    monkeypatch.setattr(ctg_main, "_result_cache", None)  # comparer deux vrais forwards
+    rows = _fixture_rows(8)
+    items = [{"baseline_bpm": 130, "stv_ms": 1.0, "features_21": f} for f in rows]
+    items.insert(3, {"baseline_bpm": 140, "stv_ms": 12})
+    r = client.post("/api/ctg-monitor/batch", json={"items": items})
+    assert r.status_code == 200
+    results = r.json()["results"]
+    assert len(results) == len(items)
+    for item, out in zip(items, results):
+        single = client.post("/api/ctg-monitor", json=item).json()
+        assert out["classification"] == single["classification"]
+        assert out["confidence"] == pytest.approx(single["confidence"], abs=1e-5)
+        assert out["fhir_observation"]["valueString"] == out["classification"]
+
+
+def test_batch_narratives_bounded_concurrency(monkeypatch):
+    import asyncio
+    from agents.ctg_monitor.src import main as ctg_main
+
+    active, peak = [0], [0]
+
+    async def slow_llm(b, s, c, conf):
+        active[0] += 1
+        peak[0] = max(peak[0], active[0])
+        await asyncio.sleep(0.01)
+        active[0] -= 1
+        return ctg_main._template_narrative(b, s, c)
+
+    monkeypatch.setattr(ctg_main, "_llm_analyze_async", slow_llm)
+    monkeypatch.setattr(ctg_main, "_narrative_cache", None)
+    monkeypatch.setattr(ctg_main, "_BATCH_LLM_CONCURRENCY", 3)
+    items = [{"baseline_bpm": 120 + i, "stv_ms": 8.0} for i in range(12)]
+    r = client.post("/api/ctg-monitor/batch", json={"items": items, "include_narrative": True})
+    assert r.status_code == 200 and len(r.json()["results"]) == 12
+    assert peak[0] == 3
+
+
+def test_batch_rejects_invalid_item_with_index():
+    r = client.post("/api/ctg-monitor/batch", json={"items": [
+        {"baseline_bpm": 140, "stv_ms": 12},
+        {"baseline_bpm": 140, "stv_ms": 12, "features_21": [0.0] * 5},
+    ]})
+    assert r.status_code == 400
+    assert "items[1]" in r.json()["detail"]
+
+
+def test_microbatcher_coalesces_concurrent_rows():
+    import threading
+    import time as _time
+
+    import batcher
+
+    calls: list[int] = []
+
+    def slow_double(rows):
+        calls.append(len(rows))
+        _time.sleep(0.02)
+        return [r * 2 for r in rows]
+
+    mb = batcher.MicroBatcher(slow_double, max_batch_size=8, max_wait_ms=50)
+    results: dict[int, int] = {}
+
+    def worker(i: int) -> None:
+        results[i] = mb(i, timeout=5)
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(16)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert results == {i: i * 2 for i in range(16)}
+    assert max(calls) > 1 and sum(calls) == 16
+
+
+def test_microbatcher_propagates_errors():
+    import batcher
+
+    def boom(rows):
+        raise ValueError("bad batch")
+
+    mb = batcher.MicroBatcher(boom, max_wait_ms=0)
+    with pytest.raises(ValueError):
+        mb(1, timeout=5)
+
+
+def test_metrics_exposes_batching_histograms(random_ctg_model):
+    feat = _fixture_rows(1)[0]
+    client.post("/api/ctg-monitor/batch", json={"items": [{"baseline_bpm": 130, "stv_ms": 1.0, "features_21": feat}]})
+    from agents.ctg_monitor.src import main as ctg_main
+
+    if ctg_main._batcher is not None:
+        ctg_main._batcher(feat, timeout=30)
+    r = client.get("/metrics")
+    assert r.status_code == 200
+    assert "obstetric_ctg_batch_size_bucket" in r.text
+    assert "obstetric_ctg_forward_seconds_count" in r.text
+
+
+def test_ready_after_warm_up(random_ctg_model):
+    import time as _time
+
+    from agents.ctg_monitor.src import main as ctg_main
+
+    ctg_main._readiness.update(ready=False, detail="starting")
+    assert client.get("/ready").status_code == 503
+    with TestClient(app) as c:
+        deadline = _time.time() + 60
+        while c.get("/ready").status_code != 200 and _time.time() < deadline:
+            _time.sleep(0.05)
+        r = c.get("/ready")
+        assert r.status_code == 200
+        assert r.json()["detail"] == "model loaded"
+
+
+def test_concurrent_cold_load_builds_model_once(random_ctg_model, monkeypatch):
+    import threading
+
+    import ml_ctg
+    from shared.ctg_model import classifier
+
+    built: list[int] = []
+    real_build = classifier.build_ctg_classifier
+
+    def counting_build(**kw):
+        built.append(1)
+        return real_build(**kw)
+
+    monkeypatch.setattr(classifier, "build_ctg_classifier", counting_build)
+    threads = [threading.Thread(target=ml_ctg._load) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert ml_ctg.is_loaded()
+    assert len(built) == 1
+
+
+def test_repeated_features_served_from_cache_and_audited(random_ctg_model, monkeypatch, tmp_path):
+    import result_cache
+    from agents.ctg_monitor.src import main as ctg_main
+
+    llm_calls: list[int] = []
+
+    def fake_llm(b, s, c, conf):
+        llm_calls.append(1)
+        return ctg_main._template_narrative(b, s, c)
+
+    _patch_llm(monkeypatch, fake_llm)
+    monkeypatch.setattr(ctg_main, "_result_cache", result_cache.ResultCache("prediction", 16, 60))
+    monkeypatch.setattr(ctg_main, "_narrative_cache", result_cache.ResultCache("narrative", 16, 60))
+    monkeypatch.setattr(ctg_main.audit, "storage_path", str(tmp_path / "audit"))
+    entries: list[dict] = []
+    real_log = ctg_main.audit.log_event
+    monkeypatch.setattr(ctg_main.audit, "log_event", lambda **kw: entries.append(real_log(**kw)) or entries[-1])
+
+    feat = _fixture_rows(1)[0]
+    item = {"baseline_bpm": 130, "stv_ms": 1.0, "features_21": feat}
+    first = client.post("/api/ctg-monitor", json=item).json()
+    # Bruit float en dessous de l'arrondi : même clé
+    second = client.post("/api/ctg-monitor", json={**item, "features_21": [v + 1e-9 for v in feat]}).json()
+    assert second["classification"] == first["classification"]
+    assert second["confidence"] == first["confidence"]
+    assert len(llm_calls) == 1
+    assert "cache" not in entries[0]
+    assert entries[1]["cache"] == "hit" and entries[1]["narrative_cache"] == "hit"
+    assert entries[1]["previous_hash"] == entries[0]["hash"]
+    assert first["prompt_version"] == ctg_main.config_version()
+    assert entries[0]["model_version"].endswith(";prompt=" + first["prompt_version"])
+    # Prompt system rechargé (nouvelle version) : le narratif en cache n'est plus servi
+    monkeypatch.setattr(ctg_main, "config_version", lambda: "2.0.0+reloaded")
+    third = client.post("/api/ctg-monitor", json=item).json()
+    assert len(llm_calls) == 2 and third["prompt_version"] == "2.0.0+reloaded"
+    assert entries[-1]["narrative_cache"] == "miss"
+    r = client.post("/api/ctg-monitor/batch", json={"items": [item, {**item, "baseline_bpm": 131}]}).json()
+    assert all(out["classification"] == first["classification"] for out in r["results"])
+    assert entries[-1]["cache"] == "hit"
+    assert 'obstetric_ctg_cache_requests_total{cache="prediction",result="hit"}' in client.get("/metrics").text
+
+
+def test_async_narrative_job_polled_streamed_and_chained_in_audit(monkeypatch, tmp_path):
+    import json
+    import threading
+    import result_cache
+    from agents.ctg_monitor.src import main as ctg_main
+
+    release = threading.Event()
+
+    def slow_llm(b, s, c, conf):
+        release.wait(5)
+        return "LLM: " + ctg_main._template_narrative(b, s, c)
+
+    _patch_llm(monkeypatch, slow_llm)
+    monkeypatch.setattr(ctg_main, "_narrative_cache", result_cache.ResultCache("narrative", 16, 60))
+    monkeypatch.setattr(ctg_main.audit, "storage_path", str(tmp_path / "audit"))
+    entries: list[dict] = []
+    real_log = ctg_main.audit.log_event
+    monkeypatch.setattr(ctg_main.audit, "log_event", lambda **kw: entries.append(real_log(**kw)) or entries[-1])
+
+    r = client.post("/api/ctg-monitor?narrative=async", json={"baseline_bpm": 140, "stv_ms": 12})
+    assert r.status_code == 200
+    out = r.json()
+    job_id = out["narrative_job_id"]
+    assert job_id and out["classification"] in ("Normal", "Suspect", "Pathologique") and out["fhir_observation"]
+    assert not out["narrative"].startswith("LLM: ")  # provisoire (template), le LLM est encore bloqué
+    assert client.get(f"/api/ctg-monitor/narrative/{job_id}").json()["status"] in ("pending", "running")
+    assert entries[0]["narrative_job_id"] == job_id and entries[0]["narrative"] == "pending"
+
+    release.set()
+    with client.stream("GET", f"/api/ctg-monitor/narrative/{job_id}/events") as stream:
+        assert stream.headers["content-type"].startswith("text/event-stream")
+        body = "".join(stream.iter_text())
+    assert "event: narrative" in body
+    pushed = json.loads(body.split("data: ", 1)[1].split("\n", 1)[0])
+    job = client.get(f"/api/ctg-monitor/narrative/{job_id}").json()
+    assert job == pushed and job["status"] == "done" and job["narrative"].startswith("LLM: ")
+    # Chaîne d'audit : entrée narrative liée à la classification
+    assert entries[1]["action"] == "narrative" and entries[1]["narrative_job_id"] == job_id
+    assert entries[1]["parent_hash"] == entries[0]["hash"] == job["parent_hash"]
+    assert entries[1]["previous_hash"] == entries[0]["hash"] and job["audit_hash"] == entries[1]["hash"]
+    assert client.get("/api/ctg-monitor/narrative/unknown").status_code == 404
+
+    # Audit en échec : le job créé pour la requête est retiré du store (pas de job orphelin)
+    def failing_log(**kw):
+        raise OSError("audit volume full")
+
+    monkeypatch.setattr(ctg_main.audit, "log_event", failing_log)
+    size = len(ctg_main._narrative_jobs)
+    with pytest.raises(OSError):
+        client.post("/api/ctg-monitor?narrative=async", json={"baseline_bpm": 141, "stv_ms": 12})
+    assert len(ctg_main._narrative_jobs) == size
+
+
+def test_result_cache_lru_ttl_and_model_change(monkeypatch):
+    import result_cache
+
+    cache = result_cache.ResultCache("test", max_entries=2, ttl_s=60)
+    cache.bind("model-a")
+    k1, k2, k3 = (cache.key([float(i)] * 21) for i in range(3))
+    cache.put(k1, "a")
+    cache.put(k2, "b")
+    assert cache.get(k1) == "a"  # k1 devient le plus récent
+    cache.put(k3, "c")
+    assert cache.get(k2) is None and cache.get(k1) == "a"
+    cache.bind("model-b")
+    assert len(cache) == 0 and cache.key([0.0] * 21) != k1
+    now = result_cache.time.monotonic()
+    cache.put(k1, "a")
+    monkeypatch.setattr(result_cache.time, "monotonic", lambda: now + 61)
+    assert cache.get(k1) is None
+
+
+def _synthetic_fhr(seconds: float, baseline: float = 140.0, seed: int = 0) -> list[float]:
+    rng = np.random.default_rng(seed)
+    n = int(seconds * 4)
+    return (baseline + 5 * np.sin(np.arange(n) / 6.0) + rng.normal(0, 1.5, n)).round(1).tolist()
+
+
+def test_session_registry_ring_matches_naive_window():
+    import sessions
+
+    reg = sessions.SessionRegistry(max_beds=2, window_s=12.5, hop_s=5)
+    rng = np.random.default_rng(0)
+    history = np.empty((2, 0), dtype=np.float32)
+    for n in (7, 50, 3, 120, 1, 49):
+        block = (140 + rng.standard_normal((2, n))).astype(np.float32)
+        reg.push("bed-1", block[0], block[1])
+        history = np.concatenate((history, block), axis=1)
+    windows, quality = reg.windows(np.array([reg.slot("bed-1")]))
+    np.testing.assert_array_equal(windows[0], history[:, -50:])
+    assert quality.min() == 1.0
+    assert reg.total[reg.slot("bed-1")] == history.shape[1]
+
+
+def test_session_registry_sweep_batches_due_beds_and_evicts_idle():
+    import sessions
+
+    reg = sessions.SessionRegistry(max_beds=3, window_s=60, hop_s=15, idle_timeout_s=60)
+    calls: list[int] = []
+
+    def classify(windows, quality):
+        calls.append(len(windows))
+        return [{"ml_class": 2, "confidence": 0.9, "escalation_level": 2}] * len(windows)
+
+    reg.push("bed-1", np.full(240, 140.0))
+    reg.push("bed-2", np.full(200, 140.0))
+    reg.push("bed-3", np.full(300, 140.0))
+    out = dict(reg.sweep(classify))
+    assert calls == [2] and set(out) == {"bed-1", "bed-3"}
+    assert out["bed-1"]["escalation_changed"] and reg.escalation[reg.slot("bed-1")] == 2
+    assert reg.sweep(classify) == []  # prochain pas pas encore atteint
+    reg.push("bed-1", np.full(60, 140.0))
+    reg.push("bed-2", np.full(40, 140.0))
+    out = dict(reg.sweep(classify))
+    assert calls[-1] == 2 and out["bed-1"]["sample_end"] == 300 and not out["bed-1"]["escalation_changed"]
+    reg.push("bed-1", np.full(60, 140.0))
+    out = dict(reg.sweep(lambda w, q: [{"type": "error", "detail": "signal loss"}] * len(w)))
+    assert not out["bed-1"]["escalation_changed"] and reg.escalation[reg.slot("bed-1")] == 2
+    with pytest.raises(sessions.SessionLimitError):
+        reg.open("bed-4")
+    nbytes = reg.nbytes()
+    reg.last_seen[reg.slot("bed-3")] -= 120
+    assert reg.evict_idle() == ["bed-3"] and "bed-3" not in reg
+    reg.open("bed-4")
+    assert reg.nbytes() == nbytes
+
+
+def test_stream_pushes_sweep_classifications(monkeypatch):
+    from agents.ctg_monitor.src import main as ctg_main
+
+    monkeypatch.setattr(ctg_main, "_sessions", ctg_main.sessions.SessionRegistry(max_beds=2, window_s=60, hop_s=15))
+    monkeypatch.setattr(ctg_main, "_SWEEP_INTERVAL_S", 0.02)
+    fhr = _synthetic_fhr(105)
+    with client.websocket_connect("/api/ctg-monitor/stream?hop_s=15") as ws:
+        ws.send_json({"patient_id": "bed-1", "fhr": fhr[:300], "uc": [10.0] * 300})
+        msg = ws.receive_json()
+        assert msg["type"] == "classification" and msg["patient_id"] == "bed-1", msg
+        assert msg["sample_end"] == 300
+        assert 130 < msg["baseline_bpm"] < 150 and msg["stv_ms"] > 0
+        assert msg["classification"] in ctg_main.CLASSES and msg["signal_quality"] == 1.0
+        ws.send_json({"patient_id": "bed-1", "fhr": fhr[300:]})
+        assert ws.receive_json()["sample_end"] == 420
+
+        ws.send_json({"patient_id": "bed-2", "fhr": [0.0] * 240})
+        assert "signal loss" in ws.receive_json()["detail"]
+        ws.send_json({"patient_id": "bed-3", "fhr": [140.0]})
+        assert "limit" in ws.receive_json()["detail"]
+        ws.send_json({"patient_id": "bed-1", "fhr": [140.0], "uc": [1.0, 2.0]})
+        assert ws.receive_json()["type"] == "error"
+        assert len(ctg_main._sessions) == 2
+    assert len(ctg_main._sessions) == 0
+
+
+def test_stream_bed_owned_by_first_connection(monkeypatch):
+    from agents.ctg_monitor.src import main as ctg_main
+
+    monkeypatch.setattr(ctg_main, "_sessions", ctg_main.sessions.SessionRegistry(max_beds=2, window_s=60, hop_s=15))
+    monkeypatch.setattr(ctg_main, "_SWEEP_INTERVAL_S", 0.02)
+    fhr = _synthetic_fhr(90)
+    with client.websocket_connect("/api/ctg-monitor/stream") as first:
+        first.send_json({"patient_id": "bed-1", "fhr": fhr[:200]})
+        first.send_json({"patient_id": "bed-1"})  # aller-retour : le premier bloc est ingéré avant la 2e socket
+        assert first.receive_json()["type"] == "error"
+        with client.websocket_connect("/api/ctg-monitor/stream") as second:
+            second.send_json({"patient_id": "bed-1", "fhr": [90.0] * 200})
+            msg = second.receive_json()
+            assert msg["type"] == "error" and "another connection" in msg["detail"]
+            second.send_json({"patient_id": "bed-1", "fhr": [90.0], "close": True})
+            assert second.receive_json()["type"] == "error"
+        # Déconnexion de la seconde socket : le lit de la première reste ouvert, ses échantillons intacts
+        assert "bed-1" in ctg_main._sessions
+        assert ctg_main._sessions.total[ctg_main._sessions.slot("bed-1")] == 200
+        first.send_json({"patient_id": "bed-1", "fhr": fhr[200:240]})
+        msg = first.receive_json()
+        assert msg["type"] == "classification" and msg["patient_id"] == "bed-1" and msg["sample_end"] == 240
+    assert "bed-1" not in ctg_main._sessions and "bed-1" not in ctg_main._subscribers
+
+
+def test_critical_narrative_hedges_on_next_claude_model(monkeypatch):
+    """Chaîne réelle + filtre _is_claude : le hedge part bien sur un second modèle API."""
+    from types import SimpleNamespace
+
+    from agents.ctg_monitor.src import main as ctg_main
+    from shared.llm_client import hedging
+    from shared.llm_router import LatencyTracker, LLMRouter
+
+    router = LLMRouter(tracker=LatencyTracker(window=50, alpha=0.5, ttl_s=300, min_samples=5))
+    for _ in range(5):
+        router.record_success("claude-sonnet-4-5", 50)
+    delays = {"claude-sonnet-4-5-20250929": 1.0, "claude-sonnet-4-20250514": 0.01}
+    calls: list[str] = []
+
+    async def create(**kwargs):
+        calls.append(kwargs["model"])
+        await asyncio.sleep(delays[kwargs["model"]])
+        return SimpleNamespace(content=[SimpleNamespace(text=f"narratif {kwargs['model']}")], usage=None)
+
+    fake = SimpleNamespace(messages=SimpleNamespace(create=create))
+    monkeypatch.setattr(ctg_main, "router_llm", router)
+    monkeypatch.setattr(ctg_main, "get_async_client", lambda provider: fake)
+    monkeypatch.setattr(hedging, "BUDGET", hedging.HedgeBudget(percent=100))
+    assert router.next_in_chain("claude-sonnet-4-5", ctg_main._is_claude) == "claude-sonnet-4"
+    text = asyncio.run(ctg_main._llm_analyze_async(140.0, 12.0, 2, 0.9))
+    assert calls == ["claude-sonnet-4-5-20250929", "claude-sonnet-4-20250514"]
+    assert text == "narratif claude-sonnet-4-20250514"
@@ -0,0 +1,131 @@
+"""CTG inference backends: ONNX Runtime and int8 variants vs eager PyTorch on fetal_health.csv."""
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+root = Path(__file__).resolve().parent.parent.parent
+sys.path.insert(0, str(root))
+sys.path.insert(0, str(root / "ml"))
+from tests.conftest import fetal_health_rows  # noqa: E402
+
+
+@pytest.fixture
+def exported_onnx(random_ctg_model):
+    pytest.importorskip("onnxruntime")
+    pytest.importorskip("onnx")
+    from export_ctg_onnx import export_onnx, load_torch_model
+
+    model, preproc = load_torch_model(random_ctg_model)
+    export_onnx(model, random_ctg_model / "ctg_classifier.onnx", int(preproc["input_len"]))
+    return random_ctg_model
+
+
+def test_onnx_backend_matches_torch_on_fetal_health(exported_onnx, monkeypatch):
+    import ml_ctg
+
+    rows = fetal_health_rows()[0][::8]  # ~270 lignes réparties sur tout le fichier (1 CPU en CI)
+    monkeypatch.setenv("CTG_INFERENCE_BACKEND", "torch")
+    ref = ml_ctg.predict_proba_batch(rows)
+
+    monkeypatch.setenv("CTG_INFERENCE_BACKEND", "onnx")
+    monkeypatch.setattr(ml_ctg, "_MODEL", None)
+    monkeypatch.setattr(ml_ctg, "_PREPROC", None)
+    got = ml_ctg.predict_proba_batch(rows)
+
+    assert type(ml_ctg._MODEL).__name__ == "_OnnxRunner"
+    np.testing.assert_allclose(got, ref, atol=1e-4)
+    assert (got.argmax(axis=1) == ref.argmax(axis=1)).all()
+
+
+def test_int8_precision_serves_quantized_artifact(random_ctg_model, monkeypatch):
+    import torch
+    import ml_ctg
+    from export_ctg_onnx import load_torch_model
+    from shared.ctg_model.quantization import quantize_dynamic_int8
+
+    model, _ = load_torch_model(random_ctg_model)
+    torch.save(quantize_dynamic_int8(model).state_dict(), random_ctg_model / "ctg_classifier_int8.pt")
+    rows = fetal_health_rows()[0][::16]
+    ref = ml_ctg.predict_proba_batch(rows)
+
+    monkeypatch.setenv("CTG_MODEL_PRECISION", "int8")
+    monkeypatch.setattr(ml_ctg, "_MODEL", None)
+    monkeypatch.setattr(ml_ctg, "_PREPROC", None)
+    got = ml_ctg.predict_proba_batch(rows)
+
+    assert ml_ctg.model_version() == "ctg-tabular-2.0-int8"
+    np.testing.assert_allclose(got, ref, atol=0.05)
+    assert (got.argmax(axis=1) == ref.argmax(axis=1)).mean() >= 0.95
+
+
+def test_optimized_model_matches_eager_and_is_cached(random_ctg_model, monkeypatch):
+    import ml_ctg
+
+    rows = fetal_health_rows()[0][::32]
+    monkeypatch.setenv("CTG_OPTIMIZE", "0")
+    ref = ml_ctg.predict_proba_batch(rows)
+
+    monkeypatch.setenv("CTG_OPTIMIZE", "1")
+    for expected in ("built", "cache-hit"):
+        monkeypatch.setattr(ml_ctg, "_MODEL", None)
+        monkeypatch.setattr(ml_ctg, "_PREPROC", None)
+        got = ml_ctg.predict_proba_batch(rows)
+        assert ml_ctg.load_info()["optimization"] == f"torchscript-frozen ({expected})"
+        np.testing.assert_allclose(got, ref, atol=1e-5)
+    assert len(list((random_ctg_model / ".cache").glob("ctg_classifier.*.ts"))) == 1
+
+
+def test_bn_folding_removes_batchnorm():
+    import torch
+    from shared.ctg_model import build_ctg_classifier
+    from shared.ctg_model.optimize import fold_batchnorm, max_abs_diff
+
+    torch.manual_seed(1)
+    model = build_ctg_classifier().eval()
+    for m in model.modules():
+        if isinstance(m, torch.nn.BatchNorm1d):
+            m.running_mean.uniform_(-1, 1)
+            m.running_var.uniform_(0.5, 2.0)
+    folded = fold_batchnorm(model)
+    assert not any(isinstance(m, torch.nn.BatchNorm1d) for m in folded.modules())
+    assert max_abs_diff(model, folded, 240) < 1e-4
+
+
+def test_onnx_int8_combination_is_unavailable(random_ctg_model, monkeypatch):
+    import ml_ctg
+
+    monkeypatch.setenv("CTG_INFERENCE_BACKEND", "onnx")
+    monkeypatch.setenv("CTG_MODEL_PRECISION", "int8")
+    assert ml_ctg.model_available() is False
+
+
+def test_unknown_backend_rejected(monkeypatch):
+    sys.path.insert(0, str(root / "agents" / "ctg_monitor" / "src"))
+    import ml_ctg
+
+    monkeypatch.setenv("CTG_INFERENCE_BACKEND", "tensorrt")
+    with pytest.raises(ValueError):
+        ml_ctg.backend()
+
+
+def test_native_input_mode_checkpoint_serves(random_ctg_model, monkeypatch):
+    import json
+
+    import torch
+
+    import ml_ctg
+    from shared.ctg_model import build_ctg_classifier
+
+    p_path = random_ctg_model / "preprocessor.json"
+    preproc = json.loads(p_path.read_text(encoding="utf-8"))
+    preproc.update(input_mode="native", input_len=21)
+    p_path.write_text(json.dumps(preproc), encoding="utf-8")
+    torch.manual_seed(0)
+    torch.save(build_ctg_classifier(input_len=21).state_dict(), random_ctg_model / "ctg_classifier.pt")
+
+    preds = ml_ctg.predict_batch(fetal_health_rows(16)[0])
+    assert len(preds) == 16 and all(0 <= c <= 2 and 0 < p <= 1 for c, p in preds)
+    assert ml_ctg.load_info()["input_mode"] == "native"
+    assert ml_ctg.model_version() == "ctg-tabular-2.0-native"
@@ -1,3 +1,36 @@
 import sys
 from pathlib import Path
-sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import pytest
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+
+@pytest.fixture
+def random_ctg_model(tmp_path, monkeypatch):
+    """Poids aléatoires (graine fixe) + preprocessor.json du dépôt, pour tester le chemin ML sans artefact."""
+    import shutil
+
+    import torch
+
+    sys.path.insert(0, str(ROOT / "agents" / "ctg_monitor" / "src"))
+    import ml_ctg
+    from shared.ctg_model import build_ctg_classifier
+
+    torch.manual_seed(0)
+    torch.save(build_ctg_classifier().state_dict(), tmp_path / "ctg_classifier.pt")
+    shutil.copy(ROOT / "agents" / "ctg_monitor" / "model" / "preprocessor.json", tmp_path / "preprocessor.json")
+    monkeypatch.setenv("CTG_MODEL_DIR", str(tmp_path))
+    monkeypatch.setattr(ml_ctg, "_MODEL", None)
+    monkeypatch.setattr(ml_ctg, "_PREPROC", None)
+    return tmp_path
+
+
+def fetal_health_rows(n: int | None = None) -> tuple[list[list[float]], list[int]]:
+    """Lignes features_21 + classes (0..2) de fetal_health.csv."""
+    lines = (ROOT.parent / "fetal_health.csv").read_text(encoding="utf-8").splitlines()[1:]
+    if n is not None:
+        lines = lines[:n]
+    rows = [[float(v) for v in line.split(";")] for line in lines]
+    return [r[:21] for r in rows], [int(r[21]) - 1 for r in rows]
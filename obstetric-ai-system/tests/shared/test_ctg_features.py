@@ -0,0 +1,69 @@
+"""21 UCI features from raw FHR/UC: fetal_health.csv column order, batch vs rolling parity, events."""
+import json
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+root = Path(__file__).resolve().parent.parent.parent
+sys.path.insert(0, str(root))
+from shared.ctg_model.features import FEATURE_COLUMNS, RollingFeatureExtractor, extract_features  # noqa: E402
+
+
+def _trace(seconds: int, seed: int = 0) -> tuple[np.ndarray, np.ndarray]:
+    rng = np.random.default_rng(seed)
+    n = seconds * 4
+    fhr = 140 + 3 * np.sin(np.arange(n) / 8) + rng.normal(0, 1, n)
+    uc = np.full(n, 10.0)
+    return fhr, uc
+
+
+def _feature(values: np.ndarray, name: str) -> float:
+    return float(values[..., FEATURE_COLUMNS.index(name)])
+
+
+def test_columns_match_preprocessor_order():
+    preproc = json.loads((root / "agents" / "ctg_monitor" / "model" / "preprocessor.json").read_text(encoding="utf-8"))
+    assert list(FEATURE_COLUMNS) == preproc["feature_columns"]
+
+
+def test_events_and_contractions_detected():
+    fhr, uc = _trace(600)
+    fhr[400:480] += 25  # accélération 20 s
+    fhr[1200:1320] -= 30  # décélération légère 30 s
+    fhr[1600:2200] -= 30  # décélération prolongée 150 s
+    uc[800:1100] += 40  # contraction 75 s
+    f = extract_features(fhr, uc)
+    assert f.shape == (21,)
+    assert _feature(f, "baseline value") == pytest.approx(140, abs=2)
+    for name in ("accelerations", "light_decelerations", "prolongued_decelerations", "uterine_contractions"):
+        assert _feature(f, name) == pytest.approx(1 / 600, rel=0.05), name
+    assert _feature(f, "severe_decelerations") == 0
+    assert _feature(f, "histogram_min") < 115 and _feature(f, "histogram_max") > 160
+
+
+def test_batch_rows_independent_and_signal_loss_ignored():
+    fhr, uc = _trace(240)
+    lossy = fhr.copy()
+    lossy[100:140] = 0.0
+    out = extract_features(np.stack([fhr, lossy, np.zeros_like(fhr)]), np.stack([uc, uc, uc]))
+    np.testing.assert_allclose(out[0], extract_features(fhr, uc))
+    assert np.isfinite(out[1]).all()
+    assert np.isnan(out[2, 0])
+
+
+@pytest.mark.parametrize("window_s", [60, 240])
+def test_rolling_matches_batch_on_last_window(window_s):
+    fhr, uc = _trace(900, seed=1)
+    fhr[1500:1700] = np.nan
+    rng = np.random.default_rng(window_s)
+    roll = RollingFeatureExtractor(window_s)
+    pos = 0
+    while pos < fhr.size:
+        k = int(rng.integers(1, 400))
+        roll.update(fhr[pos : pos + k], uc[pos : pos + k])
+        pos = min(pos + k, fhr.size)
+        if pos % 4 == 0 and pos >= window_s * 4:
+            ref = extract_features(fhr[pos - window_s * 4 : pos], uc[pos - window_s * 4 : pos])
+            np.testing.assert_allclose(roll.features(), ref, rtol=1e-9, atol=1e-9)
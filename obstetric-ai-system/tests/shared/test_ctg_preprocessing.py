@@ -0,0 +1,76 @@
+"""Parity tests: vectorized CTG preprocessing vs the former per-element loops."""
+import json
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+root = Path(__file__).resolve().parent.parent.parent
+sys.path.insert(0, str(root))
+from shared.ctg_model.preprocessing import (  # noqa: E402
+    features_to_sequences,
+    rows_to_sequences,
+    sequence_length,
+    standardize,
+)
+
+
+def _legacy_rows_to_sequences(X: np.ndarray, input_len: int) -> np.ndarray:
+    n, n_feat = X.shape
+    out = np.zeros((n, 1, input_len), dtype=np.float32)
+    for i in range(n):
+        row = X[i]
+        for t in range(input_len):
+            out[i, 0, t] = row[t % n_feat]
+    return out
+
+
+def _legacy_features_to_sequences(values: np.ndarray, preproc: dict) -> np.ndarray:
+    mean = np.array(preproc["scaler_mean"], dtype=np.float32)
+    scale = np.array(preproc["scaler_scale"], dtype=np.float32)
+    x = (np.asarray(values, dtype=np.float32) - mean) / np.maximum(scale, 1e-8)
+    return _legacy_rows_to_sequences(x, int(preproc["input_len"]))
+
+
+@pytest.mark.parametrize("n,n_feat,input_len", [(1, 21, 240), (64, 21, 240), (5, 7, 30), (3, 21, 21), (2, 21, 10)])
+def test_rows_to_sequences_matches_loop(n, n_feat, input_len):
+    X = np.random.default_rng(n).standard_normal((n, n_feat)).astype(np.float32)
+    out = rows_to_sequences(X, input_len)
+    assert out.shape == (n, 1, input_len)
+    assert out.dtype == np.float32
+    np.testing.assert_array_equal(out, _legacy_rows_to_sequences(X, input_len))
+
+
+def test_features_to_sequences_matches_legacy_on_fetal_health():
+    preproc = json.loads((root / "agents" / "ctg_monitor" / "model" / "preprocessor.json").read_text(encoding="utf-8"))
+    lines = (root.parent / "fetal_health.csv").read_text(encoding="utf-8").splitlines()[1:]
+    X = np.array([[float(v) for v in line.split(";")[:21]] for line in lines], dtype=np.float32)
+    np.testing.assert_array_equal(features_to_sequences(X, preproc), _legacy_features_to_sequences(X, preproc))
+
+
+def test_standardize_guards_zero_scale():
+    out = standardize(np.ones((2, 3)), np.zeros(3), np.array([1.0, 0.0, 2.0]))
+    assert np.isfinite(out).all()
+    assert out.dtype == np.float32
+
+
+def test_rows_to_sequences_rejects_1d():
+    with pytest.raises(ValueError):
+        rows_to_sequences(np.zeros(21, dtype=np.float32))
+
+
+def test_native_input_mode_is_one_step_per_feature():
+    preproc = json.loads((root / "agents" / "ctg_monitor" / "model" / "preprocessor.json").read_text(encoding="utf-8"))
+    preproc.pop("input_mode", None)
+    X = np.random.default_rng(0).standard_normal((4, 21)).astype(np.float32)
+    native = {**preproc, "input_mode": "native", "input_len": sequence_length("native", 21)}
+    seq = features_to_sequences(X, native)
+    assert seq.shape == (4, 1, 21)
+    np.testing.assert_array_equal(seq[:, 0, :], standardize(X, preproc["scaler_mean"], preproc["scaler_scale"]))
+    # Sans clé input_mode : comportement historique (tuilage à 240)
+    assert features_to_sequences(X, preproc).shape == (4, 1, 240)
+    with pytest.raises(ValueError):
+        features_to_sequences(X, {**native, "input_len": 240})
+    with pytest.raises(ValueError):
+        sequence_length("embedded", 21)
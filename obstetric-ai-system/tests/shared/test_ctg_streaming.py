@@ -0,0 +1,107 @@
+"""Streaming CTG inference: exact conv / forward-LSTM parts, chunking invariance, batched state."""
+import sys
+from pathlib import Path
+
+import pytest
+
+torch = pytest.importorskip("torch")
+root = Path(__file__).resolve().parent.parent.parent
+sys.path.insert(0, str(root))
+from shared.ctg_model import build_ctg_classifier  # noqa: E402
+from shared.ctg_model.optimize import fold_batchnorm  # noqa: E402
+from shared.ctg_model.streaming import StreamingCTGClassifier, StreamState  # noqa: E402
+
+
+@pytest.fixture
+def model():
+    torch.manual_seed(0)
+    m = build_ctg_classifier()
+    # BN non triviales (sinon le repliage est l'identité)
+    for bn in (m.conv[1], m.conv[4], m.conv[7]):
+        bn.running_mean.uniform_(-0.5, 0.5)
+        bn.running_var.uniform_(0.5, 2.0)
+    return m.eval()
+
+
+def _chunks(x, sizes):
+    pos = 0
+    for n in sizes:
+        yield x[:, :, pos : pos + n]
+        pos += n
+
+
+def test_streaming_conv_equals_full_conv_delayed(model):
+    stream = StreamingCTGClassifier(model)
+    x = torch.randn(2, 1, 120)
+    state = stream.init_state(2)
+    out = torch.cat([stream.conv_step(c, state) for c in _chunks(x, [7, 1, 40, 72])], dim=2)
+    with torch.no_grad():
+        full = fold_batchnorm(model).conv(x)
+    d = stream.delay
+    assert d == 6
+    torch.testing.assert_close(out[:, :, d:], full[:, :, :-d], atol=1e-5, rtol=1e-5)
+
+
+def test_forward_lstm_state_is_exact_across_chunks(model):
+    stream = StreamingCTGClassifier(model)
+    feats = torch.randn(1, 90, 256)
+    state = stream.init_state(1)
+    out = torch.cat([stream.lstm_step(feats[:, i : i + 30], state) for i in (0, 30, 60)], dim=1)
+    with torch.no_grad():
+        full, _ = model.lstm(feats)
+    # Direction avant de la 1re couche : état (h, c) porté d'un appel à l'autre = passage unique
+    fwd = torch.nn.LSTM(256, 128, batch_first=True)
+    for name in ("weight_ih", "weight_hh", "bias_ih", "bias_hh"):
+        getattr(fwd, f"{name}_l0").data.copy_(getattr(model.lstm, f"{name}_l0").data)
+    with torch.no_grad():
+        _, (h_ref, c_ref) = fwd(feats)
+    torch.testing.assert_close(state.h[0], h_ref, atol=1e-5, rtol=1e-5)
+    torch.testing.assert_close(state.c[0], c_ref, atol=1e-5, rtol=1e-5)
+    assert out.shape == full.shape
+
+
+def test_batched_step_matches_per_stream_steps(model):
+    stream = StreamingCTGClassifier(model, window_hops=4)
+    x = torch.randn(3, 1, 240)
+    # Flux décalés : positions d'anneau différentes par ligne
+    singles = [stream.init_state(1) for _ in range(3)]
+    for i, st in enumerate(singles):
+        for _ in range(i):
+            stream.step(torch.randn(1, 1, 60), st)
+    batched = StreamState.cat(singles)
+    ref = [stream.step(x[i : i + 1, :, :60], s) for i, s in enumerate(singles)]
+    got = stream.step(x[:, :, :60], batched)
+    torch.testing.assert_close(got, torch.cat(ref), atol=1e-5, rtol=1e-5)
+    for a, b in zip(batched.split(), singles):
+        torch.testing.assert_close(a.pooled, b.pooled)
+        assert int(a.pos) == int(b.pos)
+
+
+def test_step_cost_independent_of_history(model):
+    stream = StreamingCTGClassifier(model, window_hops=4)
+    state = stream.init_state(1)
+    frames: list[int] = []
+    hooks = [
+        lstm.register_forward_hook(lambda mod, args, out: frames.append(args[0].shape[1]))
+        for lstm in stream.forward_lstms + stream.backward_lstms
+    ]
+
+    def hop_cost() -> tuple:
+        frames.clear()
+        logits = stream.step(torch.randn(1, 1, 60), state)
+        assert logits.shape == (1, 3)
+        sizes = [t.numel() for t in (*state.conv, *state.h, *state.c, state.pooled, state.counts)]
+        return tuple(frames), sizes
+
+    for _ in range(2):
+        hop_cost()
+    early = hop_cost()
+    for _ in range(200):
+        hop_cost()
+    late = hop_cost()
+    for h in hooks:
+        h.remove()
+    # Même travail (trames vues par chaque LSTM) et même état porté après 3 ou 204 pas
+    assert early == late and set(early[0]) == {60}
+    assert int(state.samples) == 204 * 60
+    assert state.conv[0].shape[-1] == 6 and state.pooled.shape[0] == 4
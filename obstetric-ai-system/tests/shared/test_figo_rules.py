@@ -0,0 +1,89 @@
+"""FIGO 2015 rule classifier on raw FHR/UC: baseline, variability, deceleration typing, batching."""
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+root = Path(__file__).resolve().parent.parent.parent
+sys.path.insert(0, str(root))
+from shared.ctg_model import figo_rules  # noqa: E402
+
+_RATE = 4
+
+
+def _trace(minutes: float, baseline: float = 140.0, amp: float = 4.0, seed: int = 0) -> tuple[np.ndarray, np.ndarray]:
+    rng = np.random.default_rng(seed)
+    t = np.arange(int(minutes * 60 * _RATE)) / _RATE
+    return baseline + amp * np.sin(2 * np.pi * t / 20) + rng.normal(0, 1, t.size), np.full(t.size, 10.0)
+
+
+def _decelerate(fhr: np.ndarray, start_s: float, duration_s: float, depth: float, onset_s: float) -> None:
+    t = np.arange(fhr.size) / _RATE - start_s
+    m = (t >= 0) & (t < duration_s)
+    fhr[m] -= depth * np.minimum(1, np.minimum(t[m], duration_s - t[m]) / onset_s)
+
+
+def _contract(uc: np.ndarray, peak_s: float) -> None:
+    t = np.arange(uc.size) / _RATE
+    uc += 50 * np.exp(-(((t - peak_s) / 25) ** 2))
+
+
+def test_normal_bradycardia_and_reduced_variability():
+    fhr = np.stack([_trace(20)[0], _trace(20, baseline=90)[0], _trace(20, amp=0.5)[0], _trace(20, baseline=170)[0]])
+    a = figo_rules.assess(fhr)
+    assert list(a.classification) == [0, 2, 1, 1]
+    assert a.baseline_bpm[0] == pytest.approx(140, abs=1)
+    assert 5 <= a.variability_bpm[0] <= 25 and a.variability_bpm[2] < 5
+    assert a.reduced_variability_min[2] == 20
+    assert a.reasons(0) == [] and "bradycardie" in a.reasons(1)[0]
+
+
+def test_deceleration_types_follow_contraction_timing():
+    rows = []
+    for kind in ("early", "late", "variable"):
+        fhr, uc = _trace(30)
+        for peak in range(60, 1800, 180):
+            _contract(uc, peak)
+            if kind == "early":
+                _decelerate(fhr, peak - 40, 80, 40, 40)
+            elif kind == "late":
+                _decelerate(fhr, peak - 20, 80, 40, 40)
+            else:
+                _decelerate(fhr, peak - 10, 40, 40, 8)
+        rows.append((fhr, uc))
+    a = figo_rules.assess(np.stack([r[0] for r in rows]), np.stack([r[1] for r in rows]))
+    assert list(a.contractions) == [10, 10, 10]
+    for i, kind in enumerate(("early", "late", "variable")):
+        assert a.decelerations[kind][i] == 10
+    assert a.repetitive.all() and list(a.classification) == [1, 1, 1]
+
+
+def test_prolonged_deceleration_over_five_minutes_is_pathological():
+    fhr, uc = _trace(20)
+    _decelerate(fhr, 300, 200, 40, 20)  # 3 min : suspect
+    short = fhr.copy()
+    _decelerate(fhr, 600, 400, 40, 20)  # > 5 min : pathologique
+    a = figo_rules.assess(np.stack([short, fhr]), np.stack([uc, uc]))
+    assert list(a.decelerations["prolonged"]) == [1, 2]
+    assert list(a.classification) == [1, 2]
+
+
+def test_signal_loss_lowers_confidence_and_summary_fallback():
+    fhr, _ = _trace(5)
+    fhr[: fhr.size // 2] = 0
+    a = figo_rules.assess(np.stack([fhr, np.full(fhr.size, np.nan)]))
+    assert a.confidence[0] == pytest.approx(figo_rules.RULE_CONFIDENCE * 0.5, abs=0.01)
+    assert a.classification[1] == 1 and a.confidence[1] == 0
+    assert figo_rules.classify_summary(140, 12)[0] == 0
+    assert figo_rules.classify_summary(140, 2.0)[0] == 1
+    assert figo_rules.classify_summary(100, 0.5, decelerations_severe=0.1)[0] == 2
+
+
+def test_thirty_minute_trace_takes_milliseconds():
+    fhr, uc = _trace(30)
+    figo_rules.assess(fhr, uc)
+    t0 = time.perf_counter()
+    figo_rules.assess(fhr, uc)
+    assert time.perf_counter() - t0 < 0.1
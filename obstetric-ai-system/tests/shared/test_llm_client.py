@@ -0,0 +1,149 @@
+"""Pooled LLM clients: one per (provider, key), pool settings from env, one async client per event loop."""
+import asyncio
+import sys
+from pathlib import Path
+
+import pytest
+
+root = Path(__file__).resolve().parent.parent.parent
+sys.path.insert(0, str(root))
+from shared import llm_client  # noqa: E402
+
+pytest.importorskip("anthropic")
+
+
+@pytest.fixture(autouse=True)
+def _fresh_pool():
+    llm_client.reset_clients()
+    yield
+    llm_client.reset_clients()
+
+
+def test_sync_client_reused_per_provider_and_key(monkeypatch):
+    monkeypatch.setenv("ANTHROPIC_API_KEY", "sk-ant-test-env")
+    monkeypatch.setenv("LLM_POOL_MAX_CONNECTIONS", "7")
+    monkeypatch.setenv("LLM_CONNECT_TIMEOUT_S", "1.5")
+    first = llm_client.get_client("anthropic")
+    assert llm_client.get_client("anthropic") is first
+    assert llm_client.get_client("anthropic", api_key="sk-ant-test-env") is first
+    assert llm_client.get_client("anthropic", api_key="sk-ant-other") is not first
+    assert first.timeout.connect == 1.5
+    assert llm_client.pool_config().max_connections == 7
+    with pytest.raises(ValueError):
+        llm_client.get_client("mistral")
+    llm_client.reset_clients()
+    assert llm_client.get_client("anthropic") is not first
+
+
+def test_async_client_one_per_event_loop(monkeypatch):
+    monkeypatch.setenv("ANTHROPIC_API_KEY", "sk-ant-test-env")
+
+    async def twice():
+        a = llm_client.get_async_client("anthropic")
+        b = llm_client.get_async_client("anthropic")
+        assert a is b
+        await llm_client.aclose_clients()
+        return a
+
+    assert asyncio.run(twice()) is not asyncio.run(twice())
+
+
+def test_cached_system_marks_only_the_system_prompt(monkeypatch):
+    blocks = llm_client.cached_system("Prompt système stable")
+    assert blocks == [{"type": "text", "text": "Prompt système stable", "cache_control": {"type": "ephemeral"}}]
+    monkeypatch.setenv("LLM_PROMPT_CACHE_TTL", "1h")
+    assert llm_client.cached_system("x")[0]["cache_control"] == {"type": "ephemeral", "ttl": "1h"}
+    monkeypatch.setenv("LLM_PROMPT_CACHE", "0")
+    assert llm_client.cached_system("x") == "x"
+
+
+def test_record_usage_counts_cache_reads_and_writes_per_agent():
+    from types import SimpleNamespace
+
+    from shared.metrics import REGISTRY
+
+    tokens = REGISTRY.counter("obstetric_llm_input_tokens_total", "")
+    labels = {"agent": "TestAgent", "provider": "anthropic"}
+    before = {k: tokens.value({**labels, "kind": k}) for k in ("uncached", "cache_read", "cache_write")}
+    write = SimpleNamespace(
+        usage=SimpleNamespace(input_tokens=40, cache_creation_input_tokens=1500, cache_read_input_tokens=0, output_tokens=200)
+    )
+    read = SimpleNamespace(usage={"input_tokens": 42, "cache_read_input_tokens": 1500, "output_tokens": 180})
+    assert llm_client.record_usage("TestAgent", write)["cache_write"] == 1500
+    assert llm_client.record_usage("TestAgent", read)["cache_read"] == 1500
+    assert tokens.value({**labels, "kind": "uncached"}) - before["uncached"] == 82
+    assert tokens.value({**labels, "kind": "cache_read"}) - before["cache_read"] == 1500
+    assert tokens.value({**labels, "kind": "cache_write"}) - before["cache_write"] == 1500
+    openai_resp = SimpleNamespace(
+        usage=SimpleNamespace(prompt_tokens=1600, completion_tokens=90, prompt_tokens_details=SimpleNamespace(cached_tokens=1024))
+    )
+    assert llm_client.record_usage("TestAgent", openai_resp, provider="openai") == {
+        "uncached": 576, "cache_read": 1024, "cache_write": 0, "output": 90
+    }
+    assert llm_client.record_usage("TestAgent", SimpleNamespace()) == {}
+
+
+def test_hedged_call_fires_after_p90_within_budget_and_cancels_loser():
+    from shared.llm_client.hedging import _cancelled, _hedges, _wins
+    from shared.llm_router import LatencyTracker, LLMRouter
+
+    primary, hedge = "claude-opus-4-5", "claude-sonnet-4-5"
+
+    def fresh_router() -> LLMRouter:
+        r = LLMRouter(tracker=LatencyTracker(window=50, alpha=0.5, ttl_s=300, min_samples=5))
+        for _ in range(5):
+            r.record_success(primary, 50)  # p90 primaire = 50 ms
+        return r
+
+    router = fresh_router()
+    # Cible du hedge : modèle suivant de la chaîne, sur un autre modèle API
+    assert router.next_in_chain(primary) == hedge
+    assert router.next_in_chain(hedge, eligible=lambda m: "claude" in m) == "claude-sonnet-4"
+    assert router.next_in_chain("claude-sonnet-4", eligible=lambda m: "claude" in m) is None
+    aliased = fresh_router()
+    aliased.API_MODEL_IDS = {**LLMRouter.API_MODEL_IDS, "claude-sonnet-4": aliased.get_api_model_id(hedge)}
+    assert aliased.next_in_chain(hedge) == "mistral-large"  # même modèle API : requête dupliquée, ignoré
+    delays = {primary: 0.5, hedge: 0.01}
+    cancelled: list[str] = []
+
+    async def call(model_id: str) -> str:
+        try:
+            await asyncio.sleep(abs(delays[model_id]))
+        except asyncio.CancelledError:
+            cancelled.append(model_id)
+            raise
+        if delays[model_id] < 0:
+            raise RuntimeError("overloaded")
+        return f"narratif {model_id}"
+
+    def run(budget, agent_id):
+        return asyncio.run(llm_client.hedged_call(router, primary, call, agent_id=agent_id, budget=budget))
+
+    assert run(llm_client.HedgeBudget(percent=100), "HedgeTest") == (hedge, f"narratif {hedge}")
+    assert cancelled == [primary]
+    assert _wins.value({"agent": "HedgeTest", "winner": "hedge"}) == 1
+    # Perdant annulé : compté, mais hors statistiques de latence (durée tronquée)
+    assert _cancelled.value({"agent": "HedgeTest", "model": primary}) == 1
+    assert router.latency_stats()[primary]["samples"] == 5
+    # Budget épuisé : pas de second appel, on attend le primaire
+    assert run(llm_client.HedgeBudget(percent=0), "HedgeNoBudget")[0] == primary
+    assert _hedges.value({"agent": "HedgeNoBudget", "result": "budget_exhausted"}) == 1
+    # Primaire en erreur après le départ du hedge, plus lent : on attend la réponse du hedge
+    delays.update({primary: -0.1, hedge: 0.2})
+    router = fresh_router()
+    assert run(llm_client.HedgeBudget(percent=100), "HedgeTest")[0] == hedge
+    assert router.latency_stats()[primary]["error_rate"] > 0
+    # Urgence normale : appel simple, sans hedge
+    delays[primary] = 0.01
+    assert asyncio.run(
+        llm_client.hedged_call(router, primary, call, agent_id="HedgeTest", urgency="normal")
+    ) == (primary, f"narratif {primary}")
+
+
+def test_hedge_budget_caps_share_of_traffic():
+    budget = llm_client.HedgeBudget(percent=10, burst=2)
+    fired = 0
+    for _ in range(1000):
+        budget.on_request()
+        fired += budget.try_acquire()
+    assert 99 <= fired <= 100
@@ -0,0 +1,69 @@
+"""LLMRouter latency tracking: EWMA / p95 / error rate per model and deadline-aware fallback."""
+import sys
+from pathlib import Path
+
+root = Path(__file__).resolve().parent.parent.parent
+sys.path.insert(0, str(root))
+from shared.llm_router import LatencyTracker, LLMRouter  # noqa: E402
+from shared.llm_router.router import TaskType  # noqa: E402
+
+
+def _router() -> LLMRouter:
+    return LLMRouter(tracker=LatencyTracker(window=50, alpha=0.5, ttl_s=300, min_samples=5))
+
+
+def test_stats_use_prior_then_observed_latency():
+    router = _router()
+    assert router.p95_ms("claude-sonnet-4-5") == LLMRouter.MODELS["claude-sonnet-4-5"]["latency_ms"]
+    for ms in (100, 200, 300, 400, 500, 600, 700, 800, 900, 1000):
+        router.record_success("claude-sonnet-4-5", ms)
+    router.record_failure("claude-sonnet-4-5", 5000)
+    stats = router.latency_stats()["claude-sonnet-4-5"]
+    assert stats["samples"] == 11 and stats["p95_ms"] == 5000 and stats["p90_ms"] == 1000
+    assert stats["error_rate"] == round(1 / 11, 4) and 1000 < stats["ewma_ms"] < 5000
+
+
+def test_deadline_falls_back_down_the_chain_when_provider_degrades():
+    router = _router()
+    # Défaut : sonnet-4-5 (prior 1800 ms) tient le SLO critique
+    assert router.route(task=TaskType.FAST_ANALYSIS, urgency="critical", deadline_ms=3000) == "claude-sonnet-4-5"
+    for _ in range(5):
+        router.record_success("claude-sonnet-4-5", 9000)
+    assert router.route(task=TaskType.FAST_ANALYSIS, urgency="critical", deadline_ms=3000) == "claude-sonnet-4"
+    # Modèle suivant en erreur : on descend encore
+    for _ in range(5):
+        router.record_failure("claude-sonnet-4", 800)
+    router._circuit_open.clear()
+    assert router.route(task=TaskType.FAST_ANALYSIS, urgency="critical", deadline_ms=3000) == "mistral-large"
+    # Aucun candidat ne tient : p95 le plus bas parmi les modèles sains
+    assert router.route(task=TaskType.FAST_ANALYSIS, deadline_ms=100) == "mistral-large"
+    # Sans deadline ni urgence critique : routage historique inchangé
+    assert router.route(task=TaskType.FAST_ANALYSIS) == "claude-sonnet-4-5"
+    assert router.route(task=TaskType.PRENATAL_ANALYSIS) == "claude-opus-4-5"
+
+
+def test_deadline_fallback_respects_eligible_models():
+    router = _router()
+    for _ in range(5):
+        router.record_success("claude-sonnet-4-5", 9000)
+        router.record_success("claude-sonnet-4", 9000)
+    claude = lambda m: "claude" in m  # noqa: E731
+    assert router.route(task=TaskType.FAST_ANALYSIS, urgency="critical", deadline_ms=3000) == "mistral-large"
+    # Agent ne pouvant appeler que Claude : meilleur effort parmi les modèles Claude, jamais mistral
+    assert router.route(task=TaskType.FAST_ANALYSIS, urgency="critical", deadline_ms=3000, eligible=claude) in (
+        "claude-sonnet-4-5",
+        "claude-sonnet-4",
+    )
+
+
+def test_deadline_fallback_skips_models_on_the_same_api_model():
+    router = _router()
+    router.API_MODEL_IDS = {**LLMRouter.API_MODEL_IDS, "claude-sonnet-4": "claude-sonnet-4-5-20250929"}
+    for _ in range(5):
+        router.record_success("claude-sonnet-4-5", 9000)
+    # sonnet-4 (prior 1500 ms) « tiendrait » le SLO mais appellerait le même modèle API lent
+    assert router.route(task=TaskType.FAST_ANALYSIS, urgency="critical", deadline_ms=3000) == "mistral-large"
+    claude = lambda m: "claude" in m  # noqa: E731
+    assert router.route(task=TaskType.FAST_ANALYSIS, urgency="critical", deadline_ms=3000, eligible=claude) == (
+        "claude-sonnet-4-5"
+    )
@@ -0,0 +1,87 @@
+"""Compiled system prompts: cache identity, token estimate, deterministic budget truncation."""
+import json
+import sys
+from pathlib import Path
+
+root = Path(__file__).resolve().parent.parent.parent
+sys.path.insert(0, str(root))
+from shared.prompt_system import build_llm_system_prompt, compile_prompt, estimate_tokens  # noqa: E402
+from shared.prompt_system import config_version, loader  # noqa: E402
+
+
+def test_compiled_prompt_cached_and_sized():
+    cp = compile_prompt("CTGAnalysisPrompt")
+    assert compile_prompt("CTGAnalysisPrompt") is cp
+    assert build_llm_system_prompt("CTGAnalysisPrompt") == cp.text
+    assert cp.tokens == estimate_tokens(cp.text) > 0
+    assert [name for name, _ in cp.section_tokens] == ["global", "system", "chain_of_thought", "few_shot"]
+    assert not cp.truncated and cp.budget is None
+    assert compile_prompt("CTGAnalysisPrompt", include_few_shot=False) is not cp
+
+
+def test_budget_drops_few_shot_then_cot_steps(monkeypatch):
+    full = compile_prompt("CTGAnalysisPrompt")
+    sections = dict(full.section_tokens)
+    no_few = full.tokens - sections["few_shot"]
+    cp = compile_prompt("CTGAnalysisPrompt", max_tokens=no_few)
+    assert cp.dropped_few_shot == 2 and cp.dropped_cot_steps == 0 and cp.tokens <= no_few
+    assert "few-shot" not in cp.text and "Raisonnement" in cp.text
+    tight = compile_prompt("CTGAnalysisPrompt", max_tokens=no_few - 40)
+    assert tight.dropped_cot_steps > 0 and tight.tokens <= no_few - 40
+    assert compile_prompt("CTGAnalysisPrompt", max_tokens=no_few - 40).text == tight.text
+    floor = compile_prompt("CTGAnalysisPrompt", max_tokens=10)
+    assert floor.over_budget and "Raisonnement" not in floor.text and full.text.startswith(floor.text)
+    monkeypatch.setenv("LLM_PROMPT_MAX_TOKENS", str(no_few))
+    assert build_llm_system_prompt("CTGAnalysisPrompt") == cp.text
+
+
+def test_hot_reload_bumps_version_and_recompiles(monkeypatch, tmp_path):
+    src = loader._JSON_PATH.read_text(encoding="utf-8")
+    path = tmp_path / "prompt_system_v2.json"
+    path.write_text(src, encoding="utf-8")
+    monkeypatch.setattr(loader, "_JSON_PATH", path)
+    monkeypatch.setattr(loader, "_state", None)
+    cp = compile_prompt("ApgarPrompt")
+    v1 = config_version()
+    assert cp.config_version == v1 and v1.endswith("+" + loader.current().digest)
+
+    path.write_text(src, encoding="utf-8")
+    assert not loader.reload_if_changed(force=True)  # même contenu : même version
+    path.write_text("{ invalid", encoding="utf-8")
+    assert not loader.reload_if_changed(force=True) and config_version() == v1
+
+    cfg = json.loads(src)
+    cfg["spec"]["prompt_templates"]["ApgarPrompt"]["system_prompt"] = "Nouveau prompt Apgar (rechargé)."
+    path.write_text(json.dumps(cfg), encoding="utf-8")
+    seen = []
+    monkeypatch.setattr(loader, "_listeners", [*loader._listeners, seen.append])
+    assert loader.reload_if_changed(force=True)
+    fresh = compile_prompt("ApgarPrompt")
+    assert config_version() != v1 and fresh.config_version == config_version() == seen[0].version
+    assert "Nouveau prompt Apgar (rechargé)." in fresh.text and fresh.text != cp.text
+
+
+def test_non_dict_few_shot_keeps_header_like_legacy_builder(monkeypatch, tmp_path):
+    cfg = json.loads(loader._JSON_PATH.read_text(encoding="utf-8"))
+    cfg["spec"]["prompt_templates"]["ApgarPrompt"]["few_shot_examples"] = ["exemple libre", 3]
+    path = tmp_path / "prompt_system_v2.json"
+    path.write_text(json.dumps(cfg), encoding="utf-8")
+    monkeypatch.setattr(loader, "_JSON_PATH", path)
+    monkeypatch.setattr(loader, "_state", None)
+    text = build_llm_system_prompt("ApgarPrompt")
+    # Assemblage historique : en-tête few-shot seul quand aucun exemple n'est un dict
+    assert text.endswith("\n\n--- Exemples few-shot (style attendu) ---")
+    cp = compile_prompt("ApgarPrompt", max_tokens=compile_prompt("ApgarPrompt").tokens - 1)
+    assert "few-shot" not in cp.text and cp.dropped_few_shot == 0 and cp.dropped_cot_steps == 0
+
+
+def test_agent_budget_threaded_into_system_prompt(monkeypatch):
+    from agents.ctg_monitor.src import main as ctg_main
+
+    full = compile_prompt("CTGAnalysisPrompt")
+    monkeypatch.setenv("LLM_PROMPT_CACHE", "0")
+    monkeypatch.setenv("CTG_PROMPT_MAX_TOKENS", str(full.tokens - dict(full.section_tokens)["few_shot"]))
+    _, request = ctg_main._llm_request(140, 8.0, 0, 0.9)
+    assert request["system"] != full.text and "few-shot" not in request["system"]
+    monkeypatch.delenv("CTG_PROMPT_MAX_TOKENS")
+    assert ctg_main._llm_request(140, 8.0, 0, 0.9)[1]["system"] == full.text
@@ -0,0 +1,54 @@
+"""FHR quality stage: gap interpolation, halving/doubling repair, spikes, quality ratio, hop budget."""
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+root = Path(__file__).resolve().parent.parent.parent
+sys.path.insert(0, str(root))
+from shared.ctg_model import signal_quality  # noqa: E402
+
+
+def _fhr(n: int, seed: int = 0) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    return 140 + 4 * np.sin(np.arange(n) / 6) + rng.normal(0, 1, n)
+
+
+def test_repairs_gaps_halving_doubling_and_spikes():
+    clean = _fhr(1200)
+    raw = clean.copy()
+    raw[100:140] = np.nan  # lacune 10 s : interpolée
+    raw[300:400] /= 2  # demi-fréquence
+    raw[500:520] *= 2  # double fréquence
+    raw[700] = 200  # pic isolé
+    raw[800:900] = 0  # perte 25 s : non interpolée
+    out = signal_quality.clean_fhr(raw)
+    assert out.corrected[0] == 120 and out.interpolated[0] == 41 and out.removed[0] == 1
+    np.testing.assert_allclose(out.fhr[0, 300:400], clean[300:400])
+    np.testing.assert_allclose(out.fhr[0, 500:520], clean[500:520])
+    assert np.abs(out.fhr[0, :800] - clean[:800]).max() < 10
+    assert np.isnan(out.fhr[0, 800:900]).all()
+    expected = (1200 - 100 - 161 + 0.5 * 161) / 1200
+    assert out.ratio[0] == pytest.approx(expected, abs=1e-6)
+
+
+def test_gradual_deceleration_is_not_treated_as_halving():
+    fhr = _fhr(1200)
+    t = np.arange(1200)
+    m = (t > 400) & (t < 700)
+    fhr[m] -= 70 * np.minimum(1, np.minimum(t[m] - 400, 700 - t[m]) / 100)
+    out = signal_quality.clean_fhr(fhr)
+    assert out.corrected[0] == 0 and out.ratio[0] == 1.0
+    np.testing.assert_allclose(out.fhr[0], fhr)
+
+
+def test_batch_fits_streaming_hop_budget():
+    windows = np.tile(_fhr(240), (64, 1))
+    windows[::2, 50:60] = 0
+    signal_quality.clean_fhr(windows)
+    t0 = time.perf_counter()
+    out = signal_quality.clean_fhr(windows)
+    assert time.perf_counter() - t0 < 0.05  # 64 lits, très en deçà d'un pas de 15 s
+    assert out.fhr.shape == (64, 240) and np.isfinite(out.fhr).all()